@@ -1,13 +1,24 @@
+import time
+_START_TIME = time.perf_counter() # Mốc 0 cho báo cáo thời gian khởi động
+
 import sys
+from src.utils.startup_timing import StartupTimer
+
+startup_timer = StartupTimer(_START_TIME)
 from PyQt5.QtWidgets import QApplication
+startup_timer.mark("import_qt")
 from src.ui import PuzzleWindow
+startup_timer.mark("import_ui")
 
 def main():
     """Entry point của ứng dụng"""
     app = QApplication(sys.argv)
+    startup_timer.mark("qapplication")
     window = PuzzleWindow()
+    startup_timer.mark("window_constructed")
+    startup_timer.watch_first_paint(window)
     window.show()
     sys.exit(app.exec())
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
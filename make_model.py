@@ -5,23 +5,51 @@ and save them to disk for later use in the main application.
 """
 
 import os
-import pickle
 import time
 import argparse
 import numpy as np
 from tqdm import tqdm
-import random
 
 # Import the RL algorithms
-from src.algorithms.rl_algorithms import QLearningAgent, value_iteration, solve_with_value_iteration
-from src.core.buzzle_logic import Buzzle, create_new_state
+from src.algorithms.rl_algorithms import (
+    QLearningAgent, START_DISTRIBUTIONS, VALUE_ITERATION_SWEEPS, value_iteration_arrays, policy_iteration_arrays, prioritized_sweeping_arrays,
+    solve_with_value_iteration
+)
+from src.algorithms.rl_parallel import train_q_learning_parallel
+from src.algorithms.rl_model_store import (
+    MODELS_DIR, PLANNING_MODEL_KINDS, Q_LEARNING_PARAMS, save_q_learning_agent, load_q_learning_agent,
+    save_value_iteration_model, save_value_iteration_arrays, load_value_iteration_model
+)
+from src.algorithms.compiled_policy import CompiledPolicy
+from src.core.buzzle_logic import Buzzle
+from src.core.state_index import rank_to_state
 
 def ensure_model_dir():
     """Ensure the model directory exists."""
-    os.makedirs("models", exist_ok=True)
-    
+    os.makedirs(MODELS_DIR, exist_ok=True)
+
+def default_model_path(model_type):
+    """Thư mục mô hình mặc định (header.json + các mảng .npy) của model_type."""
+    return os.path.join(MODELS_DIR, model_type)
+
+def summarize_training_stats(stats):
+    """Rút gọn thống kê huấn luyện (bỏ các danh sách theo từng episode) để lưu vào header mô hình."""
+    return {key: value for key, value in stats.items() if not isinstance(value, (list, dict, set))}
+    
+def report_target_success(stats, target_success):
+    """In số episode cần để đạt tỷ lệ thành công mục tiêu (nếu có mục tiêu)."""
+    if target_success is None:
+        return
+    if stats['episodes_to_target'] is None:
+        print(f"Target greedy success rate {target_success:.0%} not reached in {stats['episodes']} episodes")
+    else:
+        print(f"Target greedy success rate {target_success:.0%} reached after {stats['episodes_to_target']} episodes "
+              f"({stats['env_steps_to_target']} environment steps)")
+
 def train_q_learning(episodes=10000, alpha=0.2, gamma=0.99, epsilon=0.3, 
-                    alpha_decay=0.9995, epsilon_decay=0.9995, save_path="models/q_learning_model.pkl"):
+                    alpha_decay=0.9995, epsilon_decay=0.9995, save_path=None,
+                    num_envs=256, start_distribution="curriculum", workers=1, rounds=10, replay="none",
+                    planning_steps=0, target_success=None, trace_lambda=0.0):
     """
     Train a Q-Learning agent and save it to disk.
     
@@ -32,11 +60,22 @@ def train_q_learning(episodes=10000, alpha=0.2, gamma=0.99, epsilon=0.3,
     - epsilon: Exploration parameter
     - alpha_decay: Alpha decay rate
     - epsilon_decay: Epsilon decay rate
-    - save_path: Path to save the model
+    - save_path: Model directory (default: models/q_learning)
+    - num_envs: Number of environments stepped in lockstep (1 -> per-episode loop, QLearningAgent.train)
+    - start_distribution: Start states for batched training ('random' or 'curriculum')
+    - workers: Number of training processes (> 1 -> parallel training with periodic Q-table merging)
+    - rounds: Number of Q-table merges for parallel training
+    - replay: Experience replay for batched training: 'none', 'uniform' or 'prioritized'
+    - planning_steps: Dyna-Q planning backups from the learned transition model per real step (0 -> off)
+    - target_success: (Optional) Stop batched training once the greedy policy solves this fraction of
+      a fixed set of uniformly random boards (checked every 1000 episodes, or after each round with
+      several workers), and report how many episodes it took
+    - trace_lambda: Watkins Q(lambda) eligibility-trace decay for batched training (0 -> one-step Q-learning)
     
     Returns:
     - agent: Trained Q-Learning agent
     """
+    save_path = save_path or default_model_path("q_learning")
     print(f"Training Q-Learning agent with {episodes} episodes...")
     agent = QLearningAgent(
         alpha=alpha, 
@@ -45,35 +84,59 @@ def train_q_learning(episodes=10000, alpha=0.2, gamma=0.99, epsilon=0.3,
         alpha_decay=alpha_decay,
         epsilon_decay=epsilon_decay,
         min_alpha=0.01,
-        min_epsilon=0.01
+        min_epsilon=0.01,
+        prioritized_replay=(replay == "prioritized")
     )
     
-    # Tạo các puzzle đơn giản để huấn luyện trước
-    simple_puzzles = []
-    for _ in range(min(1000, episodes // 10)):
-        # Tạo puzzle gần với goal state (chỉ cần vài bước để giải)
-        goal_state = [[1, 2, 3], [4, 5, 6], [7, 8, 0]]
-        simple_puzzle = Buzzle(goal_state)
-        
-        # Thực hiện một số bước ngẫu nhiên từ goal state
-        steps = random.randint(1, 5)  # 1-5 bước
-        for _ in range(steps):
-            moves = ["up", "down", "left", "right"]
-            random.shuffle(moves)
-            for move in moves:
-                success, new_data = create_new_state(simple_puzzle.data, move)
-                if success:
-                    simple_puzzle = Buzzle(new_data)
-                    break
-        
-        simple_puzzles.append(simple_puzzle)
-    
-    # Huấn luyện với các puzzle đơn giản trước
-    print("Pre-training with simple puzzles...")
-    for i, puzzle in enumerate(simple_puzzles):
-        if i % 100 == 0:
-            print(f"  Pre-training puzzle {i+1}/{len(simple_puzzles)}")
-        agent.train(episodes=10, max_steps=20, use_experience_replay=True, batch_size=32)
+    if workers > 1:
+        agent, stats = train_q_learning_parallel(
+            agent_params=dict({name: getattr(agent, name) for name in Q_LEARNING_PARAMS},
+                              prioritized_replay=agent.prioritized_replay),
+            episodes=episodes,
+            workers=workers,
+            rounds=rounds,
+            num_envs=max(num_envs, 1),
+            max_steps=300,
+            start_distribution=start_distribution,
+            use_experience_replay=(replay != "none"),
+            planning_steps=planning_steps,
+            trace_lambda=trace_lambda,
+            target_success_rate=target_success,
+            stop_at_target=target_success is not None
+        )
+        save_q_learning_agent(agent, save_path, stats=summarize_training_stats(stats))
+        print(f"Q-Learning model saved to {save_path}")
+        report_target_success(stats, target_success)
+        print(f"Model stats: {agent.learned_state_count()} states in Q-table, "
+              f"success rate {stats['success_rate']:.1%}, {stats['env_steps']} environment steps "
+              f"on {workers} workers ({stats['steps_per_second']:.0f} steps/s, {stats['training_time']:.2f}s)")
+        return agent
+    
+    if num_envs > 1:
+        stats = agent.train_batched(
+            episodes=episodes,
+            num_envs=num_envs,
+            max_steps=300,
+            start_distribution=start_distribution,
+            use_experience_replay=(replay != "none"),
+            planning_steps=planning_steps,
+            trace_lambda=trace_lambda,
+            target_success_rate=target_success,
+            stop_at_target=target_success is not None
+        )
+        save_q_learning_agent(agent, save_path, stats=summarize_training_stats(stats))
+        print(f"Q-Learning model saved to {save_path}")
+        report_target_success(stats, target_success)
+        print(f"Model stats: {agent.learned_state_count()} states in Q-table, "
+              f"success rate {stats['success_rate']:.1%}, {stats['env_steps']} environment steps "
+              f"({stats['steps_per_second']:.0f} steps/s, {stats['training_time']:.2f}s)")
+        return agent
+    
+    # Huấn luyện trước với các puzzle đơn giản (cách đích 1-5 bước)
+    pretrain_episodes = min(1000, episodes // 10) * 10
+    print(f"Pre-training with {pretrain_episodes} simple puzzles...")
+    agent.train(episodes=pretrain_episodes, max_steps=20, use_experience_replay=True, batch_size=32,
+                start_distribution="curriculum", max_depth=5)
     
     print("Main training phase...")
     # Initialize stats tracking
@@ -81,117 +144,160 @@ def train_q_learning(episodes=10000, alpha=0.2, gamma=0.99, epsilon=0.3,
         episodes=episodes, 
         max_steps=300,  # Increased from default
         use_experience_replay=True,
+        start_distribution=start_distribution,
         batch_size=128   # Increased batch size
     )
     
     # Save the trained agent
-    with open(save_path, "wb") as f:
-        pickle.dump(agent, f)
+    save_q_learning_agent(agent, save_path, stats=summarize_training_stats(stats))
     
     print(f"Q-Learning model saved to {save_path}")
-    print(f"Model stats: {len(agent.q_table)} states in Q-table")
+    print(f"Model stats: {agent.learned_state_count()} states in Q-table")
     
     return agent
 
-def train_value_iteration(iterations=500, gamma=0.99, max_states=10000, 
-                        save_path="models/value_iteration_model.pkl"):
+def train_value_iteration(iterations=500, gamma=0.99, theta=0.0001, save_path=None, sweep="gauss_seidel"):
     """
-    Train a Value Iteration model and save it to disk.
+    Train a Value Iteration model over the full state space and save it to disk.
     
     Parameters:
-    - iterations: Number of iterations for value iteration
+    - iterations: Maximum number of sweeps
     - gamma: Discount factor
-    - max_states: Maximum number of states to explore
-    - save_path: Path to save the model
+    - theta: Convergence threshold (max-norm of the value change)
+    - save_path: Model directory (default: models/value_iteration)
+    - sweep: 'gauss_seidel' (in place, ordered by BFS layer from the goal) or 'jacobi' (synchronous)
     
     Returns:
-    - utilities: Value function mapping
-    - policy: Policy mapping
+    - utility_array: Values indexed by state rank
+    - policy_array: Action indices (in MOVES) indexed by state rank
     """
-    print(f"Training Value Iteration model with {iterations} iterations and {max_states} max states...")
-    utilities, policy, stats = value_iteration(
+    save_path = save_path or default_model_path("value_iteration")
+    print(f"Training Value Iteration model (full state space, {sweep} sweeps, up to {iterations} iterations)...")
+    utility_array, policy_array, stats = value_iteration_arrays(
         gamma=gamma,
         iterations=iterations,
-        max_states_to_explore=max_states,
-        theta=0.0001  # Lowered convergence threshold for more precise convergence
+        theta=theta,
+        sweep=sweep
     )
-    
-    # Thêm trạng thái đặc biệt cho puzzle đơn giản
-    print("Adding extra states for simple puzzles...")
-    goal_state = [[1, 2, 3], [4, 5, 6], [7, 8, 0]]
-    goal_puzzle = Buzzle(goal_state)
-    goal_tuple = tuple(map(tuple, goal_puzzle.data))
-    
-    # Tạo các trạng thái đơn giản gần với goal
-    simple_states = set([goal_tuple])
-    frontier = [goal_tuple]
-    
-    # Khám phá không gian trạng thái gần goal (BFS đến độ sâu 5)
-    depth = 0
-    max_depth = 5
-    level_size = 1
-    next_level_size = 0
-    
-    while frontier and depth < max_depth:
-        state_tuple = frontier.pop(0)
-        level_size -= 1
-        
-        # Chuyển thành list of lists để làm việc
-        state_data = [list(row) for row in state_tuple]
-        
-        # Thử tất cả các hành động
-        for move in ["up", "down", "left", "right"]:
-            success, next_data = create_new_state(state_data, move)
-            if success:
-                next_tuple = tuple(map(tuple, next_data))
-                
-                # Nếu là trạng thái mới, thêm vào frontier
-                if next_tuple not in simple_states:
-                    simple_states.add(next_tuple)
-                    frontier.append(next_tuple)
-                    next_level_size += 1
-                    
-                    # Tính toán phần thưởng và giá trị
-                    reward = -1
-                    if depth == 0:  # Trực tiếp từ goal
-                        utilities[next_tuple] = 90
-                        policy[next_tuple] = get_opposite_move(move)
-                    else:
-                        # Trạng thái càng xa goal, giá trị càng thấp
-                        u_value = 100 - (depth + 1) * 10
-                        if next_tuple not in utilities or utilities[next_tuple] < u_value:
-                            utilities[next_tuple] = u_value
-                            policy[next_tuple] = get_opposite_move(move)
-        
-        # Nếu hết level hiện tại, chuyển sang level tiếp theo
-        if level_size == 0:
-            depth += 1
-            level_size = next_level_size
-            next_level_size = 0
-    
-    print(f"Added {len(simple_states)} simple states near the goal")
+    for index, residual in enumerate(stats['residuals'], 1):
+        print(f"  Sweep {index}: residual {residual:.2e}")
     
     # Save the model
-    with open(save_path, "wb") as f:
-        model = {"utilities": utilities, "policy": policy, "stats": stats}
-        pickle.dump(model, f)
+    save_value_iteration_arrays(utility_array, policy_array, save_path, stats=summarize_training_stats(stats),
+                                params={"gamma": gamma, "iterations": iterations, "theta": theta, "sweep": sweep})
     
     print(f"Value Iteration model saved to {save_path}")
-    print(f"Model stats: {len(utilities)} states explored")
+    print(f"Model stats: {stats['states_explored']} states, {stats['iterations']} iterations, "
+          f"{stats['backups']} backups, final delta {stats['final_delta']:.2e}, {stats['time']:.2f}s")
+    
+    return utility_array, policy_array
+
+def train_policy_iteration(iterations=100, gamma=0.99, evaluation="linear", save_path=None):
+    """
+    Train a Policy Iteration model over the full state space and save it to disk.
+    
+    Parameters:
+    - iterations: Maximum number of policy improvement steps
+    - gamma: Discount factor
+    - evaluation: 'linear' (exact policy evaluation) or 'sweeps' (iterative evaluation)
+    - save_path: Model directory (default: models/policy_iteration)
+    
+    Returns:
+    - utility_array: Values indexed by state rank
+    - policy_array: Action indices (in MOVES) indexed by state rank
+    """
+    save_path = save_path or default_model_path("policy_iteration")
+    print(f"Training Policy Iteration model (full state space, {evaluation} evaluation)...")
+    utility_array, policy_array, stats = policy_iteration_arrays(
+        gamma=gamma,
+        iterations=iterations,
+        evaluation=evaluation,
+        theta=0.0001
+    )
+    
+    save_value_iteration_arrays(utility_array, policy_array, save_path, stats=summarize_training_stats(stats),
+                                params={"gamma": gamma, "iterations": iterations, "evaluation": evaluation},
+                                kind="policy_iteration")
+    
+    print(f"Policy Iteration model saved to {save_path}")
+    print(f"Model stats: {stats['iterations']} improvement steps, policy changes {stats['policy_changes']}")
+    print(f"  {stats['backups']} backups ({stats['evaluation_backups']} evaluation, "
+          f"{stats['improvement_backups']} improvement), {stats['time']:.2f}s")
+    
+    return utility_array, policy_array
+
+def train_prioritized_sweeping(gamma=0.99, theta=0.0001, save_path=None):
+    """
+    Train a Prioritized Sweeping model over the full state space and save it to disk.
+    
+    Parameters:
+    - gamma: Discount factor
+    - theta: Bellman error threshold for queueing a state
+    - save_path: Model directory (default: models/prioritized_sweeping)
+    
+    Returns:
+    - utility_array: Values indexed by state rank
+    - policy_array: Action indices (in MOVES) indexed by state rank
+    """
+    save_path = save_path or default_model_path("prioritized_sweeping")
+    print("Training Prioritized Sweeping model (full state space)...")
+    utility_array, policy_array, stats = prioritized_sweeping_arrays(gamma=gamma, theta=theta)
+    
+    save_value_iteration_arrays(utility_array, policy_array, save_path, stats=summarize_training_stats(stats),
+                                params={"gamma": gamma, "theta": theta}, kind="prioritized_sweeping")
+    
+    print(f"Prioritized Sweeping model saved to {save_path}")
+    print(f"Model stats: {stats['backups']} backups, {stats['error_updates']} Bellman error updates, "
+          f"max queue {stats['max_queue_size']}, {stats['time']:.2f}s")
     
-    return utilities, policy
+    return utility_array, policy_array
 
-def get_opposite_move(move):
-    """Trả về hành động ngược lại."""
-    opposites = {"up": "down", "down": "up", "left": "right", "right": "left"}
-    return opposites.get(move)
+def load_model_for_testing(model_type, model_path):
+    """
+    Đọc mô hình: QLearningAgent cho 'q_learning', dict utilities/policy cho các mô hình quy hoạch
+    (thêm 'compiled_policy' để giải không phải dựng lại chính sách mỗi lần).
+    """
+    try:
+        if model_type == "q_learning":
+            agent, _ = load_q_learning_agent(model_path)
+            return agent
+        model = load_value_iteration_model(model_path, kind=model_type)
+        model["compiled_policy"] = CompiledPolicy.from_planning(model["policy_array"], model["utility_array"])
+        return model
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+
+def convert_legacy_models(models_dir=MODELS_DIR):
+    """
+    Chuyển các file pickle cũ (*_model.pkl) sang định dạng thư mục header.json + .npy.
+    Chỉ dùng pickle ở đây, cho các file do chính dự án tạo ra trước đây.
+    """
+    import pickle
+
+    q_learning_pkl = os.path.join(models_dir, "q_learning_model.pkl")
+    if os.path.exists(q_learning_pkl):
+        with open(q_learning_pkl, "rb") as f:
+            agent = pickle.load(f)
+        save_q_learning_agent(agent, os.path.join(models_dir, "q_learning"),
+                              stats={"converted_from": os.path.basename(q_learning_pkl)})
+        print(f"Converted {q_learning_pkl}")
+
+    vi_pkl = os.path.join(models_dir, "value_iteration_model.pkl")
+    if os.path.exists(vi_pkl):
+        with open(vi_pkl, "rb") as f:
+            model = pickle.load(f)
+        stats = dict(model.get("stats", {}), converted_from=os.path.basename(vi_pkl))
+        save_value_iteration_model(model["utilities"], model["policy"],
+                                   os.path.join(models_dir, "value_iteration"), stats=stats)
+        print(f"Converted {vi_pkl} ({len(model['utilities'])} utilities)")
 
 def test_model(model_type="q_learning", model_path=None, num_tests=10):
     """
     Test a model on random puzzles.
     
     Parameters:
-    - model_type: 'q_learning' or 'value_iteration'
+    - model_type: 'q_learning' or a planning model ('value_iteration', 'policy_iteration', 'prioritized_sweeping')
     - model_path: Path to the model file
     - num_tests: Number of random puzzles to test
     
@@ -199,16 +305,13 @@ def test_model(model_type="q_learning", model_path=None, num_tests=10):
     - results: Dictionary of test results
     """
     if model_path is None:
-        model_path = f"models/{model_type}_model.pkl"
+        model_path = default_model_path(model_type)
         
     print(f"Testing {model_type} model from {model_path} on {num_tests} random puzzles...")
     
     # Load the model
-    try:
-        with open(model_path, 'rb') as f:
-            model = pickle.load(f)
-    except FileNotFoundError:
-        print(f"Error: Model file {model_path} not found.")
+    model = load_model_for_testing(model_type, model_path)
+    if model is None:
         return None
         
     # Prepare test puzzles
@@ -235,10 +338,8 @@ def test_model(model_type="q_learning", model_path=None, num_tests=10):
         if model_type == "q_learning":
             agent = model
             path, steps, _ = agent.solve(puzzle, max_steps=150)
-        else:  # value_iteration
-            utilities = model['utilities']
-            policy = model['policy']
-            path, steps = solve_with_value_iteration(puzzle, utilities, policy)
+        else:  # value_iteration, policy_iteration, prioritized_sweeping
+            path, steps = solve_with_value_iteration(puzzle, model['utilities'], model['compiled_policy'])
         
         solve_time = time.time() - start_time
         results['total_time'] += solve_time
@@ -274,12 +375,43 @@ def test_model(model_type="q_learning", model_path=None, num_tests=10):
     
     return results
 
+def verify_model(model_type="q_learning", model_path=None, examples=5):
+    """
+    Follow a model's compiled policy from every solvable state and report the states that loop or dead-end.
+    
+    Parameters:
+    - model_type: 'q_learning' or a planning model ('value_iteration', 'policy_iteration', 'prioritized_sweeping')
+    - model_path: Path to the model directory
+    - examples: Number of failing states to print for each kind of failure
+    
+    Returns:
+    - report: Verification report (see verify_policy)
+    """
+    if model_path is None:
+        model_path = default_model_path(model_type)
+    
+    model = load_model_for_testing(model_type, model_path)
+    if model is None:
+        return None
+    policy = model.compiled_policy() if model_type == "q_learning" else model["compiled_policy"]
+    report = policy.verify()
+    
+    print(f"Verified {model_type} policy from {model_path} in {report['time'] * 1000:.0f} ms:")
+    print(f"  Reach goal: {report['solved']}/{report['states']} states "
+          f"({report['optimal']} optimal, avg {report['mean_steps']:.1f} steps, max {report['max_steps']})")
+    for label, key in (("Loop", "loop_ranks"), ("Dead end", "dead_end_ranks")):
+        ranks = report[key]
+        print(f"  {label}: {len(ranks)} states")
+        for rank in ranks[:examples]:
+            print(f"    rank {rank}: {rank_to_state(int(rank))}")
+    return report
+
 def test_specific_puzzle(model_type="q_learning", puzzle_data=None, model_path=None, max_steps=200):
     """
     Test a model on a specific puzzle.
     
     Parameters:
-    - model_type: 'q_learning' or 'value_iteration'
+    - model_type: 'q_learning' or a planning model ('value_iteration', 'policy_iteration', 'prioritized_sweeping')
     - puzzle_data: The specific puzzle to test
     - model_path: Path to the model file
     - max_steps: Maximum steps to allow for solving
@@ -298,7 +430,7 @@ def test_specific_puzzle(model_type="q_learning", puzzle_data=None, model_path=N
     
     # Load the model
     if model_path is None:
-        model_path = f"models/{model_type}_model.pkl"
+        model_path = default_model_path(model_type)
     
     print(f"Testing {model_type} model from {model_path} on specific puzzle...")
     print("Puzzle:")
@@ -309,19 +441,17 @@ def test_specific_puzzle(model_type="q_learning", puzzle_data=None, model_path=N
     puzzle = Buzzle(puzzle_data)
     
     # Load model
-    try:
-        with open(model_path, 'rb') as f:
-            model = pickle.load(f)
-    except FileNotFoundError:
-        print(f"Model file {model_path} not found.")
+    model = load_model_for_testing(model_type, model_path)
+    if model is None:
         return None, 0
         
     # Solve puzzle using the model
     start_time = time.time()
     if model_type == 'q_learning':
         solution_path, steps, _ = model.solve(puzzle, max_steps=max_steps)
-    elif model_type == 'value_iteration':
-        solution_path, steps = solve_with_value_iteration(puzzle, model["utilities"], model["policy"], max_steps=max_steps)
+    elif model_type in PLANNING_MODEL_KINDS:
+        solution_path, steps = solve_with_value_iteration(puzzle, model["utilities"], model["compiled_policy"],
+                                                          max_steps=max_steps)
     else:
         print(f"Unknown model type: {model_type}")
         return None, 0
@@ -358,13 +488,40 @@ def main():
     group.add_argument("--train", action="store_true", help="Train a model")
     group.add_argument("--test", action="store_true", help="Test a model on random puzzles")
     group.add_argument("--test-specific", action="store_true", help="Test a model on a specific puzzle")
+    group.add_argument("--verify", action="store_true",
+                       help="Follow the model's policy from every state and report loops and dead ends")
+    group.add_argument("--convert-legacy", action="store_true",
+                       help="Convert old pickle models (models/*_model.pkl) to the versioned .npy format")
     
-    parser.add_argument("--model", choices=["q_learning", "value_iteration", "both"], 
-                      default="q_learning", help="Model type to train or test")
+    parser.add_argument("--model", choices=["q_learning", *PLANNING_MODEL_KINDS, "both"], 
+                      default="q_learning", help="Model type to train or test ('both' = q_learning and value_iteration)")
     parser.add_argument("--episodes", type=int, default=1000, 
                       help="Number of episodes for Q-Learning training")
+    parser.add_argument("--envs", type=int, default=256,
+                      help="Environments stepped in lockstep by Q-Learning training (1 = one episode at a time)")
+    parser.add_argument("--start-distribution", choices=sorted(START_DISTRIBUTIONS), default="curriculum",
+                      help="Start states for batched Q-Learning training")
+    parser.add_argument("--workers", type=int, default=1,
+                      help="Processes for Q-Learning training (Q-tables are merged periodically)")
+    parser.add_argument("--rounds", type=int, default=10,
+                      help="Number of Q-table merges when training with several workers")
+    parser.add_argument("--replay", choices=["none", "uniform", "prioritized"], default="none",
+                      help="Experience replay for batched Q-Learning training")
+    parser.add_argument("--planning-steps", type=int, default=0,
+                      help="Dyna-Q planning backups per real step from the learned transition model (0 = off)")
+    parser.add_argument("--target-success", type=float,
+                      help="Stop batched Q-Learning training once the greedy policy solves this fraction (0-1) "
+                           "of random boards (checked after each round when training with several workers)")
+    parser.add_argument("--trace-lambda", type=float, default=0.0,
+                      help="Eligibility-trace decay for Watkins Q(lambda) training (0 = one-step Q-Learning)")
     parser.add_argument("--iterations", type=int, default=200, 
-                      help="Number of iterations for Value Iteration")
+                      help="Number of iterations for Value Iteration / Policy Iteration")
+    parser.add_argument("--sweep", choices=list(VALUE_ITERATION_SWEEPS), default="gauss_seidel",
+                      help="Value Iteration update order (gauss_seidel = in place, by distance from the goal)")
+    parser.add_argument("--tolerance", type=float, default=0.0001,
+                      help="Value Iteration stops once a sweep changes no value by more than this")
+    parser.add_argument("--evaluation", choices=["linear", "sweeps"], default="linear",
+                      help="Policy evaluation method for Policy Iteration")
     parser.add_argument("--num-tests", type=int, default=10,
                       help="Number of puzzles to test")
     parser.add_argument("--puzzle", type=str, 
@@ -374,34 +531,28 @@ def main():
     
     args = parser.parse_args()
     
-    # Load existing models if available
-    models = {}
-    q_learning_path = "models/q_learning_model.pkl"
-    vi_path = "models/value_iteration_model.pkl"
-    
-    try:
-        with open(q_learning_path, 'rb') as f:
-            models["q_learning"] = pickle.load(f)
-            print(f"Loaded Q-Learning model from {q_learning_path}")
-    except FileNotFoundError:
-        models["q_learning"] = None
-    
-    try:
-        with open(vi_path, 'rb') as f:
-            models["value_iteration"] = pickle.load(f)
-            print(f"Loaded Value Iteration model from {vi_path}")
-    except FileNotFoundError:
-        models["value_iteration"] = None
-    
     # Ensure the models directory exists
     ensure_model_dir()
     
-    if args.train:
+    if args.convert_legacy:
+        convert_legacy_models()
+    
+    elif args.train:
         if args.model in ["q_learning", "both"]:
-            train_q_learning(episodes=args.episodes)
+            train_q_learning(episodes=args.episodes, num_envs=args.envs,
+                             start_distribution=args.start_distribution,
+                             workers=args.workers, rounds=args.rounds, replay=args.replay,
+                             planning_steps=args.planning_steps, target_success=args.target_success,
+                             trace_lambda=args.trace_lambda)
         
         if args.model in ["value_iteration", "both"]:
-            train_value_iteration(iterations=args.iterations)
+            train_value_iteration(iterations=args.iterations, theta=args.tolerance, sweep=args.sweep)
+        
+        if args.model == "policy_iteration":
+            train_policy_iteration(iterations=args.iterations, evaluation=args.evaluation)
+        
+        if args.model == "prioritized_sweeping":
+            train_prioritized_sweeping()
     
     elif args.test:
         if args.model in ["q_learning", "both"]:
@@ -409,6 +560,19 @@ def main():
         
         if args.model in ["value_iteration", "both"]:
             test_model("value_iteration", num_tests=args.num_tests)
+        
+        if args.model in ["policy_iteration", "prioritized_sweeping"]:
+            test_model(args.model, num_tests=args.num_tests)
+    
+    elif args.verify:
+        if args.model in ["q_learning", "both"]:
+            verify_model("q_learning")
+        
+        if args.model in ["value_iteration", "both"]:
+            verify_model("value_iteration")
+        
+        if args.model in ["policy_iteration", "prioritized_sweeping"]:
+            verify_model(args.model)
     
     elif args.test_specific:
         # Convert puzzle string to 2D array if provided
@@ -448,6 +612,9 @@ def main():
         
         if args.model in ["value_iteration", "both"]:
             test_specific_puzzle("value_iteration", puzzle_data, max_steps=args.max_steps)
+        
+        if args.model in ["policy_iteration", "prioritized_sweeping"]:
+            test_specific_puzzle(args.model, puzzle_data, max_steps=args.max_steps)
 
 if __name__ == '__main__':
     main()
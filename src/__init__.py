@@ -1,3 +1,19 @@
-from .ui import PuzzleWindow
-from .core import Buzzle
-from .algorithms import solve_puzzle, get_algorithm_groups
+# Import trễ (lazy): chỉ nạp giao diện PyQt5 khi thực sự cần PuzzleWindow,
+# để các công cụ dòng lệnh (src.cli) chạy được trên máy không có giao diện.
+_LAZY_EXPORTS = {
+    "PuzzleWindow": "src.ui",
+    "Buzzle": "src.core",
+    "solve_puzzle": "src.algorithms",
+    "get_algorithm_groups": "src.algorithms",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'src' has no attribute '{name}'")
+    import importlib
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
@@ -1,6 +1,8 @@
 from .search_algorithms import (
     bfs, dfs, ucs, ids,
-    astar, greedy, idastar
+    astar, greedy, idastar,
+    weighted_astar, arastar, smastar, beam_search,
+    bidirectional_mm
     # hill_climbing_max, hill_climbing_random, simulated_annealing,
     # genetic_algorithm
 )
@@ -13,14 +15,19 @@ from .local_search_algorithms import (
     number_of_misplaced_tiles, # Có thể export cả hàm heuristic này nếu muốn dùng từ bên ngoài
     manhattan_distance # manhattan_distance đã được import từ core.buzzle_logic trong local_search_algorithms, nhưng có thể export lại ở đây nếu cần
 )
-from .algorithm_manager import solve_puzzle, get_algorithm_groups
+from .algorithm_manager import solve_puzzle, get_algorithm_groups, get_rl_model, get_rl_models, reload_rl_models
+# BFS bộ nhớ ngoài cho không gian trạng thái lớn
+from .external_bfs import external_bfs
 
 __all__ = [
     'bfs', 'dfs', 'ucs', 'ids',
     'astar', 'greedy', 'idastar',
+    'weighted_astar', 'arastar', 'smastar', 'beam_search',
+    'bidirectional_mm',
     # 'hill_climbing_max', 'hill_climbing_random', 'simulated_annealing',
     # 'genetic_algorithm',
-    'solve_puzzle', 'get_algorithm_groups',
+    'solve_puzzle', 'get_algorithm_groups', 'get_rl_model', 'get_rl_models', 'reload_rl_models',
+    'external_bfs',
     'number_of_misplaced_tiles', # Thêm vào nếu muốn có thể truy cập trực tiếp
     # 'manhattan_distance' # Tương tự, nếu muốn truy cập trực tiếp từ module này
 ]
@@ -1,7 +1,10 @@
 # Import các thuật toán từ module search_algorithms (cổ điển)
 from .search_algorithms import (
     bfs, dfs, ucs, ids,
-    astar, greedy, idastar
+    astar, greedy, idastar,
+    weighted_astar, arastar, smastar, beam_search,
+    bidirectional_mm,
+    HEURISTIC_FUNCTIONS
 )
 # Import các thuật toán từ local_search_algorithms
 from .local_search_algorithms import (
@@ -16,13 +19,20 @@ from .local_search_algorithms import (
 from .rl_algorithms import (
     QLearningAgent,
     value_iteration,
+    policy_iteration,
+    prioritized_sweeping,
     solve_with_value_iteration
 )
 
 import os
-import pickle
+import threading
 import warnings
 
+from .rl_model_store import (
+    MODELS_DIR, model_exists, load_q_learning_agent, load_value_iteration_model
+)
+from .compiled_policy import CompiledPolicy
+
 # Import các thành phần core
 from src.core.buzzle_logic import is_solvable, Buzzle, create_new_state # create_new_state có thể không cần trực tiếp ở manager
 
@@ -41,7 +51,12 @@ def get_algorithm_groups():
         "Tìm kiếm có thông tin (Informed Search)": {
             "astar": "Tìm Kiếm A*",
             "idastar": "Tìm Kiếm IDA*",
-            "greedy": "Tìm Kiếm Tham Lam"
+            "greedy": "Tìm Kiếm Tham Lam",
+            "weighted_astar": "Tìm Kiếm A* Có Trọng Số",
+            "arastar": "Tìm Kiếm A* Cải Tiến Dần (ARA*)",
+            "smastar": "Tìm Kiếm SMA* (Giới Hạn Bộ Nhớ)",
+            "beam_search": "Tìm Kiếm Chùm (Beam Search)",
+            "bidirectional_mm": "Tìm Kiếm Hai Chiều MM"
         },
         "Tìm kiếm cục bộ (Local Search)": {
             "hill_climbing": "Leo Đồi",
@@ -51,57 +66,106 @@ def get_algorithm_groups():
         },
         "Học tăng cường (Reinforcement Learning)": {
             "q_learning": "Q-Learning (Đã huấn luyện)",
-            "value_iteration": "Value Iteration (Đã huấn luyện)"
+            "value_iteration": "Value Iteration (Đã huấn luyện)",
+            "policy_iteration": "Policy Iteration (Đã huấn luyện)",
+            "prioritized_sweeping": "Prioritized Sweeping (Đã huấn luyện)"
         }
     }
     return groups
 
-# Load pre-trained RL models from disk
-def load_rl_models():
-    """Load pre-trained RL models from disk."""
-    models = {
-        'q_learning': None,
-        'value_iteration': {'utilities': None, 'policy': None}
-    }
-    
-    # Paths to models
-    q_learning_path = "models/q_learning_model.pkl"
-    value_iteration_path = "models/value_iteration_model.pkl"
+# Các mô hình quy hoạch động (utilities + policy) dùng chung cách nạp và cách giải
+PLANNING_MODEL_NAMES = {
+    "value_iteration": "Value Iteration",
+    "policy_iteration": "Policy Iteration",
+    "prioritized_sweeping": "Prioritized Sweeping"
+}
+
+# Khi giải bằng mô hình RL, trạng thái mà chính sách học được bị lặp/ngõ cụt đi theo bản đã sửa
+# (xem CompiledPolicy.follow); số bước như vậy được báo cáo trong stats['fallback_steps']
+RL_POLICY_FALLBACK = True
+
+# Các loại mô hình RL, mỗi loại được nạp riêng khi bộ giải của nó được gọi lần đầu
+RL_MODEL_KINDS = ("q_learning", *PLANNING_MODEL_NAMES)
+
+def load_rl_model(kind, models_dir=None):
+    """
+    Load one pre-trained RL model from disk (mặc định từ MODELS_DIR).
+    Mô hình ở định dạng thư mục header.json + .npy (xem rl_model_store), các mảng được memory-map.
+    Trả về None (q_learning) hoặc dict có 'utilities' = None (mô hình quy hoạch) nếu không nạp được.
+    """
+    if kind not in RL_MODEL_KINDS:
+        raise ValueError(f"Unknown RL model kind '{kind}'")
+    models_dir = models_dir or MODELS_DIR
+    model_path = os.path.join(models_dir, kind)
     
-    # Try to load Q-Learning model
-    if os.path.exists(q_learning_path):
+    if kind == "q_learning":
+        if not model_exists(model_path):
+            _warn_missing_model("Q-Learning", model_path)
+            return None
         try:
-            with open(q_learning_path, 'rb') as f:
-                models['q_learning'] = {
-                    'agent': pickle.load(f),
-                    'training_stats': {'loaded_from_disk': True}
-                }
-            print(f"Loaded Q-Learning model from {q_learning_path}")
+            agent, header = load_q_learning_agent(model_path)
+            agent.compiled_policy() # Dựng sẵn chính sách biên dịch để lần giải đầu tiên không phải chờ
+            print(f"Loaded Q-Learning model from {model_path}")
+            return {
+                'agent': agent,
+                'training_stats': dict(header.get('stats', {}), loaded_from_disk=True)
+            }
         except Exception as e:
             print(f"Error loading Q-Learning model: {e}")
-    else:
-        print(f"Warning: Q-Learning model file {q_learning_path} not found")
+            return None
     
-    # Try to load Value Iteration model
-    if os.path.exists(value_iteration_path):
-        try:
-            with open(value_iteration_path, 'rb') as f:
-                vi_model = pickle.load(f)
-                models['value_iteration'] = {
-                    'utilities': vi_model['utilities'],
-                    'policy': vi_model['policy'],
-                    'stats': vi_model['stats']
-                }
-            print(f"Loaded Value Iteration model from {value_iteration_path}")
-        except Exception as e:
-            print(f"Error loading Value Iteration model: {e}")
-    else:
-        print(f"Warning: Value Iteration model file {value_iteration_path} not found")
-    
-    return models
+    # Value Iteration / Policy Iteration / Prioritized Sweeping
+    name = PLANNING_MODEL_NAMES[kind]
+    if not model_exists(model_path):
+        _warn_missing_model(name, model_path)
+        return {'utilities': None, 'policy': None}
+    try:
+        planning_model = load_value_iteration_model(model_path, kind=kind)
+        print(f"Loaded {name} model from {model_path}")
+        return {
+            'utilities': planning_model['utilities'],
+            'policy': planning_model['policy'],
+            'compiled_policy': CompiledPolicy.from_planning(planning_model['policy_array'],
+                                                            planning_model['utility_array']),
+            'stats': planning_model['stats']
+        }
+    except Exception as e:
+        print(f"Error loading {name} model: {e}")
+        return {'utilities': None, 'policy': None}
+
+def load_rl_models(models_dir=None):
+    """Load every pre-trained RL model from disk (xem load_rl_model)."""
+    return {kind: load_rl_model(kind, models_dir) for kind in RL_MODEL_KINDS}
 
-# Khởi tạo RL agents từ mô hình đã huấn luyện
-RL_AGENTS = load_rl_models()
+def _warn_missing_model(name, model_dir):
+    print(f"Warning: {name} model {model_dir} not found")
+    if os.path.exists(model_dir + "_model.pkl"):
+        print(f"  Found legacy pickle {model_dir}_model.pkl; convert it with: python make_model.py --convert-legacy")
+
+# Mô hình RL được nạp trễ theo từng loại ở lần dùng đầu tiên và cache theo tiến trình
+_RL_MODELS = {}
+_RL_MODELS_DIR = None
+_RL_MODELS_LOCK = threading.Lock()
+
+def get_rl_model(kind):
+    """Trả về mô hình RL loại kind (nạp từ đĩa ở lần gọi đầu tiên trong tiến trình)."""
+    if kind not in _RL_MODELS:
+        with _RL_MODELS_LOCK:
+            if kind not in _RL_MODELS:
+                _RL_MODELS[kind] = load_rl_model(kind, _RL_MODELS_DIR)
+    return _RL_MODELS[kind]
+
+def get_rl_models():
+    """Trả về mọi mô hình RL (nạp các loại chưa được nạp)."""
+    return {kind: get_rl_model(kind) for kind in RL_MODEL_KINDS}
+
+def reload_rl_models(models_dir=None):
+    """Nạp lại các mô hình RL từ đĩa (ví dụ sau khi make_model.py huấn luyện xong)."""
+    global _RL_MODELS_DIR
+    with _RL_MODELS_LOCK:
+        _RL_MODELS.clear()
+        _RL_MODELS_DIR = models_dir
+    return get_rl_models()
 
 # Dictionary ánh xạ tên thuật toán (key trong groups) sang hàm thực thi
 SOLVER_FUNCTIONS = {
@@ -113,6 +177,11 @@ SOLVER_FUNCTIONS = {
     "idastar": idastar,
     "greedy": greedy,
     "ids": ids,
+    "weighted_astar": weighted_astar,
+    "arastar": arastar,
+    "smastar": smastar,
+    "beam_search": beam_search,
+    "bidirectional_mm": bidirectional_mm,
     # Cục bộ
     "hill_climbing": hill_climbing,
     "random_restart_hc": random_restart_hill_climbing, 
@@ -120,7 +189,9 @@ SOLVER_FUNCTIONS = {
     "genetic_algorithm": genetic_algorithm,
     # RL
     "q_learning": lambda puzzle: solve_with_q_learning(puzzle),
-    "value_iteration": lambda puzzle: solve_with_value_iteration_wrapper(puzzle)
+    "value_iteration": lambda puzzle: solve_with_value_iteration_wrapper(puzzle),
+    "policy_iteration": lambda puzzle: solve_with_value_iteration_wrapper(puzzle, kind="policy_iteration"),
+    "prioritized_sweeping": lambda puzzle: solve_with_value_iteration_wrapper(puzzle, kind="prioritized_sweeping")
 }
 
 # Các thuật toán không cần kiểm tra is_solvable() trước khi chạy
@@ -131,13 +202,40 @@ SKIP_SOLVABLE_CHECK_ALGOS = {
     "simulated_annealing",
     "genetic_algorithm",
     "q_learning",
-    "value_iteration"
+    "value_iteration",
+    "policy_iteration",
+    "prioritized_sweeping"
+}
+
+# Các thuật toán có thông tin nhận tham số heuristic_func
+HEURISTIC_SEARCH_ALGOS = {
+    "astar",
+    "greedy",
+    "idastar",
+    "weighted_astar",
+    "arastar",
+    "smastar",
+    "beam_search",
+    "bidirectional_mm"
+}
+
+# Thời gian mặc định (giây) ARA* tiếp tục cải thiện lời giải sau lời giải đầu tiên;
+# người gọi có thể đổi qua solver_options={'time_limit': ...}
+ARASTAR_DEFAULT_TIME_LIMIT = 0.005
+
+# Các thuật toán nhận tham số stats (dict) để báo cáo thêm thống kê
+STATS_REPORTING_ALGOS = {
+    "idastar",
+    "smastar",
+    "bidirectional_mm"
 }
 
 # Danh sách các thuật toán RL
 RL_ALGORITHMS = {
     "q_learning",
-    "value_iteration"
+    "value_iteration",
+    "policy_iteration",
+    "prioritized_sweeping"
 }
 
 def solve_with_q_learning(puzzle):
@@ -152,76 +250,86 @@ def solve_with_q_learning(puzzle):
     - steps: Số bước thực hiện
     - stats: Bảng thống kê
     """
-    global RL_AGENTS
+    q_learning_model = get_rl_model('q_learning')
     
     # Kiểm tra xem mô hình đã được tải chưa
-    if RL_AGENTS['q_learning'] is None:
+    if q_learning_model is None:
         warnings.warn("Q-Learning model not loaded. Solving will likely fail.")
         return [], 0, {"error": "Model not loaded"}
     
     # Lấy agent đã huấn luyện
-    agent = RL_AGENTS['q_learning']['agent']
-    training_stats = RL_AGENTS['q_learning']['training_stats']
+    agent = q_learning_model['agent']
+    training_stats = q_learning_model['training_stats']
     
-    # Giải puzzle
-    path, steps, q_table_size = agent.solve(puzzle, max_steps=150)
+    # Giải puzzle; trạng thái mà chính sách học được bị lặp/ngõ cụt đi theo bản đã sửa (đếm ở fallback_steps)
+    path, steps, solve_stats = agent.solve(puzzle, max_steps=150, fallback=RL_POLICY_FALLBACK)
     
     # Bổ sung thông tin thống kê
     stats = {
-        'agent': agent,  # Thêm agent vào stats để lấy utility map
         'loaded_from_disk': training_stats.get('loaded_from_disk', False),
-        'q_table_size': q_table_size,
-        'steps': steps
+        'q_table_size': agent.learned_state_count(),
+        'steps': steps,
+        'fallback_steps': solve_stats['fallback_steps']
     }
     
     return path, steps, stats
 
-def solve_with_value_iteration_wrapper(puzzle):
+def solve_with_value_iteration_wrapper(puzzle, kind="value_iteration"):
     """
-    Giải puzzle bằng Value Iteration.
+    Giải puzzle bằng chính sách của Value Iteration (hoặc mô hình quy hoạch khác).
     
     Parameters:
     - puzzle: Trạng thái bắt đầu (Buzzle object)
+    - kind: Loại mô hình trong PLANNING_MODEL_NAMES
     
     Returns:
     - path: Đường đi giải pháp
     - steps: Số bước thực hiện
     - stats: Bảng thống kê
     """
-    global RL_AGENTS
+    planning_model = get_rl_model(kind)
     
     # Kiểm tra xem mô hình đã được tải chưa
-    if RL_AGENTS['value_iteration']['utilities'] is None:
-        warnings.warn("Value Iteration model not loaded. Solving will likely fail.")
+    if planning_model['utilities'] is None:
+        warnings.warn(f"{PLANNING_MODEL_NAMES[kind]} model not loaded. Solving will likely fail.")
         return [], 0, {"error": "Model not loaded"}
     
-    # Lấy utilities và policy đã có
-    utilities = RL_AGENTS['value_iteration']['utilities']
-    policy = RL_AGENTS['value_iteration']['policy']
-    vi_stats = RL_AGENTS['value_iteration'].get('stats', {})
+    # Lấy utilities và chính sách biên dịch đã có
+    utilities = planning_model['utilities']
+    policy = planning_model['compiled_policy']
+    vi_stats = planning_model.get('stats', {})
     
     # Giải puzzle
-    path, steps = solve_with_value_iteration(puzzle, utilities, policy)
+    solve_stats = {}
+    path, steps = solve_with_value_iteration(puzzle, utilities, policy, fallback=RL_POLICY_FALLBACK,
+                                             stats=solve_stats)
     
     # Bổ sung thông tin thống kê
     stats = {
         'loaded_from_disk': True,
         'states_explored': vi_stats.get('states_explored', 0),
-        'steps': steps
+        'training_backups': vi_stats.get('backups', 0),
+        'training_time': vi_stats.get('time', 0),
+        'steps': steps,
+        'fallback_steps': solve_stats['fallback_steps']
     }
     
     return path, steps, stats
 
-def solve_puzzle(algorithm_key, start_state, ui_update_callback=None, stop_event=None, heuristic_name=None, known_positions=None):
+def solve_puzzle(algorithm_key, start_state, ui_update_callback=None, stop_event=None, heuristic_name=None, known_positions=None, stats=None, solver_options=None):
     """
     Unified interface for all search algorithms.
     Input:
         algorithm_key (str): Key của thuật toán (ví dụ: 'bfs', 'astar').
         start_state (Buzzle object): Trạng thái bắt đầu.
         ui_update_callback: (Optional) callback để cập nhật UI với trạng thái hiện tại.
-        stop_event: (Optional) threading.Event để dừng thuật toán sớm.
+                            Với ARA*: callback(path, w_bound) cho mỗi lời giải tốt hơn.
+        stop_event: (Optional) threading.Event để dừng thuật toán sớm (ARA* dừng cải thiện lời giải).
         heuristic_name: (Optional) Tên của heuristic được chọn từ UI (ví dụ 'manhattan', 'misplaced')
-                        Sẽ được dùng cho các thuật toán cục bộ.
+                        Sẽ được dùng cho các thuật toán cục bộ và có thông tin.
+        stats: (Optional) dict nhận thêm thống kê từ các thuật toán trong STATS_REPORTING_ALGOS.
+        solver_options: (Optional) dict tham số bổ sung (giới hạn/ngân sách) truyền thẳng cho
+                        các thuật toán cổ điển và có thông tin, ví dụ {'max_nodes': 5000} cho SMA*.
     Output:
         (result, nodes_expanded, max_fringe_or_other_metric)
         result: path (list of tuples) cho thuật toán tìm đường, 
@@ -248,14 +356,10 @@ def solve_puzzle(algorithm_key, start_state, ui_update_callback=None, stop_event
             print(f"Algorithm {algorithm_key.upper()}: Initial state is unsolvable.")
             return None, 0, 0 
     
-    # Chọn hàm heuristic cho các thuật toán cục bộ dựa trên heuristic_name
+    # Chọn hàm heuristic cho các thuật toán cục bộ và có thông tin dựa trên heuristic_name
     selected_heuristic_func = manhattan_distance # Mặc định
     if heuristic_name:
-        if heuristic_name.lower() == 'manhattan':
-            selected_heuristic_func = manhattan_distance
-        elif heuristic_name.lower() == 'misplaced':
-            selected_heuristic_func = number_of_misplaced_tiles
-        # Có thể thêm các heuristic khác nếu có
+        selected_heuristic_func = HEURISTIC_FUNCTIONS.get(heuristic_name.lower(), manhattan_distance)
 
     # Gọi hàm solver tương ứng
     # Một số thuật toán cục bộ có thể cần thêm tham số (ví dụ: heuristic_func)
@@ -276,5 +380,27 @@ def solve_puzzle(algorithm_key, start_state, ui_update_callback=None, stop_event
             return [("final", best_solution_data)], total_fitness_evaluations, final_population_size
         else:
             return None, total_fitness_evaluations, final_population_size
+
+    # Tham số thống kê bổ sung (nếu thuật toán hỗ trợ)
+    solver_kwargs = dict(solver_options or {})
+    if stats is not None and algo_key_lower in STATS_REPORTING_ALGOS:
+        solver_kwargs["stats"] = stats
+
+    if algo_key_lower == "arastar":
+        # Thuật toán anytime: mặc định dừng cải thiện sau ARASTAR_DEFAULT_TIME_LIMIT giây, phát mỗi lời giải
+        # tốt hơn qua ui_update_callback và ghi lại vào stats['improvements'] (độ dài, cận w)
+        solver_kwargs.setdefault("time_limit", ARASTAR_DEFAULT_TIME_LIMIT)
+        solver_kwargs["stop_event"] = stop_event
+        improvements = stats.setdefault("improvements", []) if stats is not None else None
+
+        def on_improvement(path, w_bound):
+            if improvements is not None:
+                improvements.append((len(path), w_bound))
+            if ui_update_callback:
+                ui_update_callback(path, w_bound)
+        solver_kwargs["on_improvement"] = on_improvement
+
+    if algo_key_lower in HEURISTIC_SEARCH_ALGOS:
+        return solver_func(start_state, heuristic_func=selected_heuristic_func, **solver_kwargs)
     else: # Các thuật toán cổ điển
-        return solver_func(start_state) # Giả sử các hàm này có thể nhận ui_update_callback, stop_event nếu cần
+        return solver_func(start_state, **solver_kwargs) # Giả sử các hàm này có thể nhận ui_update_callback, stop_event nếu cần
@@ -0,0 +1,211 @@
+"""
+Chính sách biên dịch (compiled policy) cho các mô hình RL.
+
+Chính sách là một mảng int8 (NUM_STATES,): chỉ số hành động trong MOVES của mỗi rank
+(-1 = không có hành động, chỉ ở đích). Mảng được dựng một lần từ bảng Q hoặc từ policy/utilities
+của mô hình quy hoạch; trạng thái mô hình chưa biết nhận nước đi giảm khoảng cách Manhattan nhiều nhất
+(như cách các hàm giải cũ xử lý). Khi giải chỉ cần đi theo mảng này và bảng kế tiếp: mỗi bước là hai
+phép tra mảng, không theo dõi chu trình hay tính heuristic trong vòng lặp. Chu trình và ngõ cụt được
+phát hiện một lần cho toàn bộ không gian trạng thái bằng verify_policy. Chính sách biên dịch giữ nguyên
+hành động của mô hình; repair_policy (mỗi trạng thái lỗi đi tới một trạng thái kề đã tới được đích) chỉ được
+dùng khi yêu cầu rõ ràng: repair=True, hoặc fallback=True lúc giải (số bước dự phòng được đếm riêng).
+"""
+import time
+
+import numpy as np
+
+from src.core.buzzle_logic import MOVES
+from src.core.state_index import BOARD_SIZE, NUM_STATES, GOAL_RANK, state_to_rank
+from src.core.state_space import NO_SUCCESSOR, all_states, successor_table, manhattan_distances, goal_distances
+from src.algorithms.rl_model_store import NO_ACTION
+
+def _masked_argmax(values, valid):
+    """Chỉ số hành động hợp lệ có giá trị lớn nhất của mỗi hàng (bằng nhau -> hành động đầu tiên theo MOVES)."""
+    return np.where(valid, values, -np.inf).argmax(axis=1).astype(np.int8)
+
+def _fill_missing(policy):
+    """Gán cho các trạng thái chưa có hành động (trừ đích) nước đi tới trạng thái có khoảng cách Manhattan nhỏ nhất."""
+    successors = successor_table()
+    missing = np.flatnonzero(policy == NO_ACTION)
+    missing = missing[missing != GOAL_RANK]
+    if missing.size:
+        next_ranks = successors[missing]
+        next_distances = np.where(next_ranks != NO_SUCCESSOR, manhattan_distances()[next_ranks], np.iinfo(np.int8).max)
+        policy[missing] = next_distances.argmin(axis=1)
+    policy[GOAL_RANK] = NO_ACTION
+    return policy
+
+def policy_from_q_table(q_table):
+    """Chính sách tham lam argmax_a Q(s,a) trên các hành động hợp lệ; hàng toàn 0 (chưa học) dùng Manhattan."""
+    q_values = np.asarray(q_table)
+    policy = _masked_argmax(q_values, successor_table() != NO_SUCCESSOR)
+    policy[~q_values.any(axis=1)] = NO_ACTION
+    return _fill_missing(policy)
+
+def policy_from_planning(policy_array, utility_array=None):
+    """
+    Chính sách của mô hình quy hoạch (value/policy iteration...). Trạng thái không có trong policy_array
+    nhưng có utilities (mô hình cũ chỉ phủ một phần không gian) đi tới trạng thái kế tiếp có utility lớn nhất;
+    còn lại dùng Manhattan.
+    """
+    policy = np.array(policy_array, dtype=np.int8)
+    if utility_array is not None:
+        successors = successor_table()
+        utilities = np.asarray(utility_array, dtype=np.float64)
+        missing = np.flatnonzero(policy == NO_ACTION)
+        next_ranks = successors[missing]
+        next_utilities = np.where(next_ranks != NO_SUCCESSOR, utilities[next_ranks], np.nan)
+        known = ~np.isnan(next_utilities).all(axis=1)
+        policy[missing[known]] = _masked_argmax(np.nan_to_num(next_utilities[known], nan=-np.inf),
+                                                next_ranks[known] != NO_SUCCESSOR)
+    return _fill_missing(policy)
+
+def verify_policy(policy):
+    """
+    Đi theo chính sách từ mọi trạng thái cùng lúc (nhân đôi con trỏ: sau k vòng mỗi trạng thái
+    nhảy 2^k bước, 18 vòng đủ cho mọi đường đi không lặp).
+
+    Returns:
+    - report: dict gồm số trạng thái tới đích ('solved'), có chu trình ('looping'), dừng ở
+      ngõ cụt ('dead_end'), rank của các trạng thái lỗi ('loop_ranks', 'dead_end_ranks'),
+      số bước tới đích (lớn nhất, trung bình), số trạng thái đi đường tối ưu ('optimal'),
+      số bước tới đích của từng trạng thái ('steps_to_goal', -1 nếu không tới) và thời gian
+    """
+    start_time = time.time()
+    successors = successor_table()
+    ranks = np.arange(NUM_STATES)
+    policy = np.asarray(policy)
+    actions = np.maximum(policy, 0)
+    jump = np.where(policy != NO_ACTION, successors[ranks, actions], NO_SUCCESSOR).astype(np.int64)
+    # Không có hành động hoặc hành động không hợp lệ -> dừng tại chỗ (điểm bất động)
+    stuck = jump == NO_SUCCESSOR
+    jump[stuck] = ranks[stuck]
+    steps = (~stuck).astype(np.int64)
+
+    rounds = int(NUM_STATES - 1).bit_length()
+    for _ in range(rounds):
+        steps = steps + steps[jump]
+        jump = jump[jump]
+
+    solved = jump == GOAL_RANK
+    dead_end = stuck[jump] & ~solved
+    looping = ~stuck[jump]
+    solved_steps = steps[solved]
+    report = {
+        'states': NUM_STATES,
+        'solved': int(solved.sum()),
+        'looping': int(looping.sum()),
+        'dead_end': int(dead_end.sum()),
+        'loop_ranks': np.flatnonzero(looping),
+        'dead_end_ranks': np.flatnonzero(dead_end),
+        'max_steps': int(solved_steps.max()) if solved_steps.size else 0,
+        'mean_steps': float(solved_steps.mean()) if solved_steps.size else 0.0,
+        'optimal': int((solved_steps == goal_distances()[solved]).sum()),
+        'steps_to_goal': np.where(solved, steps, -1),
+        'time': time.time() - start_time
+    }
+    return report
+
+def repair_policy(policy):
+    """
+    Sửa các trạng thái bị lặp hoặc rơi vào ngõ cụt (theo verify_policy), lan dần từ tập trạng thái đã
+    tới được đích: ở mỗi vòng, trạng thái lỗi kề với một trạng thái đã tới đích được trỏ sang trạng thái kề
+    có ít bước tới đích nhất. Trạng thái đã đúng giữ nguyên hành động; sau khi sửa không còn chu trình
+    vì mỗi trạng thái được sửa chỉ trỏ tới trạng thái đã tới đích.
+
+    Returns: số trạng thái đã sửa (policy được sửa tại chỗ)
+    """
+    steps = verify_policy(policy)['steps_to_goal']
+    broken = np.flatnonzero(steps < 0)
+    repaired = broken.size
+    successors = successor_table()
+    while broken.size:
+        next_ranks = successors[broken]
+        next_steps = np.where(next_ranks != NO_SUCCESSOR, steps[next_ranks], -1)
+        reachable = next_steps >= 0
+        ready = reachable.any(axis=1)
+        if not ready.any():
+            break # Không xảy ra: đồ thị trạng thái giải được là liên thông
+        best = np.where(reachable, next_steps, np.iinfo(np.int64).max)[ready].argmin(axis=1)
+        ranks = broken[ready]
+        policy[ranks] = best
+        steps[ranks] = next_steps[ready, best] + 1
+        broken = broken[~ready]
+    return repaired
+
+class CompiledPolicy:
+    """
+    Chính sách int8 theo rank cùng vòng lặp giải.
+
+    Parameters:
+    - actions: Mảng (NUM_STATES,) chỉ số hành động trong MOVES (-1 = không có)
+    - repair: (Optional) Sửa ngay các trạng thái bị lặp/ngõ cụt (xem repair_policy); số trạng thái đã sửa
+      lưu ở `repaired`. Mặc định chính sách giữ đúng hành động của mô hình.
+    """
+
+    def __init__(self, actions, repair=False):
+        self.actions = np.array(actions, dtype=np.int8)
+        self.repaired = repair_policy(self.actions) if repair else 0
+        self.successors = successor_table()
+        self.states = all_states()
+        self._fallback_actions = None
+
+    @classmethod
+    def from_q_table(cls, q_table):
+        return cls(policy_from_q_table(q_table))
+
+    @classmethod
+    def from_planning(cls, policy_array, utility_array=None):
+        return cls(policy_from_planning(policy_array, utility_array))
+
+    def fallback_actions(self):
+        """Bản sao chính sách đã sửa bằng repair_policy (dựng một lần), dùng cho fallback lúc giải."""
+        if self._fallback_actions is None:
+            actions = self.actions.copy()
+            repair_policy(actions)
+            self._fallback_actions = actions
+        return self._fallback_actions
+
+    def follow(self, rank, max_steps=100, fallback=False):
+        """
+        Đi theo chính sách từ rank. Với fallback=True, trạng thái bị lặp/ngõ cụt đi theo bản đã sửa
+        (fallback_actions) thay cho hành động của mô hình.
+        Trả về (chỉ số hành động, rank sau mỗi bước, số bước lấy từ bản đã sửa).
+        """
+        actions = []
+        ranks = []
+        fallback_steps = 0
+        learned = self.actions
+        policy = self.fallback_actions() if fallback else learned
+        successors = self.successors
+        for _ in range(max_steps):
+            if rank == GOAL_RANK:
+                break
+            action = int(policy[rank])
+            if action == NO_ACTION:
+                break
+            if action != learned[rank]:
+                fallback_steps += 1
+            rank = int(successors[rank, action])
+            actions.append(action)
+            ranks.append(rank)
+        return actions, ranks, fallback_steps
+
+    def solve(self, puzzle, max_steps=100, fallback=False, stats=None):
+        """
+        Giải puzzle bằng cách đi theo chính sách.
+
+        Parameters:
+        - fallback: Thay hành động của trạng thái bị lặp/ngõ cụt bằng bản đã sửa (xem follow)
+        - stats: (Optional) dict được điền 'fallback_steps' (số bước không theo mô hình)
+
+        Returns: path (list các tuple (action, state_data)) giống các hàm giải RL khác
+        """
+        actions, ranks, fallback_steps = self.follow(state_to_rank(puzzle.data), max_steps, fallback)
+        if stats is not None:
+            stats['fallback_steps'] = fallback_steps
+        return [(MOVES[action], self.states[rank].reshape(BOARD_SIZE, BOARD_SIZE).tolist())
+                for action, rank in zip(actions, ranks)]
+
+    def verify(self):
+        return verify_policy(self.actions)
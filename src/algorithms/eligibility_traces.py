@@ -0,0 +1,68 @@
+"""
+Vết khả năng (eligibility traces) thưa cho Q(λ) theo lô.
+
+Vết của một cặp (trạng thái, hành động) giảm theo (gamma * lambda)^tuổi, nên sau
+`length` bước nó nhỏ hơn ngưỡng cắt và có thể bỏ qua. Vì vậy mỗi môi trường chỉ cần nhớ
+`length` cặp gần nhất trong một bộ đệm vòng (num_envs, length) thay vì một bảng vết
+(NUM_STATES, 4) đầy đủ; mọi môi trường ghi cùng cột vì chúng chạy theo từng bước (lockstep).
+"""
+import math
+
+import numpy as np
+
+def trace_length(decay, cutoff, max_length=None):
+    """Số bước trước khi vết decay^tuổi nhỏ hơn cutoff (ít nhất 1, tối đa max_length)."""
+    if decay <= 0.0 or cutoff >= 1.0:
+        return 1
+    if decay >= 1.0:
+        if max_length is None:
+            raise ValueError("Traces that never decay need a max_length")
+        return max(1, max_length)
+    length = int(math.floor(math.log(cutoff) / math.log(decay))) + 1
+    if max_length is not None:
+        length = min(length, max_length)
+    return max(1, length)
+
+class EligibilityTraces:
+    """
+    Vết thay thế (replacing traces) của num_envs môi trường, lưu dạng mảng.
+
+    Parameters:
+    - num_envs: Số môi trường
+    - decay: Hệ số giảm của vết mỗi bước (gamma * lambda)
+    - cutoff: Bỏ các vết nhỏ hơn ngưỡng này
+    - max_length: (Optional) Giới hạn độ dài vết (ví dụ số bước tối đa của episode)
+    """
+
+    def __init__(self, num_envs, decay, cutoff=0.01, max_length=None):
+        self.decay = decay
+        self.length = trace_length(decay, cutoff, max_length)
+        self.states = np.zeros((num_envs, self.length), dtype=np.int64)
+        self.actions = np.zeros((num_envs, self.length), dtype=np.int64)
+        self.counts = np.zeros(num_envs, dtype=np.int64) # Số cặp còn hiệu lực của mỗi môi trường
+        self.step = 0
+        self.weights = decay ** np.arange(self.length)
+
+    def push(self, states, actions):
+        """Ghi cặp (trạng thái, hành động) vừa thực hiện của mọi môi trường (tuổi 0)."""
+        column = self.step % self.length
+        self.states[:, column] = states
+        self.actions[:, column] = actions
+        self.counts = np.minimum(self.counts + 1, self.length)
+        self.step += 1
+
+    def clear(self, mask):
+        """Xóa vết của các môi trường trong mask (kết thúc episode hoặc hành động khám phá)."""
+        self.counts[mask] = 0
+
+    def pairs(self):
+        """
+        Các cặp có vết khác 0, sắp theo tuổi giảm dần (cặp gần nhất đứng sau).
+        Returns: (envs, states, actions, eligibilities) dạng mảng phẳng
+        """
+        ages = np.arange(self.length - 1, -1, -1)
+        columns = (self.step - 1 - ages) % self.length
+        active = ages[None, :] < self.counts[:, None]
+        envs = np.nonzero(active)[0]
+        return (envs, self.states[:, columns][active], self.actions[:, columns][active],
+                np.broadcast_to(self.weights[ages], active.shape)[active])
@@ -0,0 +1,255 @@
+"""
+BFS bộ nhớ ngoài (external-memory BFS) cho các bảng lớn (ví dụ 4x4).
+
+Mỗi lớp BFS được lưu thành một file nhị phân đã sắp xếp, nén delta (varint)
+trong thư mục tạm (scratch). Lớp mới được sinh theo từng khối (run) sắp xếp
+trong bộ nhớ, sau đó trộn (k-way merge) và loại trùng bằng sort-merge với hai
+lớp trước đó. Sau mỗi lớp, một checkpoint JSON được ghi để có thể tiếp tục
+một lần chạy dài bị gián đoạn.
+"""
+import heapq
+import json
+import os
+
+from src.core.buzzle_logic import get_successors
+
+CHECKPOINT_FILE = "checkpoint.json"
+_WRITE_BUFFER_SIZE = 1 << 16
+_READ_BUFFER_SIZE = 1 << 16
+
+# --- Mã hóa trạng thái ---
+
+def _tile_bits(size):
+    """Số bit cần cho một ô của bảng size x size."""
+    return max(1, (size * size - 1).bit_length())
+
+def encode_state(state_data):
+    """Mã hóa trạng thái (list of lists) thành một số nguyên (mỗi ô dùng cố định số bit)."""
+    bits = _tile_bits(len(state_data))
+    code = 0
+    for row in state_data:
+        for tile in row:
+            code = (code << bits) | tile
+    return code
+
+def decode_state(code, size):
+    """Giải mã số nguyên thành trạng thái size x size (list of lists)."""
+    bits = _tile_bits(size)
+    mask = (1 << bits) - 1
+    flat = [0] * (size * size)
+    for k in range(size * size - 1, -1, -1):
+        flat[k] = code & mask
+        code >>= bits
+    return [flat[i:i + size] for i in range(0, size * size, size)]
+
+# --- File lớp nén delta ---
+
+def _write_sorted_codes(path, sorted_codes):
+    """
+    Ghi dãy mã đã sắp xếp tăng dần (không trùng) vào path dưới dạng varint của hiệu số.
+    Ghi vào file tạm rồi đổi tên để file luôn ở trạng thái hoàn chỉnh.
+    Trả về số phần tử đã ghi.
+    """
+    tmp_path = path + ".tmp"
+    count = 0
+    prev = 0
+    buffer = bytearray()
+    with open(tmp_path, "wb") as f:
+        for code in sorted_codes:
+            delta = code - prev
+            prev = code
+            while delta >= 0x80:
+                buffer.append((delta & 0x7F) | 0x80)
+                delta >>= 7
+            buffer.append(delta)
+            count += 1
+            if len(buffer) >= _WRITE_BUFFER_SIZE:
+                f.write(buffer)
+                buffer.clear()
+        f.write(buffer)
+    os.replace(tmp_path, path)
+    return count
+
+def _read_sorted_codes(path):
+    """Đọc tuần tự (streaming) các mã từ file nén delta. Không có file -> dãy rỗng."""
+    if path is None or not os.path.exists(path):
+        return
+    prev = 0
+    value = 0
+    shift = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_READ_BUFFER_SIZE)
+            if not chunk:
+                break
+            for byte in chunk:
+                value |= (byte & 0x7F) << shift
+                if byte & 0x80:
+                    shift += 7
+                else:
+                    prev += value
+                    yield prev
+                    value = 0
+                    shift = 0
+
+def _unique(sorted_codes):
+    """Loại bỏ phần tử trùng liên tiếp trong một dãy đã sắp xếp."""
+    last = None
+    for code in sorted_codes:
+        if code != last:
+            last = code
+            yield code
+
+def _subtract(sorted_codes, *sorted_excludes):
+    """Sort-merge: trả về các mã trong sorted_codes không xuất hiện trong các dãy loại trừ."""
+    excluded = _unique(heapq.merge(*sorted_excludes))
+    current = next(excluded, None)
+    for code in sorted_codes:
+        while current is not None and current < code:
+            current = next(excluded, None)
+        if current != code:
+            yield code
+
+def _layer_path(scratch_dir, depth):
+    return os.path.join(scratch_dir, f"layer_{depth:04d}.bin")
+
+def _run_path(scratch_dir, depth, run_index):
+    return os.path.join(scratch_dir, f"run_{depth:04d}_{run_index:04d}.bin")
+
+# --- Checkpoint ---
+
+def _load_checkpoint(scratch_dir, size, root_code):
+    """Đọc checkpoint nếu nó khớp với bài toán hiện tại (cùng kích thước và gốc)."""
+    path = os.path.join(scratch_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if checkpoint.get("size") != size or checkpoint.get("root") != root_code:
+        return None
+    return checkpoint
+
+def _save_checkpoint(scratch_dir, checkpoint):
+    path = os.path.join(scratch_dir, CHECKPOINT_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+# --- Sinh lớp kế tiếp ---
+
+def _expand_layer(scratch_dir, depth, size, chunk_size):
+    """
+    Sinh các ứng viên của lớp depth + 1 từ lớp depth.
+    Các ứng viên được gom thành từng khối chunk_size, sắp xếp, loại trùng
+    và ghi ra các file run riêng. Trả về danh sách đường dẫn run.
+    """
+    # Xóa các run còn sót lại từ một lần chạy bị gián đoạn
+    run_prefix = f"run_{depth + 1:04d}_"
+    for name in os.listdir(scratch_dir):
+        if name.startswith(run_prefix):
+            os.remove(os.path.join(scratch_dir, name))
+
+    run_paths = []
+    buffer = []
+
+    def flush():
+        if buffer:
+            buffer.sort()
+            run_path = _run_path(scratch_dir, depth + 1, len(run_paths))
+            _write_sorted_codes(run_path, _unique(buffer))
+            run_paths.append(run_path)
+            buffer.clear()
+
+    for code in _read_sorted_codes(_layer_path(scratch_dir, depth)):
+        state_data = decode_state(code, size)
+        for _, new_data in get_successors(state_data):
+            buffer.append(encode_state(new_data))
+        if len(buffer) >= chunk_size:
+            flush()
+    flush()
+    return run_paths
+
+def _write_distance_file(scratch_dir, size, num_layers, distance_path):
+    """Ghi file khoảng cách: mỗi dòng là trạng thái (các số cách nhau bởi dấu cách) và độ sâu BFS."""
+    tmp_path = distance_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        for depth in range(num_layers):
+            for code in _read_sorted_codes(_layer_path(scratch_dir, depth)):
+                flat = [tile for row in decode_state(code, size) for tile in row]
+                f.write(" ".join(map(str, flat)) + f"\t{depth}\n")
+    os.replace(tmp_path, distance_path)
+
+def external_bfs(scratch_dir, root_data=None, size=3, max_depth=None,
+                 chunk_size=1_000_000, distance_file=None, resume=True):
+    """
+    BFS bộ nhớ ngoài theo từng lớp, bắt đầu từ root_data (mặc định là trạng thái đích).
+
+    Parameters:
+    - scratch_dir: Thư mục chứa các file lớp, file run và checkpoint
+    - root_data: Trạng thái gốc (list of lists). None -> trạng thái đích của bảng size x size
+    - size: Kích thước bảng (chỉ dùng khi root_data là None)
+    - max_depth: Độ sâu tối đa cần duyệt (None -> duyệt hết không gian trạng thái)
+    - chunk_size: Số ứng viên tối đa giữ trong bộ nhớ trước khi ghi một run ra đĩa
+    - distance_file: (Optional) Đường dẫn file khoảng cách cần ghi khi kết thúc
+    - resume: Tiếp tục từ checkpoint trong scratch_dir nếu có
+
+    Returns:
+    - result: dict gồm 'layers' (số trạng thái ở mỗi độ sâu), 'total_states',
+      'max_depth', 'complete' (đã duyệt hết không gian chưa), 'resumed_from'
+      và 'distance_file'
+    """
+    if root_data is None:
+        flat_goal = list(range(1, size * size)) + [0]
+        root_data = [flat_goal[i:i + size] for i in range(0, size * size, size)]
+    size = len(root_data)
+    root_code = encode_state(root_data)
+    os.makedirs(scratch_dir, exist_ok=True)
+
+    checkpoint = _load_checkpoint(scratch_dir, size, root_code) if resume else None
+    resumed_from = None
+    if checkpoint is None:
+        _write_sorted_codes(_layer_path(scratch_dir, 0), [root_code])
+        checkpoint = {"size": size, "root": root_code, "layers": [1], "complete": False}
+        _save_checkpoint(scratch_dir, checkpoint)
+    else:
+        resumed_from = len(checkpoint["layers"]) - 1
+
+    layers = checkpoint["layers"]
+    while not checkpoint["complete"]:
+        depth = len(layers) - 1
+        if max_depth is not None and depth >= max_depth:
+            break
+
+        run_paths = _expand_layer(scratch_dir, depth, size, chunk_size)
+        candidates = _unique(heapq.merge(*[_read_sorted_codes(p) for p in run_paths]))
+        # Đồ thị vô hướng: hàng xóm của lớp d chỉ nằm ở lớp d-1, d hoặc d+1
+        previous = [_read_sorted_codes(_layer_path(scratch_dir, depth))]
+        if depth > 0:
+            previous.append(_read_sorted_codes(_layer_path(scratch_dir, depth - 1)))
+        count = _write_sorted_codes(_layer_path(scratch_dir, depth + 1),
+                                    _subtract(candidates, *previous))
+        for run_path in run_paths:
+            os.remove(run_path)
+
+        if count == 0:
+            os.remove(_layer_path(scratch_dir, depth + 1))
+            checkpoint["complete"] = True
+        else:
+            layers.append(count)
+        _save_checkpoint(scratch_dir, checkpoint)
+
+    if distance_file:
+        _write_distance_file(scratch_dir, size, len(layers), distance_file)
+
+    return {
+        "layers": list(layers),
+        "total_states": sum(layers),
+        "max_depth": len(layers) - 1,
+        "complete": checkpoint["complete"],
+        "resumed_from": resumed_from,
+        "distance_file": distance_file
+    }
@@ -3,14 +3,15 @@ import math
 
 # Import các thành phần cần thiết từ buzzle_logic và các hàm heuristic
 from src.core.buzzle_logic import Buzzle, create_new_state, manhattan_distance, is_solvable # is_solvable có thể không cần cho mọi local search
+from src.core.buzzle_logic import generate_random_solvable_state
 
 # Có thể cần thêm hàm number_of_misplaced_tiles nếu chưa có hoặc muốn tách riêng
 # from src.core.buzzle_logic import number_of_misplaced_tiles # Giả sử hàm này tồn tại
 
 # --- Helper Functions (nếu cần) ---
 
-def number_of_misplaced_tiles(buzzle_instance_or_data):
-    """Tính số ô sai vị trí so với trạng thái đích.
+def number_of_misplaced_tiles(buzzle_instance_or_data, goal_state=None):
+    """Tính số ô sai vị trí so với trạng thái đích (mặc định là đích chuẩn, hoặc goal_state).
     Có thể nhận vào Buzzle instance hoặc data (list of lists).
     Ô trống (0) không được tính là sai vị trí."""
     if isinstance(buzzle_instance_or_data, Buzzle):
@@ -18,26 +19,17 @@ def number_of_misplaced_tiles(buzzle_instance_or_data):
     else:
         data = buzzle_instance_or_data
     
-    goal_state_flat = [1, 2, 3, 4, 5, 6, 7, 8, 0] # Trạng thái đích phẳng
     current_flat = [tile for row in data for tile in row]
+    if goal_state is None:
+        goal_state_flat = list(range(1, len(current_flat))) + [0] # Trạng thái đích phẳng
+    else:
+        goal_state_flat = [tile for row in goal_state for tile in row]
     misplaced = 0
     for i in range(len(current_flat)):
         if current_flat[i] != 0 and current_flat[i] != goal_state_flat[i]:
             misplaced += 1
     return misplaced
 
-def generate_random_solvable_state():
-    """
-    Tạo ra một trạng thái 8-puzzle ngẫu nhiên và đảm bảo nó có thể giải được.
-    Trả về: list of lists đại diện cho data của puzzle.
-    """
-    while True:
-        numbers = list(range(9)) # 0 đến 8
-        random.shuffle(numbers)
-        new_state_data = [numbers[i:i+3] for i in range(0, 9, 3)]
-        if is_solvable(new_state_data):
-            return new_state_data
-
 # --- Thuật toán Leo đồi (Hill Climbing) ---
 
 def hill_climbing(initial_state, heuristic_func=manhattan_distance):
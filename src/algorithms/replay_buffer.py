@@ -0,0 +1,172 @@
+"""
+Bộ nhớ kinh nghiệm (experience replay) cho các agent RL dạng bảng.
+
+Các chuyển tiếp (state_rank, action, reward, next_rank, done) được lưu trong một mảng có cấu
+trúc (structured array) cấp phát trước, dùng như bộ đệm vòng: thêm O(1), ghi đè phần tử cũ
+nhất khi đầy. Lấy mẫu đều hoặc theo độ ưu tiên (cây tổng - sum tree) đều làm theo lô.
+Dung lượng 10^6 chuyển tiếp chỉ tốn khoảng 16 MB (cộng 16 MB cho cây tổng).
+"""
+import numpy as np
+
+TRANSITION_DTYPE = np.dtype([
+    ("state", np.int32),
+    ("action", np.int8),
+    ("reward", np.float32),
+    ("next_state", np.int32),
+    ("done", np.bool_)
+])
+
+class ReplayBuffer:
+    """
+    Bộ đệm vòng lấy mẫu đều.
+
+    Parameters:
+    - capacity: Số chuyển tiếp tối đa
+    - seed: (Optional) Hạt giống cho bộ sinh số ngẫu nhiên
+    """
+
+    def __init__(self, capacity=100000, seed=None):
+        if capacity <= 0:
+            raise ValueError("Replay buffer capacity must be positive")
+        self.capacity = int(capacity)
+        self.data = np.zeros(self.capacity, dtype=TRANSITION_DTYPE)
+        self.position = 0 # Vị trí ghi tiếp theo
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.size
+
+    def _slots(self, count):
+        """Chỉ số các ô cho `count` phần tử mới (quay vòng), cập nhật vị trí ghi và kích thước."""
+        slots = (self.position + np.arange(count)) % self.capacity
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+        return slots
+
+    def add(self, state, action, reward, next_state, done):
+        """Thêm một chuyển tiếp (rank, chỉ số hành động, phần thưởng, rank kế tiếp, kết thúc). Trả về ô đã ghi."""
+        slot = self.position
+        self.data[slot] = (state, action, reward, next_state, done)
+        self.position = (slot + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return slot
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """Thêm nhiều chuyển tiếp cùng lúc (các mảng cùng độ dài). Trả về các ô đã ghi."""
+        count = len(states)
+        if count > self.capacity:
+            # Chỉ các phần tử cuối còn lại sau khi quay vòng
+            keep = slice(count - self.capacity, count)
+            states, actions, rewards = states[keep], actions[keep], rewards[keep]
+            next_states, dones = next_states[keep], dones[keep]
+            count = self.capacity
+        slots = self._slots(count)
+        self.data["state"][slots] = states
+        self.data["action"][slots] = actions
+        self.data["reward"][slots] = rewards
+        self.data["next_state"][slots] = next_states
+        self.data["done"][slots] = dones
+        return slots
+
+    def sample(self, batch_size):
+        """
+        Lấy ngẫu nhiên đều batch_size chuyển tiếp (có hoàn lại).
+        Returns: (indices, batch, weights) với weights = None (không cần hiệu chỉnh)
+        """
+        indices = self.rng.integers(0, self.size, size=batch_size)
+        return indices, self.data[indices], None
+
+class SumTree:
+    """
+    Cây tổng trên một mảng: nút i có con 2i và 2i+1, lá nằm ở [leaf_count, 2 * leaf_count).
+    Cập nhật và tìm kiếm đều làm theo lô, mỗi tầng là một phép toán trên mảng.
+    """
+
+    def __init__(self, capacity):
+        self.leaf_count = 1 << max(0, int(capacity - 1).bit_length())
+        self.depth = self.leaf_count.bit_length() - 1
+        self.nodes = np.zeros(2 * self.leaf_count, dtype=np.float64)
+
+    def total(self):
+        return float(self.nodes[1])
+
+    def get(self, indices):
+        return self.nodes[self.leaf_count + np.asarray(indices)]
+
+    def update(self, indices, priorities):
+        """Gán độ ưu tiên cho các lá rồi tính lại tổng ở các nút cha."""
+        nodes = self.leaf_count + np.asarray(indices)
+        self.nodes[nodes] = priorities
+        for _ in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.nodes[nodes] = self.nodes[2 * nodes] + self.nodes[2 * nodes + 1]
+
+    def find(self, values):
+        """
+        Chỉ số lá mà tổng tiền tố chứa từng giá trị trong values (0 <= value <= total).
+        Không bao giờ đi vào cây con có tổng bằng 0, nên lá trả về luôn có độ ưu tiên dương
+        (kể cả khi value làm tròn chạm tới total) miễn là total > 0.
+        """
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_sums = self.nodes[left]
+            right_sums = self.nodes[left + 1]
+            go_right = ((values >= left_sums) & (right_sums > 0)) | (left_sums <= 0)
+            values = np.where(go_right, values - left_sums, values)
+            nodes = left + go_right
+        return nodes - self.leaf_count
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Bộ đệm vòng lấy mẫu theo độ ưu tiên: P(i) tỉ lệ với (|δ_i| + epsilon)^alpha.
+
+    Parameters:
+    - capacity: Số chuyển tiếp tối đa
+    - alpha: Mức độ ưu tiên (0 -> lấy mẫu đều)
+    - beta: Mức hiệu chỉnh importance sampling (1 -> hiệu chỉnh hoàn toàn)
+    - epsilon: Độ ưu tiên tối thiểu cộng thêm để mọi chuyển tiếp đều có thể được chọn
+    - seed: (Optional) Hạt giống cho bộ sinh số ngẫu nhiên
+    """
+
+    def __init__(self, capacity=100000, alpha=0.6, beta=0.4, epsilon=1e-3, seed=None):
+        super().__init__(capacity, seed)
+        self.alpha = alpha
+        self.beta = beta
+        self.epsilon = epsilon
+        self.tree = SumTree(self.capacity)
+        self.max_priority = 1.0 # Chuyển tiếp mới nhận độ ưu tiên lớn nhất để chắc chắn được học ít nhất một lần
+
+    def add(self, state, action, reward, next_state, done):
+        slot = super().add(state, action, reward, next_state, done)
+        self.tree.update([slot], [self.max_priority])
+        return slot
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        slots = super().add_batch(states, actions, rewards, next_states, dones)
+        self.tree.update(slots, np.full(len(slots), self.max_priority))
+        return slots
+
+    def sample(self, batch_size):
+        """
+        Lấy mẫu theo độ ưu tiên (lấy mẫu phân tầng trên tổng độ ưu tiên).
+        Returns: (indices, batch, weights) với weights là trọng số importance sampling (max = 1)
+        """
+        total = self.tree.total()
+        if total <= 0:
+            raise ValueError("Cannot sample from an empty replay buffer")
+        bounds = np.linspace(0.0, total, batch_size + 1)
+        values = bounds[:-1] + self.rng.random(batch_size) * (bounds[1:] - bounds[:-1])
+        indices = self.tree.find(values)
+        probabilities = self.tree.get(indices) / total
+        weights = (self.size * probabilities) ** (-self.beta)
+        weights /= weights.max()
+        return indices, self.data[indices], weights
+
+    def update_priorities(self, indices, td_errors):
+        """Cập nhật độ ưu tiên của các chuyển tiếp vừa học theo sai số TD mới."""
+        priorities = (np.abs(td_errors) + self.epsilon) ** self.alpha
+        self.tree.update(indices, priorities)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
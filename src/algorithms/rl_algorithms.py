@@ -2,12 +2,87 @@ import numpy as np
 import random
 import time
 import collections
-from src.core.buzzle_logic import Buzzle, create_new_state
+import heapq
+from src.core.buzzle_logic import Buzzle, create_new_state, MOVES
+from src.core.state_index import NUM_STATES, GOAL_RANK, HALF_PERMUTATIONS, state_to_rank, rank_to_state
+from src.core.state_space import NO_SUCCESSOR, successor_table, manhattan_distances, ranks_by_depth
+from src.algorithms.rl_model_store import NO_ACTION, RankIndexedView
+from src.algorithms.replay_buffer import ReplayBuffer, PrioritizedReplayBuffer
+from src.algorithms.transition_model import TransitionModel
+from src.algorithms.eligibility_traces import EligibilityTraces
+from src.algorithms.compiled_policy import CompiledPolicy
 
-# Ensure the Buzzle class has a generate_random_state method
-setattr(Buzzle, 'generate_random_state', 
-        staticmethod(lambda: [list(row) for row in random.sample(list(map(tuple, 
-                              [list(range(1,4)), list(range(4,7)), [7,8,0]])), 3)]))
+# VALID_ACTION_MASK[blank_pos, action]: hành động (theo thứ tự MOVES) có hợp lệ khi ô trống ở blank_pos
+VALID_ACTION_MASK = np.array([
+    [pos >= 3, pos < 6, pos % 3 != 0, pos % 3 != 2] for pos in range(9)
+], dtype=bool)
+
+def valid_action_mask(rank):
+    """Mặt nạ hành động hợp lệ của trạng thái có rank cho trước (ô trống = rank // 20160)."""
+    return VALID_ACTION_MASK[rank // HALF_PERMUTATIONS]
+
+# Phân phối trạng thái bắt đầu cho huấn luyện theo lô
+START_DISTRIBUTIONS = {"random", "curriculum"}
+
+def _partition_positions(rng, sizes, partition):
+    """Vị trí ngẫu nhiên trong các đoạn kích thước sizes, chỉ lấy vị trí p với p % count == index."""
+    if partition is None:
+        return (rng.random(len(sizes)) * sizes).astype(np.int64)
+    index, count = partition
+    slots = (sizes - index + count - 1) // count
+    # Đoạn quá nhỏ để chia (ví dụ các độ sâu nông) được dùng chung
+    shared = slots <= 0
+    positions = index + count * (rng.random(len(sizes)) * np.maximum(slots, 1)).astype(np.int64)
+    positions[shared] = (rng.random(int(shared.sum())) * sizes[shared]).astype(np.int64)
+    return positions
+
+def sample_start_ranks(rng, count, distribution="random", max_depth=None, partition=None):
+    """
+    Lấy ngẫu nhiên `count` trạng thái bắt đầu (rank, khác đích).
+
+    Parameters:
+    - rng: np.random.Generator
+    - count: Số trạng thái cần lấy
+    - distribution: 'random' (đều trên mọi trạng thái giải được) hoặc
+                    'curriculum' (độ sâu tối ưu chọn đều trong [1, max_depth], rồi trạng thái đều trong độ sâu đó)
+    - max_depth: Độ sâu tối đa cho 'curriculum' (None -> độ sâu lớn nhất, 31)
+    - partition: (Optional) (index, n): chỉ lấy trong phần thứ index của n phần rời nhau
+                 (dùng khi nhiều tiến trình cùng huấn luyện)
+    """
+    if distribution not in START_DISTRIBUTIONS:
+        raise ValueError(f"Unknown start distribution '{distribution}'")
+    if distribution == "random":
+        # Bỏ qua đích: các vị trí >= GOAL_RANK được dịch thêm một
+        ranks = _partition_positions(rng, np.full(count, NUM_STATES - 1), partition)
+        return ranks + (ranks >= GOAL_RANK)
+    ranks, offsets = ranks_by_depth()
+    deepest = len(offsets) - 2
+    max_depth = deepest if max_depth is None else int(min(max(max_depth, 1), deepest))
+    depths = rng.integers(1, max_depth + 1, size=count)
+    starts = offsets[depths]
+    return ranks[starts + _partition_positions(rng, offsets[depths + 1] - starts, partition)].astype(np.int64)
+
+def evaluation_start_ranks(count=1000, seed=0):
+    """Tập trạng thái bắt đầu cố định (đều trên mọi trạng thái giải được) để đánh giá chính sách tham lam."""
+    return sample_start_ranks(np.random.default_rng(seed), count, "random")
+
+def greedy_success_rate(q_table, start_ranks, max_steps=200):
+    """
+    Tỷ lệ trạng thái trong start_ranks tới được đích trong max_steps bước khi đi tham lam theo bảng Q
+    (không khám phá, bằng nhau -> hành động đầu tiên theo MOVES). Mọi trạng thái được đi cùng lúc.
+    """
+    successors = successor_table()
+    states = np.asarray(start_ranks, dtype=np.int64)
+    total = len(states)
+    for _ in range(max_steps):
+        states = states[states != GOAL_RANK]
+        if not states.size:
+            break
+        next_ranks = successors[states]
+        actions = np.where(next_ranks != NO_SUCCESSOR, q_table[states], -np.inf).argmax(axis=1)
+        states = next_ranks[np.arange(len(states)), actions].astype(np.int64)
+    remaining = int((states != GOAL_RANK).sum())
+    return (total - remaining) / max(total, 1)
 
 # Định nghĩa hàm heuristic để ước lượng khoảng cách tới đích
 def manhattan_distance(state):
@@ -46,7 +121,8 @@ def misplaced_tiles(state):
 class QLearningAgent:
     """Agent học Q-learning cho puzzle 8-ô."""
     
-    def __init__(self, alpha=0.1, gamma=0.9, epsilon=0.1, alpha_decay=0.99, epsilon_decay=0.99, min_alpha=0.01, min_epsilon=0.01):
+    def __init__(self, alpha=0.1, gamma=0.9, epsilon=0.1, alpha_decay=0.99, epsilon_decay=0.99, min_alpha=0.01, min_epsilon=0.01,
+                 replay_capacity=100000, prioritized_replay=False):
         """
         Khởi tạo agent.
         
@@ -58,6 +134,8 @@ class QLearningAgent:
         - epsilon_decay: Tốc độ giảm của epsilon sau mỗi episode
         - min_alpha: Giá trị tối thiểu của alpha
         - min_epsilon: Giá trị tối thiểu của epsilon
+        - replay_capacity: Số chuyển tiếp tối đa trong bộ nhớ kinh nghiệm
+        - prioritized_replay: Lấy mẫu kinh nghiệm theo độ ưu tiên (sai số TD) thay vì lấy mẫu đều
         """
         self.alpha = alpha
         self.gamma = gamma
@@ -66,23 +144,36 @@ class QLearningAgent:
         self.epsilon_decay = epsilon_decay
         self.min_alpha = min_alpha
         self.min_epsilon = min_epsilon
-        self.q_table = {}  # Bảng Q để lưu giá trị Q(s,a)
+        # Bảng Q dày đặc: q_table[rank(s), chỉ số hành động trong MOVES] (float32, ~2.9 MB)
+        self.q_table = np.zeros((NUM_STATES, len(MOVES)), dtype=np.float32)
         self.visited_states = set()  # Các trạng thái đã ghé thăm
-        self.possible_moves = ["up", "down", "left", "right"]  # Các hành động có thể trong 8-puzzle
-        self.experience_buffer = collections.deque(maxlen=1000)  # Buffer cho experience replay
+        self.possible_moves = list(MOVES)  # Các hành động có thể trong 8-puzzle
+        self.replay_capacity = replay_capacity
+        self.prioritized_replay = prioritized_replay
+        self.replay_buffer = None  # Bộ nhớ kinh nghiệm (tạo khi huấn luyện lần đầu)
+        self.transition_model = None  # Mô hình chuyển tiếp cho Dyna-Q (tạo khi huấn luyện lần đầu)
+        self._compiled_policy = None  # Chính sách biên dịch từ bảng Q (xem compiled_policy)
+        self._compiled_source = None
         
+    def _ensure_writable(self):
+        """Bảng Q nạp từ file là memory-map chỉ đọc; sao chép trước khi huấn luyện tiếp."""
+        if not self.q_table.flags.writeable:
+            self.q_table = np.array(self.q_table)
+        self._compiled_policy = None  # Bảng Q sắp thay đổi
+    
     def get_q_value(self, state_tuple, action):
         """Lấy giá trị Q cho cặp trạng thái-hành động."""
-        # state_tuple là tuple của tuple để có thể dùng làm key
-        if (state_tuple, action) not in self.q_table:
-            self.q_table[(state_tuple, action)] = 0.0
-        return self.q_table[(state_tuple, action)]
+        return float(self.q_table[state_to_rank(state_tuple), MOVES.index(action)])
+    
+    def get_q_values(self, rank):
+        """Các giá trị Q của trạng thái (theo rank); hành động không hợp lệ nhận -inf."""
+        return np.where(valid_action_mask(rank), self.q_table[rank], -np.inf)
     
     def get_max_q_value(self, state_tuple, possible_actions):
         """Lấy giá trị Q tối đa cho trạng thái hiện tại."""
         if not possible_actions:
             return 0.0
-        return max(self.get_q_value(state_tuple, action) for action in possible_actions)
+        return float(self.get_q_values(state_to_rank(state_tuple)).max())
     
     def get_best_action(self, state_tuple, possible_actions):
         """Lấy hành động với giá trị Q tốt nhất (với epsilon-greedy)."""
@@ -94,40 +185,91 @@ class QLearningAgent:
             return random.choice(possible_actions)
             
         # Tìm hành động có giá trị Q tốt nhất
-        max_q = float("-inf")
-        best_actions = []
-        
-        for action in possible_actions:
-            q_value = self.get_q_value(state_tuple, action)
-            if q_value > max_q:
-                max_q = q_value
-                best_actions = [action]
-            elif q_value == max_q:
-                best_actions.append(action)
+        q_values = self.get_q_values(state_to_rank(state_tuple))
+        best_actions = np.flatnonzero(q_values == q_values.max())
                 
         # Nếu có nhiều hành động có cùng giá trị Q tốt nhất, chọn ngẫu nhiên
-        return random.choice(best_actions)
+        return MOVES[random.choice(best_actions.tolist())]
     
     def update_q_value(self, state_tuple, action, reward, next_state_tuple, possible_next_actions):
         """Cập nhật giá trị Q cho cặp (state, action)."""
         # Q(s,a) = Q(s,a) + alpha * [R + gamma * max_a' Q(s',a') - Q(s,a)]
         max_next_q = self.get_max_q_value(next_state_tuple, possible_next_actions)
-        current_q = self.get_q_value(state_tuple, action)
+        rank = state_to_rank(state_tuple)
+        action_index = MOVES.index(action)
+        current_q = self.q_table[rank, action_index]
         
         # Công thức cập nhật Q
-        new_q = current_q + self.alpha * (reward + self.gamma * max_next_q - current_q)
-        self.q_table[(state_tuple, action)] = new_q
+        self.q_table[rank, action_index] = current_q + self.alpha * (reward + self.gamma * max_next_q - current_q)
+    
+    def learned_state_count(self):
+        """Số trạng thái có ít nhất một giá trị Q khác 0."""
+        return int(np.count_nonzero(self.q_table.any(axis=1)))
+    
+    def _ensure_replay_buffer(self):
+        """Tạo bộ nhớ kinh nghiệm khi cần (agent chỉ dùng để giải không cần cấp phát)."""
+        if self.replay_buffer is None:
+            if self.prioritized_replay:
+                self.replay_buffer = PrioritizedReplayBuffer(self.replay_capacity)
+            else:
+                self.replay_buffer = ReplayBuffer(self.replay_capacity)
+        return self.replay_buffer
+    
+    def _ensure_transition_model(self):
+        """Tạo mô hình chuyển tiếp của Dyna-Q khi cần."""
+        if self.transition_model is None:
+            self.transition_model = TransitionModel()
+        return self.transition_model
+    
+    def td_update(self, states, actions, rewards, next_states, dones, weights=None):
+        """
+        Cập nhật TD theo lô (các mảng rank, chỉ số hành động, phần thưởng, rank kế tiếp, kết thúc):
+            Q(s,a) = Q(s,a) + alpha * w * [R + gamma * max_a' Q(s',a') - Q(s,a)]
+        với max_a' Q(s',a') = 0 khi s' là trạng thái kết thúc.
+        Khi một cặp (s,a) xuất hiện nhiều lần trong lô, chỉ một cập nhật được giữ lại.
+        
+        Returns:
+        - td_errors: Sai số TD (trước khi cập nhật)
+        """
+        next_valid = VALID_ACTION_MASK[next_states // HALF_PERMUTATIONS]
+        next_max = np.where(next_valid, self.q_table[next_states], -np.inf).max(axis=1)
+        targets = rewards + self.gamma * np.where(dones, 0.0, next_max)
+        current = self.q_table[states, actions]
+        td_errors = targets - current
+        step = self.alpha * td_errors if weights is None else self.alpha * weights * td_errors
+        self.q_table[states, actions] = current + step
+        return td_errors
+    
+    def trace_update(self, traces, states, actions, rewards, next_states, dones):
+        """
+        Cập nhật Q(λ) theo lô: sai số TD một bước của mỗi môi trường được áp dụng cho mọi cặp
+        trong vết của môi trường đó:
+            Q(s,a) = Q(s,a) + alpha * δ_env * (gamma * lambda)^tuổi
+        Cặp (states, actions) vừa thực hiện phải đã được ghi vào traces (tuổi 0).
+        Khi một cặp xuất hiện nhiều lần, cập nhật của lần gần nhất được giữ lại (vết thay thế).
+        
+        Returns:
+        - td_errors: Sai số TD của từng môi trường (trước khi cập nhật)
+        """
+        next_valid = VALID_ACTION_MASK[next_states // HALF_PERMUTATIONS]
+        next_max = np.where(next_valid, self.q_table[next_states], -np.inf).max(axis=1)
+        td_errors = rewards + self.gamma * np.where(dones, 0.0, next_max) - self.q_table[states, actions]
+        envs, trace_states, trace_actions, eligibilities = traces.pairs()
+        self.q_table[trace_states, trace_actions] = (self.q_table[trace_states, trace_actions]
+                                                     + self.alpha * td_errors[envs] * eligibilities)
+        return td_errors
     
     def experience_replay(self, batch_size=32):
-        """Học từ kinh nghiệm quá khứ để cải thiện quá trình học tập."""
-        if len(self.experience_buffer) < batch_size:
+        """Học từ kinh nghiệm quá khứ: lấy mẫu một lô từ bộ nhớ kinh nghiệm và cập nhật TD theo lô."""
+        buffer = self.replay_buffer
+        if buffer is None or len(buffer) < batch_size:
             return
             
-        # Lấy mẫu ngẫu nhiên từ buffer
-        batch = random.sample(self.experience_buffer, batch_size)
-        
-        for state_tuple, action, reward, next_state_tuple, possible_next_actions in batch:
-            self.update_q_value(state_tuple, action, reward, next_state_tuple, possible_next_actions)
+        indices, batch, weights = buffer.sample(batch_size)
+        td_errors = self.td_update(batch["state"], batch["action"], batch["reward"],
+                                   batch["next_state"], batch["done"], weights)
+        if self.prioritized_replay:
+            buffer.update_priorities(indices, td_errors)
             
     def _get_reward(self, state, action, next_state):
         """
@@ -164,7 +306,8 @@ class QLearningAgent:
         # Phạt nhẹ để khuyến khích tìm đường ngắn nhất
         return -0.1
         
-    def train(self, episodes=1000, max_steps=1000, use_experience_replay=True, batch_size=32):
+    def train(self, episodes=1000, max_steps=1000, use_experience_replay=True, batch_size=32,
+              start_distribution="random", max_depth=None, seed=None):
         """
         Huấn luyện agent bằng cách chạy nhiều episode.
         
@@ -173,11 +316,18 @@ class QLearningAgent:
         - max_steps: Số bước tối đa cho mỗi episode
         - use_experience_replay: Có sử dụng experience replay hay không
         - batch_size: Kích thước batch cho experience replay
+        - start_distribution, max_depth: Phân phối trạng thái bắt đầu của mỗi episode (xem sample_start_ranks)
+        - seed: (Optional) Hạt giống cho việc chọn trạng thái bắt đầu
         
         Returns:
         - stats: Thống kê về quá trình huấn luyện
         """
+        self._ensure_writable()
+        if use_experience_replay:
+            self._ensure_replay_buffer()
         start_time = time.time()
+        rng = np.random.default_rng(seed)
+        start_ranks = sample_start_ranks(rng, episodes, start_distribution, max_depth)
         stats = {
             'episodes': episodes,
             'episode_lengths': [],
@@ -193,7 +343,7 @@ class QLearningAgent:
             stats['epsilon_history'].append(self.epsilon)
             
             # Khởi tạo trạng thái bắt đầu
-            puzzle = Buzzle()  # Sử dụng trạng thái mặc định hoặc ngẫu nhiên
+            puzzle = Buzzle(rank_to_state(int(start_ranks[episode])))
             state_tuple = tuple(map(tuple, puzzle.data))
             total_reward = 0
             
@@ -236,13 +386,14 @@ class QLearningAgent:
                 
                 # Lưu trải nghiệm vào buffer
                 if use_experience_replay:
-                    self.experience_buffer.append((state_tuple, action, reward, next_state_tuple, possible_next_actions))
+                    self.replay_buffer.add(state_to_rank(state_tuple), MOVES.index(action), reward,
+                                           state_to_rank(next_state_tuple), next_puzzle.is_goal())
                 
                 # Cập nhật bảng Q
                 self.update_q_value(state_tuple, action, reward, next_state_tuple, possible_next_actions)
                 
                 # Thực hiện experience replay
-                if use_experience_replay and len(self.experience_buffer) >= batch_size:
+                if use_experience_replay:
                     self.experience_replay(batch_size)
                 
                 # Chuyển đến trạng thái tiếp theo
@@ -268,158 +419,223 @@ class QLearningAgent:
         
         stats['training_time'] = time.time() - start_time
         stats['unique_states'] = len(self.visited_states)
-        stats['q_table_size'] = len(self.q_table)
+        stats['q_table_size'] = self.learned_state_count()
         stats['final_alpha'] = self.alpha
         stats['final_epsilon'] = self.epsilon
         
         return stats
     
-    def solve(self, puzzle, max_steps=100):
+    def train_batched(self, episodes=10000, num_envs=256, max_steps=200, start_distribution="curriculum",
+                      curriculum_start_depth=4, seed=None, partition=None, visit_counts=None,
+                      episode_offset=0, total_episodes=None, use_experience_replay=False, batch_size=256,
+                      planning_steps=0, target_success_rate=None, success_window=1000, stop_at_target=False,
+                      eval_interval=1000, eval_starts=None, trace_lambda=0.0, trace_cutoff=0.01):
+        """
+        Huấn luyện với num_envs môi trường chạy song song theo từng bước (lockstep).
+        Trạng thái của mọi môi trường là một mảng rank; chọn hành động epsilon-greedy, tính phần
+        thưởng (build_reward_matrix) và cập nhật TD đều là phép toán trên mảng.
+
+        Parameters:
+        - episodes: Tổng số episode (trên mọi môi trường)
+        - num_envs: Số môi trường chạy song song
+        - max_steps: Số bước tối đa cho mỗi episode
+        - start_distribution: Phân phối trạng thái bắt đầu (xem sample_start_ranks)
+        - curriculum_start_depth: Độ sâu tối đa ban đầu của 'curriculum', tăng tuyến tính tới 31
+          theo số episode đã hoàn thành
+        - seed: (Optional) Hạt giống cho bộ sinh số ngẫu nhiên
+        - partition: (Optional) (index, n): phần trạng thái bắt đầu riêng (xem sample_start_ranks)
+        - visit_counts: (Optional) Mảng (NUM_STATES, 4) được cộng thêm số lần cập nhật mỗi cặp (trạng thái, hành động)
+        - episode_offset, total_episodes: (Optional) Vị trí của lần gọi này trong một lịch huấn luyện dài hơn
+          (khi huấn luyện thành nhiều đợt), dùng để tính độ sâu của 'curriculum'
+        - use_experience_replay: Sau mỗi bước, học thêm một lô batch_size chuyển tiếp từ bộ nhớ kinh nghiệm
+        - batch_size: Kích thước lô experience replay
+        - planning_steps: Dyna-Q: số cập nhật mô phỏng từ mô hình chuyển tiếp học được cho mỗi bước thật
+          của mỗi môi trường (0 -> Q-learning thuần), làm theo một lô planning_steps * num_envs
+        - target_success_rate: (Optional) Tỷ lệ thành công mục tiêu của chính sách tham lam, đánh giá
+          mỗi eval_interval episode trên eval_starts (greedy_success_rate, không dùng episode huấn luyện vì
+          'curriculum' bắt đầu từ các trạng thái gần đích); số episode/bước môi trường cần để đạt được ghi vào
+          'episodes_to_target'/'env_steps_to_target', các lần đánh giá vào 'eval_history'
+        - success_window: Số episode huấn luyện gần nhất dùng để tính 'recent_success_rate'
+        - stop_at_target: Dừng huấn luyện ngay khi đạt target_success_rate
+        - eval_interval: Số episode giữa hai lần đánh giá chính sách tham lam
+        - eval_starts: (Optional) Rank các trạng thái bắt đầu khi đánh giá (mặc định evaluation_start_ranks())
+        - trace_lambda: Q(λ) của Watkins: sai số TD của mỗi bước được cộng cho các cặp đã đi qua trong
+          episode với trọng số (gamma * lambda)^tuổi; vết bị xóa sau hành động khám phá (0 -> Q-learning một bước)
+        - trace_cutoff: Bỏ các vết nhỏ hơn ngưỡng này (giới hạn số cặp được cập nhật mỗi bước)
+
+        Returns:
+        - stats: Thống kê (cùng các khóa như train, thêm 'env_steps', 'steps_per_second'...)
         """
-        Giải puzzle sử dụng chính sách đã học.
+        self._ensure_writable()
+        start_time = time.time()
+        rng = np.random.default_rng(seed)
+        successors = successor_table()
+        rewards = build_reward_matrix()
+        valid_actions = successors != NO_SUCCESSOR
+        env_index = np.arange(num_envs)
+        visited = np.zeros(NUM_STATES, dtype=bool)
+        deepest = int(len(ranks_by_depth()[1]) - 2)
+        replay = self._ensure_replay_buffer() if use_experience_replay else None
+        model = self._ensure_transition_model() if planning_steps > 0 else None
+        recent_success = collections.deque(maxlen=success_window)
+        episodes_to_target = None
+        env_steps_to_target = None
+        if target_success_rate is not None and eval_starts is None:
+            eval_starts = evaluation_start_ranks()
+        next_eval = eval_interval
+        traces = None
+        if trace_lambda > 0.0:
+            traces = EligibilityTraces(num_envs, self.gamma * trace_lambda, trace_cutoff, max_steps)
+
+        total_episodes = total_episodes or episodes
+
+        def curriculum_depth(completed):
+            progress = min(1.0, (episode_offset + completed) / max(total_episodes, 1))
+            return curriculum_start_depth + progress * (deepest - curriculum_start_depth)
+
+        stats = {
+            'episodes': episodes,
+            'episode_lengths': [],
+            'episode_rewards': [],
+            'steps_to_goal': [],
+            'alpha_history': [],
+            'epsilon_history': [],
+            'eval_history': []
+        }
+
+        states = sample_start_ranks(rng, num_envs, start_distribution, curriculum_depth(0), partition)
+        episode_steps = np.zeros(num_envs, dtype=np.int64)
+        episode_rewards = np.zeros(num_envs, dtype=np.float64)
+        completed = 0
+        env_steps = 0
+
+        while completed < episodes:
+            visited[states] = True
+            valid = valid_actions[states]
+            q_values = self.q_table[states]
+
+            # Epsilon-greedy; nhiễu nhỏ để chọn ngẫu nhiên giữa các hành động có Q bằng nhau
+            noise = rng.random((num_envs, 4))
+            greedy = np.where(valid, q_values + noise * 1e-6, -np.inf).argmax(axis=1)
+            random_actions = np.where(valid, noise, -1.0).argmax(axis=1)
+            actions = np.where(rng.random(num_envs) < self.epsilon, random_actions, greedy)
+
+            next_states = successors[states, actions].astype(np.int64)
+            step_rewards = rewards[states, actions]
+            done = next_states == GOAL_RANK
+
+            # Đích là trạng thái kết thúc. Khi nhiều môi trường cùng cập nhật một cặp (trạng thái, hành động),
+            # td_update chỉ giữ một cập nhật (cộng dồn sẽ vượt quá bước học alpha và phân kỳ)
+            if traces is None:
+                self.td_update(states, actions, step_rewards, next_states, done)
+            else:
+                # Hành động khám phá cắt vết: các cặp trước đó không được nhận sai số TD của nhánh này
+                traces.clear(actions != greedy)
+                traces.push(states, actions)
+                self.trace_update(traces, states, actions, step_rewards, next_states, done)
+            if use_experience_replay:
+                replay.add_batch(states, actions, step_rewards, next_states, done)
+                self.experience_replay(batch_size)
+            if planning_steps > 0:
+                # Dyna-Q: học mô hình từ bước thật rồi cập nhật thêm trên các cặp đã quan sát
+                model.record(states, actions, step_rewards, next_states)
+                self.td_update(*model.sample(planning_steps * num_envs))
+            if visit_counts is not None:
+                np.add.at(visit_counts, (states, actions), 1)
+
+            env_steps += num_envs
+            episode_steps += 1
+            episode_rewards += step_rewards
+            finished = done | (episode_steps >= max_steps)
+            if finished.any():
+                for env in env_index[finished]:
+                    if completed >= episodes:
+                        break
+                    stats['alpha_history'].append(self.alpha)
+                    stats['epsilon_history'].append(self.epsilon)
+                    stats['episode_lengths'].append(int(episode_steps[env]))
+                    stats['episode_rewards'].append(float(episode_rewards[env]))
+                    if done[env]:
+                        stats['steps_to_goal'].append(int(episode_steps[env]))
+                    completed += 1
+                    recent_success.append(bool(done[env]))
+                    # Giảm alpha và epsilon theo lịch decay (mỗi episode hoàn thành)
+                    self.alpha = max(self.min_alpha, self.alpha * self.alpha_decay)
+                    self.epsilon = max(self.min_epsilon, self.epsilon * self.epsilon_decay)
+                next_states[finished] = sample_start_ranks(
+                    rng, int(finished.sum()), start_distribution, curriculum_depth(completed), partition
+                )
+                episode_steps[finished] = 0
+                episode_rewards[finished] = 0.0
+                if traces is not None:
+                    traces.clear(finished)
+                if target_success_rate is not None and episodes_to_target is None and completed >= next_eval:
+                    next_eval = completed + eval_interval
+                    eval_rate = greedy_success_rate(self.q_table, eval_starts, max_steps)
+                    stats['eval_history'].append((completed, eval_rate))
+                    if eval_rate >= target_success_rate:
+                        episodes_to_target = completed
+                        env_steps_to_target = env_steps
+                if stop_at_target and episodes_to_target is not None:
+                    break
+            states = next_states
+
+        elapsed = time.time() - start_time
+        stats['training_time'] = elapsed
+        stats['num_envs'] = num_envs
+        stats['start_distribution'] = start_distribution
+        stats['env_steps'] = env_steps
+        stats['steps_per_second'] = env_steps / elapsed if elapsed > 0 else 0.0
+        stats['episodes'] = completed
+        stats['success_rate'] = len(stats['steps_to_goal']) / max(completed, 1)
+        stats['recent_success_rate'] = sum(recent_success) / max(len(recent_success), 1)
+        stats['episodes_to_target'] = episodes_to_target
+        stats['env_steps_to_target'] = env_steps_to_target
+        stats['eval_success_rate'] = stats['eval_history'][-1][1] if stats['eval_history'] else None
+        stats['planning_steps'] = planning_steps
+        stats['planning_backups'] = env_steps * planning_steps
+        stats['model_size'] = len(model) if model is not None else 0
+        stats['trace_lambda'] = trace_lambda
+        stats['trace_length'] = traces.length if traces is not None else 0
+        stats['unique_states'] = int(visited.sum())
+        stats['q_table_size'] = self.learned_state_count()
+        stats['final_alpha'] = self.alpha
+        stats['final_epsilon'] = self.epsilon
+        return stats
+
+    def compiled_policy(self):
+        """Chính sách tham lam của bảng Q dạng mảng int8 theo rank (dựng một lần, dựng lại sau khi huấn luyện)."""
+        if self._compiled_policy is None or self._compiled_source is not self.q_table:
+            self._compiled_policy = CompiledPolicy.from_q_table(self.q_table)
+            self._compiled_source = self.q_table
+        return self._compiled_policy
+    
+    def solve(self, puzzle, max_steps=100, fallback=False):
+        """
+        Giải puzzle sử dụng chính sách đã học (đi theo chính sách biên dịch, xem compiled_policy).
+        Trạng thái có chu trình được báo cáo bởi compiled_policy().verify() thay vì xử lý trong lúc giải.
         
         Parameters:
         - puzzle: Trạng thái bắt đầu (Buzzle object)
         - max_steps: Số bước tối đa cho phép
+        - fallback: Trạng thái bị lặp/ngõ cụt đi theo chính sách đã sửa (số bước ghi ở stats['fallback_steps'])
         
         Returns:
         - path: Đường đi giải pháp (list các tuple (action, state_data))
         - steps: Số bước đã thực hiện
         - stats: Thống kê
         """
-        path = []
-        steps = 0
-        current_puzzle = puzzle
-        
-        # Theo dõi trạng thái đã thăm và số lần thăm
-        visited_states = {}
-        # Theo dõi các hành động đã thử ở mỗi trạng thái
-        tried_actions = {}
-        
-        while steps < max_steps:
-            state_tuple = tuple(map(tuple, current_puzzle.data))
-            
-            # Kiểm tra đã đến đích chưa
-            if current_puzzle.is_goal():
-                break
-            
-            # Kiểm tra chu trình
-            if state_tuple in visited_states:
-                visited_states[state_tuple] += 1
-                
-                # Nếu đã thăm quá nhiều lần, tìm đường đi thay thế
-                if visited_states[state_tuple] > 2:
-                    print(f"Phát hiện chu trình tại bước {steps}, tìm hành động khác")
-                    
-                    # Lấy các hành động chưa thử cho trạng thái này
-                    if state_tuple not in tried_actions:
-                        tried_actions[state_tuple] = set()
-                    
-                    # Lấy tất cả các hành động hợp lệ
-                    valid_moves = current_puzzle.get_valid_moves()
-                    
-                    # Lọc ra các hành động chưa thử
-                    untried_moves = [move for move in valid_moves if move not in tried_actions[state_tuple]]
-                    
-                    if untried_moves:
-                        # Chọn hành động chưa thử tốt nhất dựa trên heuristic
-                        best_move = None
-                        best_score = float('inf')
-                        
-                        for move in untried_moves:
-                            success, next_state = create_new_state(current_puzzle.data, move)
-                            if success:
-                                score = manhattan_distance(next_state)
-                                if score < best_score:
-                                    best_score = score
-                                    best_move = move
-                        
-                        if best_move:
-                            # Đánh dấu đã thử hành động này
-                            tried_actions[state_tuple].add(best_move)
-                            
-                            # Thực hiện hành động
-                            success, next_state = create_new_state(current_puzzle.data, best_move)
-                            if success:
-                                path.append((best_move, next_state))
-                                current_puzzle = Buzzle(next_state)
-                                steps += 1
-                                continue
-                    
-                    # Nếu không có hành động nào khả thi, quay lại một bước
-                    if len(path) > 1:
-                        path.pop()  # Loại bỏ bước cuối cùng
-                        _, prev_state = path[-1]  # Lấy trạng thái trước đó
-                        current_puzzle = Buzzle(prev_state)
-                        continue
-            else:
-                visited_states[state_tuple] = 1
-            
-            # Lấy các hành động hợp lệ
-            valid_moves = current_puzzle.get_valid_moves()
-            if not valid_moves:
-                break
-            
-            # Lấy hành động từ Q-table nếu có
-            if state_tuple in self.q_table:
-                q_values = self.q_table[state_tuple]
-                
-                # Lọc các hành động hợp lệ
-                valid_q_actions = {move: q_values.get(move, 0) for move in valid_moves}
-                
-                # Chọn hành động tốt nhất
-                if valid_q_actions:
-                    action = max(valid_q_actions.items(), key=lambda x: x[1])[0]
-                else:
-                    # Nếu không có giá trị Q cho các hành động hợp lệ, sử dụng heuristic
-                    best_move = None
-                    best_score = float('inf')
-                    
-                    for move in valid_moves:
-                        success, next_state = create_new_state(current_puzzle.data, move)
-                        if success:
-                            score = manhattan_distance(next_state)
-                            if score < best_score:
-                                best_score = score
-                                best_move = move
-                    
-                    action = best_move if best_move else random.choice(valid_moves)
-            else:
-                # Nếu không có thông tin trong Q-table, sử dụng heuristic
-                best_move = None
-                best_score = float('inf')
-                
-                for move in valid_moves:
-                    success, next_state = create_new_state(current_puzzle.data, move)
-                    if success:
-                        score = manhattan_distance(next_state)
-                        if score < best_score:
-                            best_score = score
-                            best_move = move
-                
-                action = best_move if best_move else random.choice(valid_moves)
-            
-            # Thực hiện hành động
-            success, next_state = create_new_state(current_puzzle.data, action)
-            if not success:
-                continue
-            
-            # Cập nhật đường đi và trạng thái
-            path.append((action, next_state))
-            current_puzzle = Buzzle(next_state)
-            steps += 1
-            
-            # Đánh dấu đã thử hành động này
-            if state_tuple not in tried_actions:
-                tried_actions[state_tuple] = set()
-            tried_actions[state_tuple].add(action)
+        solve_stats = {}
+        path = self.compiled_policy().solve(puzzle, max_steps, fallback=fallback, stats=solve_stats)
+        steps = len(path)
         
         # Thống kê
         stats = {
             'steps': steps,
-            'path_length': len(path),
-            'success': current_puzzle.is_goal(),
-            'visited_states': len(visited_states)
+            'fallback_steps': solve_stats['fallback_steps'],
+            'path_length': steps,
+            'success': (Buzzle(path[-1][1]) if path else puzzle).is_goal(),
+            'visited_states': steps + 1
         }
         
         return path, steps, stats
@@ -432,20 +648,15 @@ class QLearningAgent:
         Returns:
         - utility_map: Dictionary map từ trạng thái đến giá trị utility
         """
-        utility_map = {}
+        learned_ranks = np.flatnonzero(self.q_table.any(axis=1))
+        # max_a Q(s,a) trên các hành động hợp lệ, tính một lần cho mọi trạng thái đã học
+        masks = VALID_ACTION_MASK[learned_ranks // HALF_PERMUTATIONS]
+        utilities = np.where(masks, self.q_table[learned_ranks], -np.inf).max(axis=1)
         
-        # Nhóm các cặp (state, action) theo state
-        states_actions = {}
-        for (state, action) in self.q_table:
-            if state not in states_actions:
-                states_actions[state] = []
-            states_actions[state].append(action)
-            
-        # Tính giá trị utility cho mỗi trạng thái
-        for state, actions in states_actions.items():
-            utility_map[state] = max(self.get_q_value(state, action) for action in actions)
-            
-        return utility_map
+        return {
+            tuple(map(tuple, rank_to_state(int(rank)))): float(value)
+            for rank, value in zip(learned_ranks, utilities)
+        }
 
 def count_misplaced_tiles(state_data):
     """Đếm số ô sai vị trí so với trạng thái đích."""
@@ -477,275 +688,395 @@ def calculate_manhattan_distance(state_data):
                 
     return distance
 
-def value_iteration(gamma=0.9, iterations=100, max_states_to_explore=10000, theta=0.01):
+# Mô hình phần thưởng của value iteration: 100 khi đi vào đích, ngoài ra +1/-1/-0.1 khi
+# khoảng cách Manhattan giảm/tăng/không đổi. Trạng thái đích giữ giá trị cố định GOAL_UTILITY.
+GOAL_UTILITY = 100.0
+GOAL_REWARD = 100.0
+CLOSER_REWARD = 1.0
+FARTHER_REWARD = -1.0
+NEUTRAL_REWARD = -0.1
+
+def build_reward_matrix():
     """
-    Thuật toán Value Iteration cho 8-puzzle.
-    
+    Ma trận phần thưởng float64 (NUM_STATES, 4) theo successor_table(); ô của hành động
+    không hợp lệ có giá trị -inf để bị loại khi lấy max.
+    """
+    successors = successor_table()
+    distances = manhattan_distances().astype(np.int16)
+    valid = successors != NO_SUCCESSOR
+    next_distances = distances[np.where(valid, successors, 0)]
+    change = next_distances - distances[:, None]
+    rewards = np.where(change < 0, CLOSER_REWARD, np.where(change > 0, FARTHER_REWARD, NEUTRAL_REWARD))
+    rewards[successors == GOAL_RANK] = GOAL_REWARD
+    rewards[~valid] = -np.inf
+    return rewards
+
+def _planning_model():
+    """(successors, rewards, next_ranks) dùng chung cho các thuật toán quy hoạch động."""
+    successors = successor_table()
+    rewards = build_reward_matrix()
+    # Hành động không hợp lệ trỏ tạm về đích; phần thưởng -inf đã loại chúng
+    next_ranks = np.where(successors == NO_SUCCESSOR, GOAL_RANK, successors)
+    return successors, rewards, next_ranks
+
+def _greedy_policy(rewards, next_ranks, utilities, gamma):
+    """Chính sách tham lam int8 theo utilities (NO_ACTION tại đích)."""
+    policy = (rewards + gamma * utilities[next_ranks]).argmax(axis=1).astype(np.int8)
+    policy[GOAL_RANK] = NO_ACTION
+    return policy
+
+def _planning_views(utility_array, policy_array):
+    """Khung nhìn kiểu dict (utilities, policy) trên các mảng theo rank."""
+    utilities = RankIndexedView(utility_array, float("nan"))
+    policy = RankIndexedView(policy_array, NO_ACTION, decode=lambda value: MOVES[int(value)])
+    return utilities, policy
+
+# Thứ tự cập nhật của Value Iteration
+VALUE_ITERATION_SWEEPS = ("gauss_seidel", "jacobi")
+
+def _gauss_seidel_sweeps(rewards, next_ranks, gamma, iterations, theta):
+    """
+    Quét Gauss-Seidel tại chỗ theo từng lớp BFS tính từ đích (độ sâu 1, 2, ..., 31): lớp d dùng
+    ngay giá trị mới của lớp d - 1, nên giá trị ở đích lan ra toàn bộ không gian trong một lần quét.
+    Đồ thị 8-puzzle là đồ thị hai phía (mỗi nước đi đổi độ sâu đúng 1 đơn vị), các trạng thái cùng lớp
+    không kề nhau, nên cập nhật cả lớp bằng một phép toán mảng cho kết quả giống hệt cập nhật từng trạng thái.
+
+    Returns: (utilities, residuals theo từng lần quét)
+    """
+    order, offsets = ranks_by_depth()
+    # Sắp xếp lại theo lớp để mỗi lớp là một đoạn liên tiếp
+    layer_rewards = rewards[order]
+    layer_next = next_ranks[order]
+    utilities = np.zeros(NUM_STATES, dtype=np.float64)
+    utilities[GOAL_RANK] = GOAL_UTILITY
+    residuals = []
+    for _ in range(iterations):
+        residual = 0.0
+        for depth in range(1, len(offsets) - 1):
+            layer = slice(offsets[depth], offsets[depth + 1])
+            ranks = order[layer]
+            new_values = (layer_rewards[layer] + gamma * utilities[layer_next[layer]]).max(axis=1)
+            residual = max(residual, float(np.abs(new_values - utilities[ranks]).max()))
+            utilities[ranks] = new_values
+        residuals.append(residual)
+        if residual < theta:
+            break
+    return utilities, residuals
+
+def _jacobi_sweeps(rewards, next_ranks, gamma, iterations, theta):
+    """Quét đồng bộ: mọi trạng thái cùng cập nhật từ giá trị của lần quét trước. Returns: (utilities, residuals)"""
+    utilities = np.zeros(NUM_STATES, dtype=np.float64)
+    utilities[GOAL_RANK] = GOAL_UTILITY
+    residuals = []
+    for _ in range(iterations):
+        new_utilities = (rewards + gamma * utilities[next_ranks]).max(axis=1)
+        new_utilities[GOAL_RANK] = GOAL_UTILITY
+        residuals.append(float(np.abs(new_utilities - utilities).max()))
+        utilities = new_utilities
+        if residuals[-1] < theta:
+            break
+    return utilities, residuals
+
+def value_iteration_arrays(gamma=0.9, iterations=100, theta=0.01, sweep="gauss_seidel"):
+    """
+    Value Iteration trên toàn bộ không gian trạng thái (181440 trạng thái x 4 hành động).
+    Mỗi lần cập nhật Bellman là một phép gather theo bảng kế tiếp cộng max theo hành động.
+
     Parameters:
     - gamma: Hệ số giảm (discount factor)
-    - iterations: Số lần lặp tối đa
-    - max_states_to_explore: Số trạng thái tối đa để khám phá
+    - iterations: Số lần quét tối đa
+    - theta: Ngưỡng hội tụ (chuẩn max của thay đổi giá trị trong một lần quét)
+    - sweep: 'gauss_seidel' (tại chỗ, theo lớp BFS từ đích, hội tụ sau vài lần quét)
+             hoặc 'jacobi' (đồng bộ, cần khoảng 32 lần quét)
+
+    Returns:
+    - utility_array: Mảng float32 (NUM_STATES,) giá trị theo rank
+    - policy_array: Mảng int8 (NUM_STATES,) chỉ số hành động trong MOVES (-1 tại đích)
+    - stats: Thống kê (gồm 'residuals': thay đổi lớn nhất của mỗi lần quét)
+    """
+    if sweep not in VALUE_ITERATION_SWEEPS:
+        raise ValueError(f"Unknown value iteration sweep '{sweep}'")
+    start_time = time.time()
+    successors, rewards, next_ranks = _planning_model()
+
+    run_sweeps = _gauss_seidel_sweeps if sweep == "gauss_seidel" else _jacobi_sweeps
+    utilities, residuals = run_sweeps(rewards, next_ranks, gamma, iterations, theta)
+    delta = residuals[-1] if residuals else float("inf")
+
+    policy = _greedy_policy(rewards, next_ranks, utilities, gamma)
+
+    stats = {
+        'sweep': sweep,
+        'iterations': len(residuals),
+        'converged': delta < theta,
+        'final_delta': delta,
+        'residuals': residuals,
+        'backups': len(residuals) * int((successors != NO_SUCCESSOR).sum()),
+        'states_explored': NUM_STATES,
+        'utilities': NUM_STATES,
+        'policy': NUM_STATES - 1,
+        'time': time.time() - start_time
+    }
+    return utilities.astype(np.float32), policy, stats
+
+def value_iteration(gamma=0.9, iterations=100, theta=0.01, sweep="gauss_seidel"):
+    """
+    Thuật toán Value Iteration cho 8-puzzle (xem value_iteration_arrays).
+
+    Parameters:
+    - gamma: Hệ số giảm (discount factor)
+    - iterations: Số lần quét tối đa
     - theta: Ngưỡng hội tụ
-    
+    - sweep: Thứ tự cập nhật ('gauss_seidel' hoặc 'jacobi')
+
     Returns:
-    - utilities: Bản đồ giá trị
-    - policy: Chính sách
+    - utilities: Bản đồ giá trị (khung nhìn kiểu dict {state_tuple: value})
+    - policy: Chính sách (khung nhìn kiểu dict {state_tuple: action})
     - stats: Thống kê
     """
-    # Khởi tạo utilities và policy
-    utilities = {}
-    policy = {}
-    
-    # Thêm trạng thái đích vào utilities
-    goal_state = [[1, 2, 3], [4, 5, 6], [7, 8, 0]]
-    goal_tuple = tuple(map(tuple, goal_state))
-    utilities[goal_tuple] = 100.0  # Giá trị cao cho trạng thái đích
-    
-    # Khởi tạo hàng đợi trạng thái cần khám phá
-    states_to_explore = collections.deque([goal_state])
-    explored_states = {goal_tuple}
-    
-    # Thêm các trạng thái đơn giản gần đích
-    print("Adding extra states for simple puzzles...")
-    simple_states_added = 0
-    for _ in range(50):  # Thêm một số trạng thái đơn giản
-        simple_puzzle = Buzzle(goal_state)
-        # Thực hiện một số bước ngẫu nhiên từ trạng thái đích
-        for _ in range(random.randint(1, 5)):
-            moves = simple_puzzle.get_valid_moves()
-            if not moves:
-                break
-            action = random.choice(moves)
-            success, new_state = create_new_state(simple_puzzle.data, action)
-            if success:
-                simple_puzzle = Buzzle(new_state)
-                
-        state_tuple = tuple(map(tuple, simple_puzzle.data))
-        if state_tuple not in explored_states:
-            explored_states.add(state_tuple)
-            states_to_explore.append(simple_puzzle.data)
-            # Khởi tạo giá trị dựa trên khoảng cách Manhattan
-            dist = manhattan_distance(simple_puzzle.data)
-            utilities[state_tuple] = max(0, 100 - 5 * dist)
-            simple_states_added += 1
-    
-    print(f"Added {simple_states_added} simple states near the goal")
-    
-    # Khám phá không gian trạng thái
-    while states_to_explore and len(explored_states) < max_states_to_explore:
-        current_state = states_to_explore.popleft()
-        current_puzzle = Buzzle(current_state)
-        
-        # Lấy các hành động hợp lệ
-        valid_moves = current_puzzle.get_valid_moves()
-        
-        for action in valid_moves:
-            success, next_state = create_new_state(current_state, action)
-            if not success:
-                continue
-                
-            next_tuple = tuple(map(tuple, next_state))
-            
-            # Nếu trạng thái mới chưa được khám phá
-            if next_tuple not in explored_states:
-                explored_states.add(next_tuple)
-                states_to_explore.append(next_state)
-                
-                # Khởi tạo giá trị dựa trên khoảng cách Manhattan
-                dist = manhattan_distance(next_state)
-                utilities[next_tuple] = max(0, 100 - 5 * dist)
-    
-    # Value Iteration
-    for i in range(iterations):
-        delta = 0
-        for state_tuple in list(utilities.keys()):
-            if state_tuple == goal_tuple:
-                continue
-                
-            state = [list(row) for row in state_tuple]
-            current_puzzle = Buzzle(state)
-            valid_moves = current_puzzle.get_valid_moves()
-            
-            if not valid_moves:
-                continue
-                
-            old_value = utilities[state_tuple]
-            action_values = []
-            
-            for action in valid_moves:
-                success, next_state = create_new_state(state, action)
-                if not success:
-                    continue
-                    
-                next_tuple = tuple(map(tuple, next_state))
-                
-                # Nếu trạng thái tiếp theo không có trong utilities, bỏ qua
-                if next_tuple not in utilities:
-                    continue
-                
-                # Tính phần thưởng
-                reward = 0
-                if next_tuple == goal_tuple:
-                    reward = 100
-                else:
-                    # Sử dụng heuristic để tính phần thưởng
-                    current_dist = manhattan_distance(state)
-                    next_dist = manhattan_distance(next_state)
-                    
-                    if next_dist < current_dist:
-                        reward = 1.0
-                    elif next_dist > current_dist:
-                        reward = -1.0
-                    else:
-                        reward = -0.1
-                
-                action_values.append((action, reward + gamma * utilities[next_tuple]))
-            
-            if action_values:
-                best_action, best_value = max(action_values, key=lambda x: x[1])
-                utilities[state_tuple] = best_value
-                policy[state_tuple] = best_action
-                
-                delta = max(delta, abs(old_value - best_value))
-        
-        # Kiểm tra hội tụ
-        if delta < theta:
+    utility_array, policy_array, stats = value_iteration_arrays(gamma=gamma, iterations=iterations,
+                                                                theta=theta, sweep=sweep)
+    utilities, policy = _planning_views(utility_array, policy_array)
+    return utilities, policy, stats
+
+def _evaluate_policy_linear(policy_rewards, policy_next, gamma):
+    """
+    Giải chính xác hệ tuyến tính (I - γ P_π) U = R_π của một chính sách xác định.
+    Mỗi hàng của P_π chỉ có một phần tử khác 0, nên hệ được giải bằng nhân đôi con trỏ:
+    sau k vòng, U(s) = acc(s) + discount(s) * U(pointer(s)) với pointer nhảy 2^k bước.
+    Trạng thái đích là vòng tự thân có U = GOAL_UTILITY.
+
+    Returns: (utilities, số vòng nhân đôi)
+    """
+    accumulated = policy_rewards.copy()
+    discount = np.full(NUM_STATES, gamma, dtype=np.float64)
+    pointer = policy_next.copy()
+    accumulated[GOAL_RANK] = GOAL_UTILITY * (1 - gamma)
+    pointer[GOAL_RANK] = GOAL_RANK
+    rounds = 0
+    # |U| <= max|R| / (1 - γ): dừng khi phần còn lại discount * U(pointer) không đáng kể
+    value_bound = np.abs(accumulated).max() / (1 - gamma)
+    while discount.max() * value_bound > 1e-9:
+        accumulated = accumulated + discount * accumulated[pointer]
+        discount = discount * discount[pointer]
+        pointer = pointer[pointer]
+        rounds += 1
+    return accumulated, rounds
+
+def policy_iteration_arrays(gamma=0.9, iterations=100, evaluation="linear", eval_sweeps=1000, theta=0.01):
+    """
+    Policy Iteration trên toàn bộ không gian trạng thái.
+
+    Parameters:
+    - gamma: Hệ số giảm (discount factor), phải < 1
+    - iterations: Số vòng cải thiện chính sách tối đa
+    - evaluation: 'linear' (giải chính xác hệ tuyến tính của chính sách) hoặc
+                  'sweeps' (lặp Bellman theo chính sách, khởi động từ giá trị của vòng trước)
+    - eval_sweeps: Số lần quét tối đa cho mỗi lần đánh giá kiểu 'sweeps'
+    - theta: Ngưỡng hội tụ của đánh giá kiểu 'sweeps'
+
+    Returns:
+    - utility_array, policy_array, stats (như value_iteration_arrays)
+    """
+    if evaluation not in ("linear", "sweeps"):
+        raise ValueError(f"Unknown policy evaluation method '{evaluation}'")
+    if not 0 <= gamma < 1:
+        raise ValueError("Policy iteration requires 0 <= gamma < 1")
+    start_time = time.time()
+    successors, rewards, next_ranks = _planning_model()
+    rows = np.arange(NUM_STATES)
+    valid_actions = int((successors != NO_SUCCESSOR).sum())
+
+    # Chính sách ban đầu: tham lam theo phần thưởng tức thời
+    policy = rewards.argmax(axis=1)
+    utilities = np.zeros(NUM_STATES, dtype=np.float64)
+    utilities[GOAL_RANK] = GOAL_UTILITY
+    evaluation_backups = 0
+    improvement_backups = 0
+    iterations_run = 0
+    stable = False
+    policy_changes = []
+
+    for _ in range(iterations):
+        # Đánh giá chính sách
+        policy_rewards = rewards[rows, policy]
+        policy_next = next_ranks[rows, policy]
+        if evaluation == "linear":
+            utilities, rounds = _evaluate_policy_linear(policy_rewards, policy_next, gamma)
+            evaluation_backups += rounds * NUM_STATES
+        else:
+            for _ in range(eval_sweeps):
+                new_utilities = policy_rewards + gamma * utilities[policy_next]
+                new_utilities[GOAL_RANK] = GOAL_UTILITY
+                delta = float(np.abs(new_utilities - utilities).max())
+                utilities = new_utilities
+                evaluation_backups += NUM_STATES - 1
+                if delta < theta:
+                    break
+
+        # Cải thiện chính sách; giữ hành động cũ khi nó vẫn tốt nhất (tránh dao động giữa các hành động ngang nhau)
+        q_values = rewards + gamma * utilities[next_ranks]
+        best = q_values.argmax(axis=1)
+        keep = q_values[rows, policy] >= q_values[rows, best]
+        new_policy = np.where(keep, policy, best)
+        improvement_backups += valid_actions
+        iterations_run += 1
+        changed = new_policy != policy
+        changed[GOAL_RANK] = False
+        policy_changes.append(int(changed.sum()))
+        policy = new_policy
+        if not changed.any():
+            stable = True
             break
-    
-    # Thống kê
+
+    policy_array = policy.astype(np.int8)
+    policy_array[GOAL_RANK] = NO_ACTION
     stats = {
-        'iterations': iterations,
-        'states_explored': len(explored_states),
-        'utilities': len(utilities),
-        'policy': len(policy)
+        'iterations': iterations_run,
+        'converged': stable,
+        'evaluation': evaluation,
+        'policy_changes': policy_changes,
+        'evaluation_backups': evaluation_backups,
+        'improvement_backups': improvement_backups,
+        'backups': evaluation_backups + improvement_backups,
+        'states_explored': NUM_STATES,
+        'utilities': NUM_STATES,
+        'policy': NUM_STATES - 1,
+        'time': time.time() - start_time
     }
-    
+    return utilities.astype(np.float32), policy_array, stats
+
+def policy_iteration(gamma=0.9, iterations=100, evaluation="linear", eval_sweeps=1000, theta=0.01):
+    """
+    Thuật toán Policy Iteration cho 8-puzzle (xem policy_iteration_arrays).
+
+    Returns:
+    - utilities, policy: Khung nhìn kiểu dict như value_iteration
+    - stats: Thống kê
+    """
+    utility_array, policy_array, stats = policy_iteration_arrays(
+        gamma=gamma, iterations=iterations, evaluation=evaluation, eval_sweeps=eval_sweeps, theta=theta
+    )
+    utilities, policy = _planning_views(utility_array, policy_array)
     return utilities, policy, stats
 
-def solve_with_value_iteration(puzzle, utilities, policy, max_steps=100):
+def prioritized_sweeping_arrays(gamma=0.9, theta=0.01, max_backups=None):
+    """
+    Prioritized Sweeping (bản quy hoạch với mô hình đã biết): thay vì quét toàn bộ không gian,
+    luôn cập nhật trạng thái có sai số Bellman lớn nhất trong hàng đợi ưu tiên. Sau mỗi lần
+    cập nhật, sai số của các trạng thái liền trước được tính lại. Nước đi của 8-puzzle có
+    thể đảo ngược nên các trạng thái liền trước chính là các trạng thái kế tiếp.
+
+    Parameters:
+    - gamma: Hệ số giảm (discount factor)
+    - theta: Chỉ đưa vào hàng đợi các trạng thái có sai số Bellman > theta
+    - max_backups: (Optional) Số lần cập nhật tối đa
+
+    Returns:
+    - utility_array, policy_array, stats (như value_iteration_arrays)
+    """
+    start_time = time.time()
+    successors, rewards, next_ranks = _planning_model()
+
+    utilities = np.zeros(NUM_STATES, dtype=np.float64)
+    utilities[GOAL_RANK] = GOAL_UTILITY
+    errors = np.abs((rewards + gamma * utilities[next_ranks]).max(axis=1) - utilities)
+    errors[GOAL_RANK] = 0.0
+
+    # Vòng lặp hàng đợi chạy trên list Python (truy cập từng phần tử nhanh hơn mảng NumPy)
+    values = utilities.tolist()
+    priority = errors.tolist()
+    successor_rows = next_ranks.tolist()
+    reward_rows = rewards.tolist()
+    heap = [(-error, rank) for rank, error in enumerate(priority) if error > theta]
+    heapq.heapify(heap)
+    max_queue = len(heap)
+
+    backups = 0
+    error_updates = 0
+    while heap:
+        if max_backups is not None and backups >= max_backups:
+            break
+        negative_priority, rank = heapq.heappop(heap)
+        if -negative_priority != priority[rank]:
+            continue # Phần tử cũ, đã có độ ưu tiên mới hơn
+        priority[rank] = 0.0
+        values[rank] = max(r + gamma * values[n] for r, n in zip(reward_rows[rank], successor_rows[rank]))
+        backups += 1
+
+        # Hành động không hợp lệ trỏ về đích, vốn không bao giờ cần cập nhật
+        for predecessor in successor_rows[rank]:
+            if predecessor == GOAL_RANK:
+                continue
+            error = abs(max(r + gamma * values[n] for r, n in zip(reward_rows[predecessor], successor_rows[predecessor]))
+                        - values[predecessor])
+            error_updates += 1
+            priority[predecessor] = error
+            if error > theta:
+                heapq.heappush(heap, (-error, predecessor))
+        max_queue = max(max_queue, len(heap))
+
+    utilities = np.array(values, dtype=np.float64)
+    policy_array = _greedy_policy(rewards, next_ranks, utilities, gamma)
+    stats = {
+        'converged': not heap,
+        'backups': backups,
+        'error_updates': error_updates,
+        'max_queue_size': max_queue,
+        'states_explored': NUM_STATES,
+        'utilities': NUM_STATES,
+        'policy': NUM_STATES - 1,
+        'time': time.time() - start_time
+    }
+    return utilities.astype(np.float32), policy_array, stats
+
+def prioritized_sweeping(gamma=0.9, theta=0.01, max_backups=None):
+    """
+    Thuật toán Prioritized Sweeping cho 8-puzzle (xem prioritized_sweeping_arrays).
+
+    Returns:
+    - utilities, policy: Khung nhìn kiểu dict như value_iteration
+    - stats: Thống kê
+    """
+    utility_array, policy_array, stats = prioritized_sweeping_arrays(gamma=gamma, theta=theta, max_backups=max_backups)
+    utilities, policy = _planning_views(utility_array, policy_array)
+    return utilities, policy, stats
+
+def compile_planning_policy(utilities, policy):
+    """
+    Chính sách biên dịch từ utilities và policy của mô hình quy hoạch: khung nhìn RankIndexedView
+    (mô hình nạp từ đĩa, dùng thẳng mảng) hoặc dict {state_tuple: ...} (mô hình cũ).
+    """
+    if isinstance(policy, RankIndexedView):
+        policy_array = policy.array
+    else:
+        policy_array = np.full(NUM_STATES, NO_ACTION, dtype=np.int8)
+        for state_tuple, action in policy.items():
+            policy_array[state_to_rank(state_tuple)] = MOVES.index(action)
+    if isinstance(utilities, RankIndexedView):
+        utility_array = utilities.array
+    else:
+        utility_array = np.full(NUM_STATES, np.nan, dtype=np.float32)
+        for state_tuple, value in utilities.items():
+            utility_array[state_to_rank(state_tuple)] = value
+    return CompiledPolicy.from_planning(policy_array, utility_array)
+
+def solve_with_value_iteration(puzzle, utilities, policy, max_steps=100, fallback=False, stats=None):
     """
     Giải puzzle sử dụng chính sách từ Value Iteration.
     
     Parameters:
     - puzzle: Trạng thái bắt đầu (Buzzle object)
     - utilities: Bản đồ giá trị từ value iteration
-    - policy: Chính sách từ value iteration
+    - policy: Chính sách từ value iteration, hoặc CompiledPolicy đã dựng sẵn (khi đó utilities không được dùng)
     - max_steps: Số bước tối đa cho phép
+    - fallback, stats: Như CompiledPolicy.solve
     
     Returns:
     - path: Đường đi giải pháp (list các tuple (action, state_data))
     - steps: Số bước đã thực hiện
     """
-    path = []
-    steps = 0
-    current_puzzle = puzzle
-    possible_moves = ["up", "down", "left", "right"]
-    
-    # Theo dõi trạng thái đã thăm và số lần thăm
-    visited_states = {}
-    # Theo dõi các hành động đã thử cho mỗi trạng thái
-    tried_actions = {}
-    
-    while steps < max_steps:
-        state_tuple = tuple(map(tuple, current_puzzle.data))
-        
-        # Kiểm tra đã đến đích chưa
-        if current_puzzle.is_goal():
-            break
-            
-        # Kiểm tra chu trình
-        if state_tuple in visited_states:
-            visited_states[state_tuple] += 1
-            
-            # Nếu đã thăm quá nhiều lần, tìm đường đi thay thế
-            if visited_states[state_tuple] > 2:
-                print(f"Phát hiện chu trình tại bước {steps}, tìm đường đi thay thế")
-                
-                # Lấy các hành động chưa thử cho trạng thái này
-                if state_tuple not in tried_actions:
-                    tried_actions[state_tuple] = set()
-                
-                # Lấy tất cả các hành động hợp lệ
-                valid_moves = current_puzzle.get_valid_moves()
-                
-                # Lọc ra các hành động chưa thử
-                untried_moves = [move for move in valid_moves if move not in tried_actions[state_tuple]]
-                
-                if untried_moves:
-                    # Chọn hành động chưa thử tốt nhất dựa trên heuristic
-                    best_move = None
-                    best_score = float('inf')
-                    
-                    for move in untried_moves:
-                        success, next_state = create_new_state(current_puzzle.data, move)
-                        if success:
-                            score = manhattan_distance(next_state)
-                            if score < best_score:
-                                best_score = score
-                                best_move = move
-                    
-                    if best_move:
-                        # Đánh dấu đã thử hành động này
-                        tried_actions[state_tuple].add(best_move)
-                        
-                        # Thực hiện hành động
-                        success, next_state = create_new_state(current_puzzle.data, best_move)
-                        if success:
-                            path.append((best_move, next_state))
-                            current_puzzle = Buzzle(next_state)
-                            steps += 1
-                            continue
-                
-                # Nếu không có hành động nào khả thi, quay lại một bước
-                if len(path) > 1:
-                    path.pop()  # Loại bỏ bước cuối cùng
-                    _, prev_state = path[-1]  # Lấy trạng thái trước đó
-                    current_puzzle = Buzzle(prev_state)
-                    continue
-        else:
-            visited_states[state_tuple] = 1
-            
-        # Sử dụng chính sách nếu có
-        if state_tuple in policy:
-            action = policy[state_tuple]
-        else:
-            # Nếu không có chính sách, sử dụng heuristic
-            valid_moves = current_puzzle.get_valid_moves()
-            if not valid_moves:
-                break
-                
-            # Chọn hành động tốt nhất dựa trên heuristic
-            best_move = None
-            best_score = float('inf')
-            
-            for move in valid_moves:
-                success, next_state = create_new_state(current_puzzle.data, move)
-                if success:
-                    score = manhattan_distance(next_state)
-                    if score < best_score:
-                        best_score = score
-                        best_move = move
-            
-            if best_move:
-                action = best_move
-            else:
-                # Không có hành động khả thi
-                break
-        
-        # Thực hiện hành động
-        success, next_state = create_new_state(current_puzzle.data, action)
-        if not success:
-            # Nếu không thành công, thử hành động khác
-            continue
-            
-        # Cập nhật đường đi và trạng thái
-        path.append((action, next_state))
-        current_puzzle = Buzzle(next_state)
-        steps += 1
-        
-        # Đánh dấu đã thử hành động này
-        if state_tuple not in tried_actions:
-            tried_actions[state_tuple] = set()
-        tried_actions[state_tuple].add(action)
-    
-    return path, steps 
\ No newline at end of file
+    if not isinstance(policy, CompiledPolicy):
+        policy = compile_planning_policy(utilities, policy)
+    path = policy.solve(puzzle, max_steps, fallback=fallback, stats=stats)
+    return path, len(path)
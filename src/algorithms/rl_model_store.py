@@ -0,0 +1,243 @@
+"""
+Định dạng lưu trữ mô hình RL có đánh phiên bản.
+
+Mỗi mô hình là một thư mục gồm:
+- header.json: định dạng, phiên bản, loại mô hình, tham số, thống kê và mô tả các mảng
+- <tên mảng>.npy: mảng NumPy đánh chỉ số theo rank trạng thái (src.core.state_index)
+
+Các file .npy được mở bằng np.load(mmap_mode='r'): nạp mất vài mili giây, không sao chép
+dữ liệu và các tiến trình worker dùng chung các trang bộ nhớ của hệ điều hành. Khác với
+pickle, file không phụ thuộc vào định nghĩa lớp Python (QLearningAgent...).
+"""
+import json
+import os
+import time
+from collections.abc import Mapping
+
+import numpy as np
+
+from src.core.buzzle_logic import MOVES
+from src.core.state_index import NUM_STATES, state_to_rank, rank_to_state
+
+MODEL_FORMAT = "buzzle-rl-model"
+MODEL_FORMAT_VERSION = 1
+HEADER_FILE = "header.json"
+STATE_INDEX = "blank * 20160 + lehmer(tiles) // 2"
+
+# Thư mục models/ ở gốc dự án, xác định theo vị trí package (không phụ thuộc thư mục làm việc)
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "models")
+
+class ModelFormatError(ValueError):
+    """File mô hình không tồn tại, sai định dạng hoặc sai phiên bản."""
+
+def _atomic_write(path, write_func):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        write_func(f)
+    os.replace(tmp_path, path)
+
+def save_model(model_dir, kind, arrays, params=None, stats=None):
+    """
+    Ghi một mô hình ra thư mục model_dir.
+
+    Parameters:
+    - model_dir: Thư mục đích (được tạo nếu chưa có)
+    - kind: Loại mô hình, ví dụ 'q_learning' hoặc 'value_iteration'
+    - arrays: dict tên -> np.ndarray (chiều đầu tiên đánh chỉ số theo rank trạng thái)
+    - params: (Optional) dict tham số huấn luyện (phải tuần tự hóa được thành JSON)
+    - stats: (Optional) dict thống kê huấn luyện (phải tuần tự hóa được thành JSON)
+
+    Returns:
+    - header: dict nội dung header.json đã ghi
+    """
+    os.makedirs(model_dir, exist_ok=True)
+    array_specs = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        file_name = f"{name}.npy"
+        _atomic_write(os.path.join(model_dir, file_name), lambda f: np.save(f, array))
+        array_specs[name] = {"file": file_name, "dtype": array.dtype.str, "shape": list(array.shape)}
+
+    header = {
+        "format": MODEL_FORMAT,
+        "version": MODEL_FORMAT_VERSION,
+        "kind": kind,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "num_states": NUM_STATES,
+        "state_index": STATE_INDEX,
+        "actions": list(MOVES),
+        "arrays": array_specs,
+        "params": params or {},
+        "stats": stats or {}
+    }
+    # Header được ghi sau cùng: một header hợp lệ luôn trỏ tới các mảng đã ghi xong
+    data = json.dumps(header, indent=2, ensure_ascii=False).encode("utf-8")
+    _atomic_write(os.path.join(model_dir, HEADER_FILE), lambda f: f.write(data))
+    return header
+
+def load_model(model_dir, kind=None, mmap=True):
+    """
+    Đọc một mô hình từ model_dir.
+
+    Parameters:
+    - model_dir: Thư mục mô hình
+    - kind: (Optional) Loại mô hình mong đợi; khác -> ModelFormatError
+    - mmap: Mở các mảng ở chế độ memory-map chỉ đọc (không sao chép)
+
+    Returns:
+    - header: dict nội dung header.json
+    - arrays: dict tên -> np.ndarray
+    """
+    header_path = os.path.join(model_dir, HEADER_FILE)
+    try:
+        with open(header_path, "r", encoding="utf-8") as f:
+            header = json.load(f)
+    except FileNotFoundError:
+        raise ModelFormatError(f"Model header {header_path} not found")
+    except ValueError as e:
+        raise ModelFormatError(f"Invalid model header {header_path}: {e}")
+
+    if header.get("format") != MODEL_FORMAT:
+        raise ModelFormatError(f"{header_path} is not a {MODEL_FORMAT} file")
+    if header.get("version") != MODEL_FORMAT_VERSION:
+        raise ModelFormatError(
+            f"Unsupported model version {header.get('version')} (expected {MODEL_FORMAT_VERSION})"
+        )
+    if kind is not None and header.get("kind") != kind:
+        raise ModelFormatError(f"Expected a '{kind}' model, found '{header.get('kind')}'")
+    if header.get("num_states") != NUM_STATES or header.get("actions") != list(MOVES):
+        raise ModelFormatError("Model was built for a different state index or action order")
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        array = np.load(os.path.join(model_dir, spec["file"]), mmap_mode="r" if mmap else None)
+        if list(array.shape) != spec["shape"] or array.dtype.str != spec["dtype"]:
+            raise ModelFormatError(f"Array '{name}' does not match the header")
+        arrays[name] = array
+    return header, arrays
+
+def model_exists(model_dir):
+    return os.path.exists(os.path.join(model_dir, HEADER_FILE))
+
+# --- Khung nhìn dạng dict trên mảng theo rank ---
+
+class RankIndexedView(Mapping):
+    """
+    Khung nhìn chỉ đọc kiểu dict {state_tuple: value} trên một mảng đánh chỉ số theo rank,
+    để code cũ dùng dict (ví dụ solve_with_value_iteration) chạy được với mảng memory-map.
+    Các phần tử bằng giá trị `missing` (hoặc NaN nếu missing là NaN) được coi là không có.
+    """
+
+    def __init__(self, array, missing, decode=None):
+        self.array = array
+        self.missing = missing
+        self.decode = decode
+
+    def _is_missing(self, value):
+        if isinstance(self.missing, float) and np.isnan(self.missing):
+            return np.isnan(value)
+        return value == self.missing
+
+    def _known_ranks(self):
+        if isinstance(self.missing, float) and np.isnan(self.missing):
+            return np.flatnonzero(~np.isnan(self.array))
+        return np.flatnonzero(self.array != self.missing)
+
+    def __getitem__(self, state):
+        try:
+            value = self.array[state_to_rank(state)]
+        except (ValueError, IndexError, TypeError):
+            raise KeyError(state)
+        if self._is_missing(value):
+            raise KeyError(state)
+        return self.decode(value) if self.decode else value.item()
+
+    def __iter__(self):
+        for rank in self._known_ranks():
+            yield tuple(map(tuple, rank_to_state(int(rank))))
+
+    def __len__(self):
+        return int(self._known_ranks().size)
+
+# --- Q-learning ---
+
+Q_LEARNING_PARAMS = ("alpha", "gamma", "epsilon", "alpha_decay", "epsilon_decay", "min_alpha", "min_epsilon")
+
+def q_table_to_array(q_table):
+    """
+    Bảng Q dạng mảng float32 (NUM_STATES, 4). Nhận mảng (QLearningAgent hiện tại) hoặc
+    dict {(state_tuple, action): q} của các agent cũ (pickle).
+    """
+    if isinstance(q_table, np.ndarray):
+        return np.asarray(q_table, dtype=np.float32)
+    q_values = np.zeros((NUM_STATES, len(MOVES)), dtype=np.float32)
+    for (state_tuple, action), value in q_table.items():
+        q_values[state_to_rank(state_tuple), MOVES.index(action)] = value
+    return q_values
+
+def save_q_learning_agent(agent, model_dir, stats=None):
+    """Lưu QLearningAgent (chỉ tham số và bảng Q, không lưu buffer hay tập trạng thái đã thăm)."""
+    params = {name: float(getattr(agent, name)) for name in Q_LEARNING_PARAMS}
+    return save_model(model_dir, "q_learning", {"q_values": q_table_to_array(agent.q_table)},
+                      params=params, stats=stats)
+
+def load_q_learning_agent(model_dir, mmap=True):
+    """
+    Dựng lại QLearningAgent từ model_dir. Bảng Q được dùng trực tiếp (memory-map chỉ đọc,
+    agent tự sao chép khi huấn luyện tiếp).
+    Returns: (agent, header)
+    """
+    from src.algorithms.rl_algorithms import QLearningAgent
+
+    header, arrays = load_model(model_dir, kind="q_learning", mmap=mmap)
+    params = {name: value for name, value in header["params"].items() if name in Q_LEARNING_PARAMS}
+    agent = QLearningAgent(**params)
+    q_values = arrays["q_values"]
+    if np.isnan(q_values).any():
+        # File cũ đánh dấu ô chưa học bằng NaN
+        q_values = np.nan_to_num(q_values, nan=0.0)
+    agent.q_table = q_values
+    return agent, header
+
+# --- Value iteration và các thuật toán quy hoạch động khác ---
+
+NO_ACTION = -1
+# Các loại mô hình cùng định dạng utilities + policy
+PLANNING_MODEL_KINDS = ("value_iteration", "policy_iteration", "prioritized_sweeping")
+
+def save_value_iteration_arrays(utility_array, policy_array, model_dir, stats=None, params=None,
+                                kind="value_iteration"):
+    """Lưu trực tiếp các mảng theo rank: utilities (float32, NaN = chưa có), policy (int8, -1 = chưa có)."""
+    if kind not in PLANNING_MODEL_KINDS:
+        raise ModelFormatError(f"'{kind}' is not a planning model kind")
+    arrays = {
+        "utilities": np.asarray(utility_array, dtype=np.float32),
+        "policy": np.asarray(policy_array, dtype=np.int8)
+    }
+    return save_model(model_dir, kind, arrays, params=params, stats=stats)
+
+def save_value_iteration_model(utilities, policy, model_dir, stats=None, params=None):
+    """Lưu utilities và policy dạng dict {state_tuple: ...} (xem save_value_iteration_arrays)."""
+    utility_array = np.full(NUM_STATES, np.nan, dtype=np.float32)
+    for state_tuple, value in utilities.items():
+        utility_array[state_to_rank(state_tuple)] = value
+    policy_array = np.full(NUM_STATES, NO_ACTION, dtype=np.int8)
+    for state_tuple, action in policy.items():
+        policy_array[state_to_rank(state_tuple)] = MOVES.index(action)
+    return save_value_iteration_arrays(utility_array, policy_array, model_dir, stats=stats, params=params)
+
+def load_value_iteration_model(model_dir, mmap=True, kind="value_iteration"):
+    """
+    Đọc mô hình value iteration (hoặc mô hình quy hoạch khác trong PLANNING_MODEL_KINDS).
+    Returns: dict gồm 'utilities' và 'policy' (khung nhìn kiểu dict theo state_tuple),
+    'utility_array', 'policy_array' (mảng theo rank), 'stats' và 'header'
+    """
+    header, arrays = load_model(model_dir, kind=kind, mmap=mmap)
+    return {
+        "utilities": RankIndexedView(arrays["utilities"], float("nan")),
+        "policy": RankIndexedView(arrays["policy"], NO_ACTION, decode=lambda value: MOVES[int(value)]),
+        "utility_array": arrays["utilities"],
+        "policy_array": arrays["policy"],
+        "stats": header["stats"],
+        "header": header
+    }
@@ -0,0 +1,245 @@
+"""
+Huấn luyện Q-learning song song trên nhiều tiến trình.
+
+Mỗi đợt (round), mọi worker:
+1. Sao chép bảng Q chung (shared memory) làm bảng Q cục bộ
+2. Huấn luyện bằng QLearningAgent.train_batched với hạt giống và phần trạng thái bắt đầu riêng
+3. Ghi bảng Q cục bộ và số lần cập nhật từng cặp (trạng thái, hành động) vào ô shared memory của mình
+
+Sau mỗi đợt, tiến trình chính trộn các bảng theo trung bình có trọng số là số lần cập nhật
+(cặp không worker nào cập nhật giữ nguyên giá trị cũ) và ghi lại vào bảng chung. Khi có tỷ lệ
+thành công mục tiêu, chính sách tham lam của bảng đã trộn được đánh giá sau mỗi đợt trên một tập
+trạng thái bắt đầu ngẫu nhiên cố định (và dừng sớm nếu đạt).
+"""
+import time
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from src.core.buzzle_logic import MOVES
+from src.core.state_index import NUM_STATES
+from src.core.state_space import successor_table, ranks_by_depth
+from src.algorithms.rl_algorithms import QLearningAgent, evaluation_start_ranks, greedy_success_rate
+
+TABLE_SHAPE = (NUM_STATES, len(MOVES))
+
+def _attach(name, shape, dtype):
+    """Mở một khối shared memory có sẵn dưới dạng mảng NumPy. Trả về (shm, array)."""
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def _worker_init():
+    """Dựng sẵn các bảng không gian trạng thái (đã có sẵn nếu tiến trình được fork từ tiến trình chính)."""
+    successor_table()
+    ranks_by_depth()
+
+def _train_round(task):
+    """Chạy trong tiến trình worker: huấn luyện một đợt và ghi kết quả vào ô của worker."""
+    worker = task["worker"]
+    slots_shape = (task["workers"],) + TABLE_SHAPE
+    global_shm, global_q = _attach(task["global_q"], TABLE_SHAPE, np.float32)
+    q_shm, worker_q = _attach(task["worker_q"], slots_shape, np.float32)
+    visits_shm, worker_visits = _attach(task["worker_visits"], slots_shape, np.int32)
+    try:
+        agent = QLearningAgent(**task["agent_params"])
+        agent.q_table = np.array(global_q)
+        worker_visits[worker] = 0
+        stats = agent.train_batched(
+            episodes=task["episodes"],
+            num_envs=task["num_envs"],
+            max_steps=task["max_steps"],
+            start_distribution=task["start_distribution"],
+            use_experience_replay=task["use_experience_replay"],
+            planning_steps=task["planning_steps"],
+            trace_lambda=task["trace_lambda"],
+            seed=task["seed"],
+            partition=(worker, task["workers"]),
+            visit_counts=worker_visits[worker],
+            episode_offset=task["episode_offset"],
+            total_episodes=task["total_episodes"]
+        )
+        worker_q[worker] = agent.q_table
+        return worker, agent.alpha, agent.epsilon, stats
+    finally:
+        # Các mảng phải được giải phóng trước khi đóng khối shared memory chứa chúng
+        del global_q, worker_q, worker_visits
+        for shm in (global_shm, q_shm, visits_shm):
+            shm.close()
+
+def merge_q_tables(global_q, worker_q, worker_visits):
+    """
+    Trộn các bảng Q của worker vào global_q (tại chỗ) theo trung bình có trọng số số lần cập nhật.
+    Trả về số cặp (trạng thái, hành động) đã thay đổi.
+    """
+    weights = worker_visits.astype(np.float32)
+    total = weights.sum(axis=0)
+    updated = total > 0
+    weighted = (weights * worker_q).sum(axis=0)
+    global_q[updated] = weighted[updated] / total[updated]
+    return int(updated.sum())
+
+def train_q_learning_parallel(agent_params, episodes=10000, workers=4, rounds=10, num_envs=256,
+                              max_steps=300, start_distribution="curriculum", use_experience_replay=False,
+                              planning_steps=0, trace_lambda=0.0, target_success_rate=None,
+                              stop_at_target=False, seed=0, report=print):
+    """
+    Huấn luyện Q-learning trên `workers` tiến trình, trộn bảng Q sau mỗi đợt.
+
+    Parameters:
+    - agent_params: dict tham số của QLearningAgent (alpha, gamma, epsilon, ...)
+    - episodes: Tổng số episode (chia đều cho các worker và các đợt)
+    - workers: Số tiến trình huấn luyện
+    - rounds: Số đợt trộn bảng Q
+    - num_envs, max_steps, start_distribution, use_experience_replay, planning_steps, trace_lambda:
+      Như QLearningAgent.train_batched (cho mỗi worker; bộ nhớ kinh nghiệm của worker được tạo lại mỗi đợt,
+      lấy mẫu theo độ ưu tiên nếu agent_params có prioritized_replay=True)
+    - target_success_rate: (Optional) Tỷ lệ thành công mục tiêu của chính sách tham lam theo bảng Q đã trộn,
+      đánh giá sau mỗi đợt trên evaluation_start_ranks() (greedy_success_rate); số episode/bước môi trường
+      tới hết đợt đầu tiên đạt được ghi vào 'episodes_to_target'/'env_steps_to_target'
+    - stop_at_target: Không chạy các đợt còn lại sau khi đạt target_success_rate
+    - seed: Hạt giống gốc; worker w ở đợt r dùng hạt giống riêng (seed, r, w)
+    - report: Hàm nhận một dòng tiến độ sau mỗi đợt (None -> không in)
+
+    Returns:
+    - agent: QLearningAgent mang bảng Q đã trộn
+    - stats: Thống kê tổng hợp từ mọi worker (cùng các khóa như train_batched, thêm 'workers', 'rounds'...)
+    """
+    start_time = time.time()
+    workers = max(1, int(workers))
+    rounds = max(1, min(int(rounds), episodes // workers or 1))
+    table_bytes = int(np.prod(TABLE_SHAPE)) * 4
+
+    blocks = [
+        shared_memory.SharedMemory(create=True, size=table_bytes),
+        shared_memory.SharedMemory(create=True, size=table_bytes * workers),
+        shared_memory.SharedMemory(create=True, size=table_bytes * workers)
+    ]
+    global_shm, q_shm, visits_shm = blocks
+    global_q = np.ndarray(TABLE_SHAPE, dtype=np.float32, buffer=global_shm.buf)
+    worker_q = np.ndarray((workers,) + TABLE_SHAPE, dtype=np.float32, buffer=q_shm.buf)
+    worker_visits = np.ndarray((workers,) + TABLE_SHAPE, dtype=np.int32, buffer=visits_shm.buf)
+    global_q[:] = 0.0
+
+    # alpha/epsilon của từng worker giảm dần theo số episode mà worker đó đã chạy
+    schedules = [(agent_params.get("alpha", 0.1), agent_params.get("epsilon", 0.1))] * workers
+    stats = {
+        'episodes': 0,
+        'episode_lengths': [],
+        'episode_rewards': [],
+        'steps_to_goal': [],
+        'alpha_history': [],
+        'epsilon_history': [],
+        'round_history': []
+    }
+    env_steps = 0
+    completed = 0
+    episodes_to_target = None
+    env_steps_to_target = None
+    eval_starts = evaluation_start_ranks() if target_success_rate is not None else None
+
+    try:
+        _worker_init() # Tiến trình con tạo bằng fork dùng lại các bảng này
+        with Pool(workers, initializer=_worker_init) as pool:
+            for round_index in range(rounds):
+                round_start = time.time()
+                tasks = []
+                for worker in range(workers):
+                    # Chia phần dư để tổng số episode đúng bằng `episodes`
+                    share = episodes * (round_index * workers + worker + 1) // (rounds * workers) \
+                        - episodes * (round_index * workers + worker) // (rounds * workers)
+                    alpha, epsilon = schedules[worker]
+                    tasks.append({
+                        "global_q": global_shm.name,
+                        "worker_q": q_shm.name,
+                        "worker_visits": visits_shm.name,
+                        "workers": workers,
+                        "worker": worker,
+                        "agent_params": dict(agent_params, alpha=alpha, epsilon=epsilon),
+                        "episodes": share,
+                        "num_envs": num_envs,
+                        "max_steps": max_steps,
+                        "start_distribution": start_distribution,
+                        "use_experience_replay": use_experience_replay,
+                        "planning_steps": planning_steps,
+                        "trace_lambda": trace_lambda,
+                        "seed": [seed, round_index, worker],
+                        "episode_offset": completed // workers,
+                        "total_episodes": max(episodes // workers, 1)
+                    })
+
+                round_steps = 0
+                round_success = 0
+                round_episodes = 0
+                for worker, alpha, epsilon, worker_stats in pool.imap_unordered(_train_round, tasks):
+                    schedules[worker] = (alpha, epsilon)
+                    for key in ('episode_lengths', 'episode_rewards', 'steps_to_goal',
+                                'alpha_history', 'epsilon_history'):
+                        stats[key].extend(worker_stats[key])
+                    round_steps += worker_stats['env_steps']
+                    round_success += len(worker_stats['steps_to_goal'])
+                    round_episodes += len(worker_stats['episode_lengths'])
+
+                merge_start = time.time()
+                changed = merge_q_tables(global_q, worker_q, worker_visits)
+                merge_time = time.time() - merge_start
+
+                env_steps += round_steps
+                completed += round_episodes
+                round_time = time.time() - round_start
+                round_stats = {
+                    'round': round_index + 1,
+                    'episodes': round_episodes,
+                    'success_rate': round_success / max(round_episodes, 1),
+                    'env_steps': round_steps,
+                    'steps_per_second': round_steps / round_time if round_time > 0 else 0.0,
+                    'merged_pairs': changed,
+                    'merge_time': merge_time,
+                    'time': round_time,
+                    'eval_success_rate': None
+                }
+                if eval_starts is not None:
+                    round_stats['eval_success_rate'] = greedy_success_rate(global_q, eval_starts, max_steps)
+                stats['round_history'].append(round_stats)
+                if report:
+                    evaluation = "" if eval_starts is None else f", greedy {round_stats['eval_success_rate']:.1%}"
+                    report(f"[round {round_index + 1}/{rounds}] {completed}/{episodes} episodes, "
+                           f"success {round_stats['success_rate']:.1%}{evaluation}, "
+                           f"{round_stats['steps_per_second']:.0f} steps/s, "
+                           f"merged {changed} pairs in {merge_time * 1000:.0f} ms")
+
+                if (episodes_to_target is None and target_success_rate is not None
+                        and round_stats['eval_success_rate'] >= target_success_rate):
+                    episodes_to_target = completed
+                    env_steps_to_target = env_steps
+                    if stop_at_target:
+                        break
+
+        agent = QLearningAgent(**agent_params)
+        agent.q_table = np.array(global_q)
+        agent.alpha = float(np.mean([alpha for alpha, _ in schedules]))
+        agent.epsilon = float(np.mean([epsilon for _, epsilon in schedules]))
+    finally:
+        del global_q, worker_q, worker_visits
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    elapsed = time.time() - start_time
+    stats['episodes'] = completed
+    stats['training_time'] = elapsed
+    stats['workers'] = workers
+    stats['rounds'] = rounds
+    stats['num_envs'] = num_envs
+    stats['start_distribution'] = start_distribution
+    stats['use_experience_replay'] = use_experience_replay
+    stats['planning_steps'] = planning_steps
+    stats['trace_lambda'] = trace_lambda
+    stats['episodes_to_target'] = episodes_to_target
+    stats['env_steps_to_target'] = env_steps_to_target
+    stats['env_steps'] = env_steps
+    stats['steps_per_second'] = env_steps / elapsed if elapsed > 0 else 0.0
+    stats['success_rate'] = len(stats['steps_to_goal']) / max(completed, 1)
+    stats['q_table_size'] = agent.learned_state_count()
+    stats['final_alpha'] = agent.alpha
+    stats['final_epsilon'] = agent.epsilon
+    return agent, stats
@@ -3,9 +3,48 @@ import heapq
 import random
 import math
 import sys # Import sys để điều chỉnh giới hạn đệ quy
+import time
+from array import array
 
 # Import các thành phần cần thiết từ buzzle_logic
-from src.core.buzzle_logic import Buzzle, create_new_state, manhattan_distance, is_solvable
+from src.core.buzzle_logic import (
+    Buzzle, create_new_state, get_successors, manhattan_distance, is_solvable,
+    goal_state_for_size, MOVES
+)
+from src.core.state_index import NUM_STATES, GOAL_RANK, state_to_rank, rank_to_flat
+from src.algorithms.local_search_algorithms import number_of_misplaced_tiles
+
+# Bảng các heuristic dùng chung cho các thuật toán có thông tin (key giống tên heuristic trên UI)
+HEURISTIC_FUNCTIONS = {
+    "manhattan": manhattan_distance,
+    "misplaced": number_of_misplaced_tiles
+}
+
+# Khoảng cách Manhattan của mỗi ô tại mỗi vị trí trên bảng 3x3: _MANHATTAN_TABLE[tile][pos]
+_MANHATTAN_TABLE = [[0] * 9] + [
+    [abs(pos // 3 - (tile - 1) // 3) + abs(pos % 3 - (tile - 1) % 3) for pos in range(9)]
+    for tile in range(1, 9)
+]
+# Số ô sai vị trí tương ứng: 1 nếu ô (khác ô trống) không nằm ở vị trí đích
+_MISPLACED_TABLE = [[0] * 9] + [[int(pos != tile - 1) for pos in range(9)] for tile in range(1, 9)]
+# Heuristic có thể cập nhật tăng dần theo từng ô (dùng cho IDA*)
+_TILE_COST_TABLES = {
+    manhattan_distance: _MANHATTAN_TABLE,
+    number_of_misplaced_tiles: _MISPLACED_TABLE
+}
+_DELTAS_3X3 = (-3, 3, -1, 1) # Theo thứ tự MOVES: up, down, left, right
+
+def _build_path(initial_data, moves):
+    """Tái tạo path of (move, new_state_data) từ danh sách nước đi. Trả về None nếu có nước đi không hợp lệ."""
+    final_path = []
+    temp_state = initial_data
+    for move in moves:
+        success, next_state = create_new_state(temp_state, move)
+        if not success:
+            return None
+        final_path.append((move, next_state))
+        temp_state = next_state
+    return final_path
 
 # --- Thuật toán tìm kiếm không thông tin ---
 
@@ -42,173 +81,166 @@ def bfs(initial_state):
                      return [], nodes_expanded, max_frontier_size
             return final_path, nodes_expanded, max_frontier_size
 
-        for move in ["up", "down", "left", "right"]:
-            success, new_data = create_new_state(current_data, move)
-            new_data_tuple = tuple(map(tuple, new_data)) if success else None
+        for move, new_data in get_successors(current_data):
+            new_data_tuple = tuple(map(tuple, new_data))
 
-            if success and new_data_tuple not in explored:
+            if new_data_tuple not in explored:
                 explored.add(new_data_tuple)
                 new_path = path + [move] # Chỉ lưu trữ các bước di chuyển
                 frontier.append((new_data, new_path))
 
     return [], nodes_expanded, max_frontier_size # Không tìm thấy lời giải
 
-def dfs(initial_state, max_depth=30):
-    """Depth First Search with depth limit"""
-    if not is_solvable(initial_state.data):
-        print("DFS: Trạng thái không giải được.")
-        return [], 0, 0
+def _depth_limited_in_place(flat, size, depth_limit, table, table_size, stamp):
+    """
+    Lõi DFS giới hạn độ sâu không cấp phát bộ nhớ cho mỗi nút.
+    Dùng một bảng phẳng duy nhất (flat, bị thay đổi tại chỗ và được khôi phục khi kết thúc)
+    cùng ngăn xếp nước đi apply/undo, bỏ qua nước đi ngược với nước vừa đi.
+    Khóa trạng thái là số nguyên cập nhật tăng dần: tổng tile * (size*size)^vị trí.
+
+    table: dict khóa -> (g_min << 8) | stamp, dùng chung giữa các lần gọi (bảng chuyển vị).
+        Cắt tỉa nút nếu g > g_min, hoặc g == g_min và đã thăm trong cùng lần lặp (stamp).
+        Không thêm khóa mới khi bảng đã có table_size phần tử.
+    Trả về: (found, moves, nodes_expanded, max_stack_depth)
+    """
+    n_cells = size * size
+    weights = [n_cells ** i for i in range(n_cells)]
+    deltas = (-size, size, -1, 1) # Theo thứ tự MOVES: up, down, left, right
+    inverse = (1, 0, 3, 2)
+    goal_flat = list(range(1, n_cells)) + [0]
+    goal_key = sum(tile * weight for tile, weight in zip(goal_flat, weights))
+
+    blank = flat.index(0)
+    key = sum(tile * weight for tile, weight in zip(flat, weights))
+    nodes_expanded = 1
+    if key == goal_key:
+        return True, [], nodes_expanded, 0
+    if key in table or len(table) < table_size:
+        table[key] = stamp # g = 0
+
+    next_move = [0] * (depth_limit + 1) # Nước đi kế tiếp cần thử tại mỗi độ sâu
+    applied = [0] * (depth_limit + 1) # Nước đi đã áp dụng tại mỗi độ sâu
+    depth = 0
+    max_stack_depth = 0
+
+    while depth >= 0:
+        m = next_move[depth]
+        if m == 4 or depth == depth_limit:
+            if depth == 0:
+                break
+            # Undo nước đi đưa tới độ sâu hiện tại
+            depth -= 1
+            previous = blank - deltas[applied[depth]]
+            tile = flat[previous]
+            flat[blank] = tile
+            flat[previous] = 0
+            key += tile * (weights[blank] - weights[previous])
+            blank = previous
+            continue
+        next_move[depth] = m + 1
 
-    frontier = [(initial_state.data, [], 0)]  # (state_data, path_of_moves, depth)
-    # Chuyển state_data thành tuple để hashable cho dict explored (lưu depth)
-    explored = {tuple(map(tuple, initial_state.data)): 0}
-    nodes_expanded = 0
-    max_frontier_size = 1
+        if depth > 0 and m == inverse[applied[depth - 1]]:
+            continue
+        if m == 0:
+            if blank < size:
+                continue
+        elif m == 1:
+            if blank >= n_cells - size:
+                continue
+        elif m == 2:
+            if blank % size == 0:
+                continue
+        elif blank % size == size - 1:
+            continue
 
-    while frontier:
-        max_frontier_size = max(max_frontier_size, len(frontier))
-        current_data, path, depth = frontier.pop()
+        # Apply
+        target = blank + deltas[m]
+        tile = flat[target]
+        flat[blank] = tile
+        flat[target] = 0
+        key += tile * (weights[blank] - weights[target])
+        blank = target
+        applied[depth] = m
+        depth += 1
         nodes_expanded += 1
 
-        current_buzzle = Buzzle(current_data)
-        if current_buzzle.is_goal():
-            # Tái tạo path of (move, new_state_data)
-            final_path = []
-            temp_state = initial_state.data
-            for move in path:
-                success, next_state = create_new_state(temp_state, move)
-                if success:
-                    final_path.append((move, next_state))
-                    temp_state = next_state
-                else:
-                    print("DFS Error: Invalid move in reconstructed path")
-                    return [], nodes_expanded, max_frontier_size
-            return final_path, nodes_expanded, max_frontier_size
-
-        if depth >= max_depth:
-            continue
-
-        # DFS thêm nút con theo thứ tự ngược để duyệt trái sang phải (nếu cần)
-        for move in reversed(["up", "down", "left", "right"]):
-            success, new_data = create_new_state(current_data, move)
-            new_data_tuple = tuple(map(tuple, new_data)) if success else None
-            new_depth = depth + 1
+        entry = table.get(key)
+        if entry is not None:
+            g_min = entry >> 8
+            if depth > g_min or (depth == g_min and (entry & 0xFF) == stamp):
+                next_move[depth] = 4 # Cắt tỉa: quay lui ở vòng lặp kế tiếp
+                continue
+        if entry is not None or len(table) < table_size:
+            table[key] = (depth << 8) | stamp
+
+        if key == goal_key:
+            moves = [MOVES[applied[d]] for d in range(depth)]
+            # Khôi phục bảng về trạng thái ban đầu
+            for d in range(depth - 1, -1, -1):
+                previous = blank - deltas[applied[d]]
+                flat[blank], flat[previous] = flat[previous], 0
+                blank = previous
+            return True, moves, nodes_expanded, max(max_stack_depth, depth)
+
+        next_move[depth] = 0
+        max_stack_depth = max(max_stack_depth, depth)
+
+    return False, [], nodes_expanded, max_stack_depth
+
+def dfs(initial_state, max_depth=30, table_size=1_000_000):
+    """
+    Depth First Search with depth limit.
+    Chạy tại chỗ trên một bảng duy nhất với ngăn xếp apply/undo; bảng chuyển vị giới hạn
+    table_size phần tử lưu độ sâu nhỏ nhất đã thấy của mỗi trạng thái.
+    Trả về: (path, nodes_expanded, max_stack_depth)
+    """
+    if not is_solvable(initial_state.data):
+        print("DFS: Trạng thái không giải được.")
+        return [], 0, 0
 
-            if success:
-                 # Chỉ thêm vào frontier nếu chưa khám phá hoặc tìm thấy đường đi ngắn hơn
-                 if new_data_tuple not in explored or new_depth < explored[new_data_tuple]:
-                      explored[new_data_tuple] = new_depth
-                      new_path = path + [move]
-                      frontier.append((new_data, new_path, new_depth))
+    flat = [tile for row in initial_state.data for tile in row]
+    found, moves, nodes_expanded, max_stack_depth = _depth_limited_in_place(
+        flat, len(initial_state.data), max_depth, {}, table_size, 0
+    )
+    if not found:
+        return [], nodes_expanded, max_stack_depth # Không tìm thấy
 
-    return [], nodes_expanded, max_frontier_size # Không tìm thấy
+    final_path = _build_path(initial_state.data, moves)
+    if final_path is None:
+        print("DFS Error: Invalid move in reconstructed path")
+        return [], nodes_expanded, max_stack_depth
+    return final_path, nodes_expanded, max_stack_depth
 
 def ucs(initial_state):
-    """Uniform Cost Search"""
+    """Uniform Cost Search (với 8-puzzle dùng bộ đệm theo rank, xem _rank_best_first)"""
     if not is_solvable(initial_state.data):
         print("UCS: Trạng thái không giải được.")
         return [], 0, 0
 
-    # (cost, tie_breaker, state_data, path_of_moves)
-    frontier = [(0, 0, initial_state.data, [])]
-    # explored lưu state_tuple -> cost
-    explored = {tuple(map(tuple, initial_state.data)): 0}
-    nodes_expanded = 0
-    max_frontier_size = 1
-    counter = 1  # tie breaker
-
-    while frontier:
-        max_frontier_size = max(max_frontier_size, len(frontier))
-        cost, _, current_data, path = heapq.heappop(frontier)
-        nodes_expanded += 1
-
-        current_data_tuple = tuple(map(tuple, current_data))
-        # Skip nếu đã có đường đi tốt hơn được tìm thấy trước đó
-        if cost > explored.get(current_data_tuple, float('inf')):
-            continue
+    if len(initial_state.data) != 3:
+        return weighted_astar(initial_state, w=0) # f = g
+    return _rank_best_first(initial_state, None, "UCS")
 
-        current_buzzle = Buzzle(current_data)
-        if current_buzzle.is_goal():
-            # Tái tạo path of (move, new_state_data)
-            final_path = []
-            temp_state = initial_state.data
-            for move in path:
-                success, next_state = create_new_state(temp_state, move)
-                if success:
-                    final_path.append((move, next_state))
-                    temp_state = next_state
-                else:
-                    print("UCS Error: Invalid move in reconstructed path")
-                    return [], nodes_expanded, max_frontier_size
-            return final_path, nodes_expanded, max_frontier_size
-
-        for move in ["up", "down", "left", "right"]:
-            success, new_data = create_new_state(current_data, move)
-            if success:
-                new_cost = cost + 1
-                new_data_tuple = tuple(map(tuple, new_data))
-
-                # Chỉ thêm vào frontier nếu chưa khám phá hoặc tìm thấy đường đi rẻ hơn
-                if new_data_tuple not in explored or new_cost < explored[new_data_tuple]:
-                    explored[new_data_tuple] = new_cost
-                    new_path = path + [move]
-                    heapq.heappush(frontier, (new_cost, counter, new_data, new_path))
-                    counter += 1
-
-    return [], nodes_expanded, max_frontier_size # Không tìm thấy
-
-def dfs_limited(initial_state_data, initial_path, depth_limit, explored_global):
+def dfs_limited(initial_state_data, initial_path, depth_limit, explored_global, table_size=1_000_000):
     """
     DFS với giới hạn độ sâu, dùng cho IDS.
-    Tránh explored cục bộ, sử dụng explored_global để chia sẻ giữa các lần lặp.
+    explored_global (dict, hoặc None) là bảng chuyển vị dùng chung giữa các lần lặp: lưu độ sâu
+    nhỏ nhất đã thấy của mỗi trạng thái, nên các nhánh tới trạng thái bằng đường dài hơn
+    bị cắt tỉa ở mọi lần lặp sau mà không cần xây lại bảng cục bộ.
     Trả về (found, path_of_moves, nodes_expanded_in_iter, max_frontier_in_iter)
     """
-    # (state_data, path_of_moves, depth)
-    frontier = [(initial_state_data, initial_path, 0)]
-    # explored cục bộ cho lần lặp này để tránh chu trình trong lần lặp
-    explored_local = {tuple(map(tuple, initial_state_data)): 0}
-
-    nodes_expanded = 0
-    max_frontier_size = 1
-
-    while frontier:
-        max_frontier_size = max(max_frontier_size, len(frontier))
-        current_data, path, depth = frontier.pop()
-        nodes_expanded += 1
-
-        current_buzzle = Buzzle(current_data)
-        if current_buzzle.is_goal():
-            return True, path, nodes_expanded, max_frontier_size
-
-        if depth >= depth_limit:
-            continue
-
-        # DFS thêm nút con theo thứ tự ngược
-        for move in reversed(["up", "down", "left", "right"]):
-            success, new_data = create_new_state(current_data, move)
-            if success:
-                new_depth = depth + 1
-                new_data_tuple = tuple(map(tuple, new_data))
-
-                # Kiểm tra explored cục bộ và global
-                # Chỉ thêm nếu chưa có trong explored cục bộ HOẶC tìm thấy đường ngắn hơn trong explored cục bộ
-                # Và cũng kiểm tra explored global (nếu có) để tối ưu
-                current_local_depth = explored_local.get(new_data_tuple, float('inf'))
-
-                if new_depth < current_local_depth:
-                     # Kiểm tra thêm explored_global nếu cần
-                     # current_global_depth = explored_global.get(new_data_tuple, float('inf'))
-                     # if new_depth < current_global_depth:
-                     #      explored_global[new_data_tuple] = new_depth # Cập nhật global
-
-                     explored_local[new_data_tuple] = new_depth
-                     new_path = path + [move]
-                     frontier.append((new_data, new_path, new_depth))
-
-
-    return False, [], nodes_expanded, max_frontier_size # Không tìm thấy trong giới hạn này
-
-def ids(initial_state):
+    if explored_global is None:
+        explored_global = {}
+    flat = [tile for row in initial_state_data for tile in row]
+    # depth_limit tăng dần trong IDS nên được dùng làm dấu của lần lặp
+    found, moves, nodes_expanded, max_stack_depth = _depth_limited_in_place(
+        flat, len(initial_state_data), depth_limit, explored_global, table_size, depth_limit & 0xFF
+    )
+    if found:
+        return True, initial_path + moves, nodes_expanded, max_stack_depth
+    return False, [], nodes_expanded, max_stack_depth # Không tìm thấy trong giới hạn này
+
+def ids(initial_state, table_size=1_000_000):
     """Iterative Deepening Search"""
     if not is_solvable(initial_state.data):
         print("IDS: Trạng thái không giải được.")
@@ -216,97 +248,118 @@ def ids(initial_state):
 
     total_nodes = 0
     max_fringe_overall = 0
-    explored_global = {} # Có thể dùng để lưu độ sâu tốt nhất đã thấy
+    explored_global = {} # Độ sâu tốt nhất đã thấy của mỗi trạng thái, dùng chung giữa các lần lặp
 
     for depth in range(50):  # Giới hạn độ sâu tối đa = 50
-        # explored_global được truyền vào để có thể tối ưu giữa các lần lặp (tùy chọn)
         found, path_moves, nodes_iter, fringe_iter = dfs_limited(
-            initial_state.data, [], depth, explored_global
+            initial_state.data, [], depth, explored_global, table_size
         )
         total_nodes += nodes_iter
         max_fringe_overall = max(max_fringe_overall, fringe_iter)
 
         if found:
-             # Tái tạo path of (move, new_state_data)
-            final_path = []
-            temp_state = initial_state.data
-            for move in path_moves:
-                success, next_state = create_new_state(temp_state, move)
-                if success:
-                    final_path.append((move, next_state))
-                    temp_state = next_state
-                else:
-                    print("IDS Error: Invalid move in reconstructed path")
-                    return [], total_nodes, max_fringe_overall
+            final_path = _build_path(initial_state.data, path_moves)
+            if final_path is None:
+                print("IDS Error: Invalid move in reconstructed path")
+                return [], total_nodes, max_fringe_overall
             return final_path, total_nodes, max_fringe_overall
 
     return [], total_nodes, max_fringe_overall # Không tìm thấy trong giới hạn
 
 # --- Thuật toán tìm kiếm có thông tin ---
 
-def astar(initial_state):
-    """A* Search với Manhattan distance"""
-    if not is_solvable(initial_state.data):
-        print("A*: Trạng thái không giải được.")
-        return [], 0, 0
-
-    # (f_score, tie_breaker, g_score, state_data, path_of_moves)
-    frontier = [(manhattan_distance(initial_state), 0, 0, initial_state.data, [])]
-    # explored lưu state_tuple -> g_score
-    explored = {tuple(map(tuple, initial_state.data)): 0}
+def _rank_best_first(initial_state, heuristic_func, name):
+    """
+    A* (hoặc UCS khi heuristic_func là None) cho 8-puzzle với bộ đệm cấp phát trước.
+    g-value, rank cha, nước đi và h của mỗi trạng thái nằm trong các mảng `array`
+    đánh chỉ số theo rank (khoảng 8 byte mỗi trạng thái); hàng đợi ưu tiên chỉ chứa số nguyên
+    (f << 48 | tie_breaker << 18 | rank), không cần băm tuple trong vòng lặp chính.
+    Trả về: (path, nodes_expanded, max_frontier_size)
+    """
+    g_values = array('h', [-1]) * NUM_STATES
+    parents = array('i', [-1]) * NUM_STATES
+    parent_moves = array('b', [-1]) * NUM_STATES
+    h_values = array('b', [0]) * NUM_STATES
+
+    def heuristic(flat):
+        if heuristic_func is None:
+            return 0
+        if heuristic_func is manhattan_distance:
+            return sum(_MANHATTAN_TABLE[tile][pos] for pos, tile in enumerate(flat))
+        return heuristic_func(Buzzle([flat[0:3], flat[3:6], flat[6:9]]))
+
+    start_flat = [tile for row in initial_state.data for tile in row]
+    start_rank = state_to_rank(start_flat)
+    g_values[start_rank] = 0
+    h_values[start_rank] = heuristic(start_flat)
+    frontier = [(h_values[start_rank] << 48) | start_rank]
     nodes_expanded = 0
     max_frontier_size = 1
     counter = 1 # tie breaker
 
     while frontier:
         max_frontier_size = max(max_frontier_size, len(frontier))
-        _, _, g_score, current_data, path = heapq.heappop(frontier)
-        nodes_expanded += 1
-
-        current_data_tuple = tuple(map(tuple, current_data))
-
-        # Nếu đã tìm thấy đường đi tốt hơn tới current_data (do cập nhật trong heap)
-        if g_score > explored.get(current_data_tuple, float('inf')):
+        key = heapq.heappop(frontier)
+        rank = key & 0x3FFFF
+        g_score = g_values[rank]
+        nodes_expanded += 1 # Đếm cả mục lỗi thời, như cách đếm ban đầu
+        # Bỏ qua mục lỗi thời (đã tìm thấy đường đi tốt hơn tới trạng thái này)
+        if (key >> 48) - h_values[rank] > g_score:
             continue
 
-        current_buzzle = Buzzle(current_data)
-        if current_buzzle.is_goal():
-            # Tái tạo path of (move, new_state_data)
-            final_path = []
-            temp_state = initial_state.data
-            for move in path:
-                success, next_state = create_new_state(temp_state, move)
-                if success:
-                    final_path.append((move, next_state))
-                    temp_state = next_state
-                else:
-                    print("A* Error: Invalid move in reconstructed path")
-                    return [], nodes_expanded, max_frontier_size
+        if rank == GOAL_RANK:
+            moves = []
+            while rank != start_rank:
+                moves.append(MOVES[parent_moves[rank]])
+                rank = parents[rank]
+            moves.reverse()
+            final_path = _build_path(initial_state.data, moves)
+            if final_path is None:
+                print(f"{name} Error: Invalid move in reconstructed path")
+                return [], nodes_expanded, max_frontier_size
             return final_path, nodes_expanded, max_frontier_size
 
-        for move in ["up", "down", "left", "right"]:
-            success, new_data = create_new_state(current_data, move)
-            if success:
-                new_g_score = g_score + 1
-                new_data_tuple = tuple(map(tuple, new_data))
-
-                if new_g_score < explored.get(new_data_tuple, float('inf')):
-                    explored[new_data_tuple] = new_g_score
-                    f_score = new_g_score + manhattan_distance(Buzzle(new_data))
-                    new_path = path + [move]
-                    heapq.heappush(frontier, (f_score, counter, new_g_score, new_data, new_path))
-                    counter += 1
+        flat = rank_to_flat(rank)
+        blank = flat.index(0)
+        new_g_score = g_score + 1
+        for m in range(4):
+            if (m == 0 and blank < 3) or (m == 1 and blank >= 6) \
+                    or (m == 2 and blank % 3 == 0) or (m == 3 and blank % 3 == 2):
+                continue
+            target = blank + _DELTAS_3X3[m]
+            flat[blank], flat[target] = flat[target], 0
+            child = state_to_rank(flat)
+            child_g = g_values[child]
+            if child_g == -1 or new_g_score < child_g:
+                if child_g == -1:
+                    h_values[child] = heuristic(flat)
+                g_values[child] = new_g_score
+                parents[child] = rank
+                parent_moves[child] = m
+                heapq.heappush(frontier, ((new_g_score + h_values[child]) << 48) | (counter << 18) | child)
+                counter += 1
+            flat[target], flat[blank] = flat[blank], 0
 
     return [], nodes_expanded, max_frontier_size # Không tìm thấy
 
-def greedy(initial_state):
-    """Greedy Best-First Search với Manhattan distance"""
+def astar(initial_state, heuristic_func=manhattan_distance):
+    """A* Search (mặc định với Manhattan distance; với 8-puzzle dùng bộ đệm theo rank)"""
+    if not is_solvable(initial_state.data):
+        print("A*: Trạng thái không giải được.")
+        return [], 0, 0
+
+    if len(initial_state.data) != 3:
+        return weighted_astar(initial_state, w=1, heuristic_func=heuristic_func)
+    return _rank_best_first(initial_state, heuristic_func, "A*")
+
+def greedy(initial_state, heuristic_func=manhattan_distance):
+    """Greedy Best-First Search (mặc định với Manhattan distance)"""
     if not is_solvable(initial_state.data):
         print("Greedy: Trạng thái không giải được.")
         return [], 0, 0
 
     # (h_score, tie_breaker, state_data, path_of_moves)
-    frontier = [(manhattan_distance(initial_state), 0, initial_state.data, [])]
+    frontier = [(heuristic_func(initial_state), 0, initial_state.data, [])]
     # explored lưu chỉ state_tuple để tránh chu trình, không cần cost
     explored = {tuple(map(tuple, initial_state.data))}
     nodes_expanded = 0
@@ -339,95 +392,704 @@ def greedy(initial_state):
                 new_data_tuple = tuple(map(tuple, new_data))
                 if new_data_tuple not in explored:
                     explored.add(new_data_tuple)
-                    h_score = manhattan_distance(Buzzle(new_data))
+                    h_score = heuristic_func(Buzzle(new_data))
                     new_path = path + [move]
                     heapq.heappush(frontier, (h_score, counter, new_data, new_path))
                     counter += 1
 
     return [], nodes_expanded, max_frontier_size # Không tìm thấy
 
-# Helper for IDA*
-def _ida_search(current_data_tuple, g, bound, path_moves, visited_in_path):
+def weighted_astar(initial_state, w=2.0, heuristic_func=manhattan_distance):
     """
-    Hàm đệ quy cho IDA*.
-    current_data_tuple: Trạng thái hiện tại (dưới dạng tuple).
-    g: Chi phí từ trạng thái đầu đến trạng thái hiện tại.
-    bound: Ngưỡng f-cost hiện tại.
-    path_moves: Danh sách các nước đi từ trạng thái đầu đến hiện tại.
-    visited_in_path: Set các trạng thái (tuple) trong đường đi hiện tại để tránh chu trình.
-    Trả về: (found, min_f_cost_exceeding_bound, path_moves_if_found, nodes_expanded_in_this_path)
+    Weighted A*: f = g + w * h.
+    Với w > 1, tìm kiếm nhanh hơn nhiều và độ dài lời giải không vượt quá w lần tối ưu
+    (với heuristic admissible). w = 1 tương đương A*.
     """
-    current_buzzle = Buzzle(list(map(list, current_data_tuple))) # Chuyển tuple về list để tạo Buzzle
-    h = manhattan_distance(current_buzzle)
-    f = g + h
+    if not is_solvable(initial_state.data):
+        print("Weighted A*: Trạng thái không giải được.")
+        return [], 0, 0
 
-    nodes_expanded_here = 1 # Nút hiện tại được "mở rộng" (đánh giá)
+    # (f_score, tie_breaker, g_score, state_data, path_of_moves)
+    frontier = [(w * heuristic_func(initial_state), 0, 0, initial_state.data, [])]
+    explored = {tuple(map(tuple, initial_state.data)): 0}
+    nodes_expanded = 0
+    max_frontier_size = 1
+    counter = 1 # tie breaker
 
-    if f > bound:
-        return False, f, [], nodes_expanded_here # Trả về f mới để cập nhật bound
+    while frontier:
+        max_frontier_size = max(max_frontier_size, len(frontier))
+        _, _, g_score, current_data, path = heapq.heappop(frontier)
+        nodes_expanded += 1
 
-    if current_buzzle.is_goal():
-        return True, f, path_moves, nodes_expanded_here
+        if g_score > explored.get(tuple(map(tuple, current_data)), float('inf')):
+            continue
 
-    min_f_exceeding = float('inf')
+        if Buzzle(current_data).is_goal():
+            final_path = _build_path(initial_state.data, path)
+            if final_path is None:
+                print("Weighted A* Error: Invalid move in reconstructed path")
+                return [], nodes_expanded, max_frontier_size
+            return final_path, nodes_expanded, max_frontier_size
 
-    # Duyệt các nước đi theo một thứ tự nhất định (ví dụ: U, D, L, R)
-    # Có thể thử các thứ tự khác nhau để xem ảnh hưởng
-    for move in ["up", "down", "left", "right"]:
-        success, new_data = create_new_state(list(map(list,current_data_tuple)), move)
-        if success:
+        for move, new_data in get_successors(current_data):
+            new_g_score = g_score + 1
             new_data_tuple = tuple(map(tuple, new_data))
-            if new_data_tuple not in visited_in_path:
-                visited_in_path.add(new_data_tuple)
-                new_path_moves = path_moves + [move]
-                found, new_bound_candidate, result_path, nodes_child = _ida_search(
-                    new_data_tuple, g + 1, bound, new_path_moves, visited_in_path
-                )
-                nodes_expanded_here += nodes_child
-                if found:
-                    return True, new_bound_candidate, result_path, nodes_expanded_here
-                min_f_exceeding = min(min_f_exceeding, new_bound_candidate)
-                visited_in_path.remove(new_data_tuple) # Backtrack
-
-    return False, min_f_exceeding, [], nodes_expanded_here
-
-def idastar(initial_state):
-    """Iterative Deepening A* Search"""
+            if new_g_score < explored.get(new_data_tuple, float('inf')):
+                explored[new_data_tuple] = new_g_score
+                f_score = new_g_score + w * heuristic_func(Buzzle(new_data))
+                heapq.heappush(frontier, (f_score, counter, new_g_score, new_data, path + [move]))
+                counter += 1
+
+    return [], nodes_expanded, max_frontier_size # Không tìm thấy
+
+def arastar(initial_state, w_start=2.5, w_step=0.5, time_limit=None,
+            heuristic_func=manhattan_distance, on_improvement=None, stop_event=None):
+    """
+    Anytime Repairing A* (ARA*).
+    Trả về nhanh một lời giải có cận dưới tối ưu w_start, sau đó giảm dần w và
+    sửa chữa tìm kiếm (tái sử dụng g-value, chỉ mở lại các trạng thái không nhất quán)
+    để cải thiện lời giải cho đến khi hết thời gian hoặc đạt tối ưu (w = 1).
+
+    Parameters:
+    - w_start: Trọng số ban đầu cho heuristic
+    - w_step: Lượng giảm w sau mỗi lần cải thiện
+    - time_limit: (Optional) Thời gian tối đa (giây). Lần tìm kiếm đầu tiên luôn chạy
+      đến khi có lời giải; hết thời gian sẽ dừng các lần cải thiện tiếp theo.
+    - on_improvement: (Optional) callback(path, w_bound) được gọi với mỗi lời giải tốt hơn,
+      w_bound là cận trên của tỉ lệ (độ dài lời giải / độ dài tối ưu).
+    - stop_event: (Optional) threading.Event; khi được set, dừng như khi hết thời gian.
+    Trả về: (best_path, nodes_expanded, max_frontier_size)
+    """
     if not is_solvable(initial_state.data):
-        print("IDA*: Trạng thái không giải được.")
+        print("ARA*: Trạng thái không giải được.")
         return [], 0, 0
 
-    bound = manhattan_distance(initial_state)
-    initial_data_tuple = tuple(map(tuple, initial_state.data))
-    total_nodes_expanded = 0
+    deadline = time.time() + time_limit if time_limit is not None else None
+
+    def should_stop():
+        return ((deadline is not None and time.time() > deadline)
+                or (stop_event is not None and stop_event.is_set()))
 
+    start_tuple = tuple(map(tuple, initial_state.data))
+    goal_tuple = tuple(map(tuple, goal_state_for_size(len(initial_state.data))))
+
+    h_cache = {}
+    def h(state_tuple):
+        if state_tuple not in h_cache:
+            h_cache[state_tuple] = heuristic_func(Buzzle(state_tuple))
+        return h_cache[state_tuple]
+
+    g = {start_tuple: 0}
+    parent = {start_tuple: None} # state_tuple -> (parent_tuple, move)
+    open_keys = {} # state_tuple -> f hiện tại trong OPEN
+    frontier = []
+    closed = set()
+    incons = set()
+    nodes_expanded = 0
+    max_frontier_size = 1
+    counter = 0
+    w = w_start
+    best_path = []
+
+    def push(state_tuple):
+        nonlocal counter
+        key = g[state_tuple] + w * h(state_tuple)
+        open_keys[state_tuple] = key
+        heapq.heappush(frontier, (key, counter, state_tuple))
+        counter += 1
+
+    def improve_path():
+        """Mở rộng cho đến khi g(goal) <= min f trong OPEN. Trả về False nếu bị dừng do hết thời gian."""
+        nonlocal nodes_expanded, max_frontier_size
+        while frontier:
+            key, _, state_tuple = frontier[0]
+            if open_keys.get(state_tuple) != key: # Mục đã lỗi thời
+                heapq.heappop(frontier)
+                continue
+            if g.get(goal_tuple, float('inf')) <= key:
+                return True
+            if best_path and should_stop():
+                return False
+            heapq.heappop(frontier)
+            del open_keys[state_tuple]
+            closed.add(state_tuple)
+            nodes_expanded += 1
+
+            new_g = g[state_tuple] + 1
+            for move, new_data in get_successors([list(row) for row in state_tuple]):
+                new_tuple = tuple(map(tuple, new_data))
+                if new_g < g.get(new_tuple, float('inf')):
+                    g[new_tuple] = new_g
+                    parent[new_tuple] = (state_tuple, move)
+                    if new_tuple in closed:
+                        incons.add(new_tuple)
+                    else:
+                        push(new_tuple)
+            max_frontier_size = max(max_frontier_size, len(open_keys))
+        return True
+
+    def extract_moves():
+        moves = []
+        state_tuple = goal_tuple
+        while parent[state_tuple] is not None:
+            state_tuple, move = parent[state_tuple]
+            moves.append(move)
+        moves.reverse()
+        return moves
+
+    def suboptimality_bound():
+        candidates = [g[s] + h(s) for s in open_keys] + [g[s] + h(s) for s in incons]
+        if not candidates:
+            return 1.0
+        return max(1.0, min(w, g[goal_tuple] / max(min(candidates), 1)))
+
+    push(start_tuple)
     while True:
-        # Bắt đầu tìm kiếm với bound hiện tại
-        # visited_in_path để tránh chu trình trong một lần lặp của _ida_search
-        found, new_bound, path_moves, nodes_iter = _ida_search(
-            initial_data_tuple, 0, bound, [], {initial_data_tuple}
-        )
-        total_nodes_expanded += nodes_iter
+        completed = improve_path()
+        if goal_tuple not in g:
+            return [], nodes_expanded, max_frontier_size # Không tìm thấy
+
+        moves = extract_moves()
+        if not best_path or len(moves) < len(best_path):
+            best_path = _build_path(initial_state.data, moves) or []
+            if on_improvement:
+                on_improvement(best_path, suboptimality_bound() if completed else w)
+
+        w_bound = suboptimality_bound() if completed else w
+        if not completed or w_bound <= 1.0 or w <= 1.0:
+            break
+        if should_stop():
+            break
+
+        # Giảm w, chuyển INCONS vào OPEN và tính lại khóa, làm rỗng CLOSED
+        w = max(1.0, w - w_step)
+        states = list(open_keys) + list(incons)
+        open_keys.clear()
+        frontier.clear()
+        incons.clear()
+        closed.clear()
+        for state_tuple in states:
+            push(state_tuple)
+
+    return best_path, nodes_expanded, max_frontier_size
+
+def beam_search(initial_state, beam_width=100, heuristic_func=manhattan_distance, max_depth=1000):
+    """
+    Beam Search: duyệt theo từng độ sâu, chỉ giữ lại beam_width trạng thái có h nhỏ nhất.
+    Bộ nhớ và thời gian O(beam_width x depth), phù hợp cho bảng lớn (15-, 24-puzzle)
+    nơi A* hết bộ nhớ. Không đảm bảo tối ưu hay đầy đủ; trả về lời giải đầu tiên tìm thấy.
+    Mỗi độ sâu có bộ lọc trùng riêng (kèm lớp trước đó để tránh quay lui).
+    Trả về: (path, nodes_expanded, max_beam_size)
+    """
+    if not is_solvable(initial_state.data):
+        print("Beam Search: Trạng thái không giải được.")
+        return [], 0, 0
 
-        if found:
-            # Tái tạo path (move, state_data) từ path_moves
-            final_path = []
-            temp_state = initial_state.data
-            for move in path_moves:
-                success, next_state = create_new_state(temp_state, move)
-                if success:
-                    final_path.append((move, next_state))
-                    temp_state = next_state
-                else:
-                    print("IDA* Error: Invalid move in reconstructed path")
-                    # Should not happen if _ida_search is correct
-                    return [], total_nodes_expanded, 0 # max_frontier is not tracked here
-            return final_path, total_nodes_expanded, 0 # max_frontier is not tracked by IDA*
+    if initial_state.is_goal():
+        return [], 1, 1
+
+    # Mỗi phần tử của beam: (state_data, moves_link); moves_link là danh sách liên kết
+    # (move, parent_link) để các đường đi dùng chung tiền tố.
+    beam = [(initial_state.data, None)]
+    previous_layer = set()
+    nodes_expanded = 0
+    max_beam_size = 1
+    counter = 0 # tie breaker
+
+    def unwind(link):
+        moves = []
+        while link is not None:
+            move, link = link
+            moves.append(move)
+        moves.reverse()
+        return moves
+
+    for _ in range(max_depth):
+        current_layer = {tuple(map(tuple, data)) for data, _ in beam}
+        candidates = []
+        seen = set() # Bộ lọc trùng cho độ sâu kế tiếp
+
+        for current_data, link in beam:
+            nodes_expanded += 1
+            for move, new_data in get_successors(current_data):
+                new_data_tuple = tuple(map(tuple, new_data))
+                if new_data_tuple in seen or new_data_tuple in current_layer or new_data_tuple in previous_layer:
+                    continue
+                seen.add(new_data_tuple)
+                new_buzzle = Buzzle(new_data)
+                if new_buzzle.is_goal():
+                    final_path = _build_path(initial_state.data, unwind((move, link)))
+                    if final_path is None:
+                        print("Beam Search Error: Invalid move in reconstructed path")
+                        return [], nodes_expanded, max_beam_size
+                    return final_path, nodes_expanded, max_beam_size
+                candidates.append((heuristic_func(new_buzzle), counter, new_data, (move, link)))
+                counter += 1
+
+        if not candidates:
+            break
+        beam = [(data, link) for _, _, data, link in heapq.nsmallest(beam_width, candidates)]
+        max_beam_size = max(max_beam_size, len(beam))
+        previous_layer = current_layer
+
+    return [], nodes_expanded, max_beam_size # Không tìm thấy
+
+# Nước đi ngược (di chuyển ô trống theo chiều ngược lại)
+INVERSE_MOVES = {"up": "down", "down": "up", "left": "right", "right": "left"}
+
+def bidirectional_mm(initial_state, heuristic_func=manhattan_distance, stats=None):
+    """
+    Tìm kiếm heuristic hai chiều MM ("Meet in the Middle", Holte và cộng sự, 2016).
+    Tìm kiếm xuôi từ trạng thái đầu và ngược từ trạng thái đích; mỗi chiều dùng độ ưu tiên
+    pr(n) = max(g + h, 2g), với heuristic chiều ngược ước lượng khoảng cách tới trạng thái đầu.
+    Dừng khi chi phí lời giải tốt nhất U <= max(C, fminF, fminB, gminF + gminB + 1),
+    đảm bảo lời giải tối ưu với heuristic admissible.
+
+    stats: (Optional) dict được điền thêm 'forward_expansions', 'backward_expansions'
+           và 'meeting_state'.
+    Trả về: (path, nodes_expanded, max_frontier_size)
+    """
+    if not is_solvable(initial_state.data):
+        print("MM: Trạng thái không giải được.")
+        return [], 0, 0
+
+    start_data = initial_state.data
+    start_tuple = tuple(map(tuple, start_data))
+    goal_tuple = tuple(map(tuple, goal_state_for_size(len(start_data))))
+    if start_tuple == goal_tuple:
+        return [], 1, 1
+
+    # Chỉ số 0: chiều xuôi (tới đích chuẩn), 1: chiều ngược (tới trạng thái đầu)
+    h_funcs = (
+        lambda state_tuple: heuristic_func(Buzzle(state_tuple)),
+        lambda state_tuple: heuristic_func(Buzzle(state_tuple), goal_state=start_data)
+    )
+    roots = (start_tuple, goal_tuple)
+    g = ({start_tuple: 0}, {goal_tuple: 0})
+    parent = ({start_tuple: None}, {goal_tuple: None}) # state -> (state_trước, move)
+    open_g = ({}, {}) # state -> g của các nút đang mở (nút đã đóng được mở lại khi tìm thấy g nhỏ hơn)
+    # Mỗi chiều có ba heap (pr, f, g) với xóa lười
+    heaps = (([], [], []), ([], [], []))
+    h_cache = ({}, {})
+    counter = 0
+    expansions = [0, 0]
+    max_frontier_size = 2
+
+    def h(direction, state_tuple):
+        cache = h_cache[direction]
+        if state_tuple not in cache:
+            cache[state_tuple] = h_funcs[direction](state_tuple)
+        return cache[state_tuple]
+
+    def push(direction, state_tuple, g_value):
+        nonlocal counter
+        f_value = g_value + h(direction, state_tuple)
+        open_g[direction][state_tuple] = g_value
+        pr_heap, f_heap, g_heap = heaps[direction]
+        heapq.heappush(pr_heap, (max(f_value, 2 * g_value), counter, state_tuple, g_value))
+        heapq.heappush(f_heap, (f_value, counter, state_tuple, g_value))
+        heapq.heappush(g_heap, (g_value, counter, state_tuple, g_value))
+        counter += 1
+
+    def top(direction, heap_index):
+        """Giá trị nhỏ nhất còn hiệu lực trong heap, hoặc None nếu rỗng."""
+        heap = heaps[direction][heap_index]
+        while heap:
+            value, _, state_tuple, g_value = heap[0]
+            if open_g[direction].get(state_tuple) == g_value:
+                return value
+            heapq.heappop(heap)
+        return None
+
+    push(0, start_tuple, 0)
+    push(1, goal_tuple, 0)
+    best_cost = float('inf')
+    meeting_state = None
+
+    while open_g[0] and open_g[1]:
+        pr_min = (top(0, 0), top(1, 0))
+        c_min = min(pr_min)
+        lower_bound = max(c_min, top(0, 1), top(1, 1), top(0, 2) + top(1, 2) + 1)
+        if best_cost <= lower_bound:
+            break
+
+        direction = 0 if pr_min[0] <= pr_min[1] else 1
+        _, _, state_tuple, g_value = heapq.heappop(heaps[direction][0])
+        del open_g[direction][state_tuple]
+        expansions[direction] += 1
+
+        other = 1 - direction
+        for move, new_data in get_successors([list(row) for row in state_tuple]):
+            new_tuple = tuple(map(tuple, new_data))
+            new_g = g_value + 1
+            if new_g >= g[direction].get(new_tuple, float('inf')):
+                continue
+            g[direction][new_tuple] = new_g
+            parent[direction][new_tuple] = (state_tuple, move)
+            push(direction, new_tuple, new_g)
+            if new_tuple in g[other] and new_g + g[other][new_tuple] < best_cost:
+                best_cost = new_g + g[other][new_tuple]
+                meeting_state = new_tuple
+        max_frontier_size = max(max_frontier_size, len(open_g[0]) + len(open_g[1]))
+
+    nodes_expanded = expansions[0] + expansions[1]
+    if stats is not None:
+        stats.update({
+            'forward_expansions': expansions[0],
+            'backward_expansions': expansions[1],
+            'meeting_state': [list(row) for row in meeting_state] if meeting_state else None
+        })
+
+    if meeting_state is None:
+        return [], nodes_expanded, max_frontier_size # Không tìm thấy
+
+    # Nửa đầu: từ trạng thái đầu tới điểm gặp
+    moves = []
+    state_tuple = meeting_state
+    while parent[0][state_tuple] is not None:
+        state_tuple, move = parent[0][state_tuple]
+        moves.append(move)
+    moves.reverse()
+    # Nửa sau: từ điểm gặp tới đích (đảo chiều các nước đi của tìm kiếm ngược)
+    state_tuple = meeting_state
+    while parent[1][state_tuple] is not None:
+        state_tuple, move = parent[1][state_tuple]
+        moves.append(INVERSE_MOVES[move])
+
+    final_path = _build_path(start_data, moves)
+    if final_path is None:
+        print("MM Error: Invalid move in reconstructed path")
+        return [], nodes_expanded, max_frontier_size
+    return final_path, nodes_expanded, max_frontier_size
+
+class _SMANode:
+    """Nút trong bộ nhớ của SMA*."""
+    __slots__ = ("state", "g", "f", "depth", "parent", "move",
+                 "children", "forgotten", "expanded", "alive")
+
+    def __init__(self, state, g, f, depth, parent=None, move=None):
+        self.state = state # tuple of tuples
+        self.g = g
+        self.f = f
+        self.depth = depth
+        self.parent = parent
+        self.move = move
+        self.children = {} # move -> _SMANode đang nằm trong bộ nhớ
+        self.forgotten = {} # move -> f đã backup của nút con bị quên
+        self.expanded = False
+        self.alive = True
+
+def smastar(initial_state, max_nodes=20000, heuristic_func=manhattan_distance, stats=None):
+    """
+    Simplified Memory-bounded A* (SMA*).
+    Giữ tối đa max_nodes nút trong bộ nhớ. Khi đầy, quên nút lá tệ nhất (f cao nhất,
+    nông nhất) và backup giá trị f của nó vào nút cha; nút cha sẽ sinh lại các nút con
+    bị quên khi cần. Tối ưu nếu đường đi tối ưu vừa trong bộ nhớ (độ dài < max_nodes).
+
+    stats: (Optional) dict được điền thêm 'reexpansions' (số lần mở rộng lại để sinh nút bị quên),
+           'regenerated_nodes', 'pruned_nodes', 'max_nodes_in_memory' và 'node_cap'.
+    Trả về: (path, nodes_expanded, max_nodes_in_memory)
+    """
+    if not is_solvable(initial_state.data):
+        print("SMA*: Trạng thái không giải được.")
+        return [], 0, 0
+
+    max_nodes = max(max_nodes, 2)
+    goal_tuple = tuple(map(tuple, goal_state_for_size(len(initial_state.data))))
+    start_tuple = tuple(map(tuple, initial_state.data))
+    root = _SMANode(start_tuple, 0, heuristic_func(initial_state), 0)
 
-        if new_bound == float('inf'): # Không tìm thấy nút nào nữa
-            return [], total_nodes_expanded, 0 # Không tìm thấy giải pháp
+    open_heap = [] # (key, -depth, counter, node): nút còn nước đi chưa sinh
+    leaf_heap = [] # (-f, depth, counter, node): ứng viên để quên
+    counter = 0
+    nodes_in_memory = 1
+    max_nodes_in_memory = 1
+    nodes_expanded = 0
+    reexpansions = 0
+    regenerated_nodes = 0
+    pruned_nodes = 0
+
+    def open_key(node):
+        if not node.expanded:
+            return node.f
+        if node.forgotten:
+            return min(node.forgotten.values())
+        return None
+
+    def push_open(node):
+        nonlocal counter
+        key = open_key(node)
+        if key is not None:
+            heapq.heappush(open_heap, (key, -node.depth, counter, node))
+            counter += 1
+
+    def push_leaf(node):
+        nonlocal counter
+        if node is not root and not node.children:
+            heapq.heappush(leaf_heap, (-node.f, node.depth, counter, node))
+            counter += 1
+
+    def backup(node):
+        """Cập nhật f của node = min f các nút con (trong bộ nhớ và bị quên), lan truyền lên cha."""
+        while node is not None and node.expanded:
+            values = [child.f for child in node.children.values()] + list(node.forgotten.values())
+            new_f = min(values) if values else float('inf')
+            if new_f == node.f:
+                break
+            node.f = new_f
+            push_leaf(node)
+            node = node.parent
+
+    def prune_one(protected):
+        """Quên một nút lá tệ nhất (không phải protected). Trả về False nếu không còn nút để quên."""
+        nonlocal nodes_in_memory, pruned_nodes
+        while leaf_heap:
+            neg_f, _, _, leaf = heapq.heappop(leaf_heap)
+            if (not leaf.alive or leaf.children or leaf is protected
+                    or leaf is root or -neg_f != leaf.f):
+                continue
+            parent = leaf.parent
+            del parent.children[leaf.move]
+            parent.forgotten[leaf.move] = leaf.f
+            leaf.alive = False
+            nodes_in_memory -= 1
+            pruned_nodes += 1
+            push_open(parent)
+            push_leaf(parent)
+            return True
+        return False
+
+    def on_path(node, state):
+        while node is not None:
+            if node.state == state:
+                return True
+            node = node.parent
+        return False
+
+    push_open(root)
+    best = None
+    while open_heap:
+        key, _, _, node = heapq.heappop(open_heap)
+        if not node.alive or open_key(node) != key:
+            continue
+        if key == float('inf'):
+            break
+        if node.state == goal_tuple:
+            best = node
+            break
+
+        nodes_expanded += 1
+        if node.expanded:
+            reexpansions += 1
+        h_parent_f = node.f
+
+        for move, new_data in get_successors([list(row) for row in node.state]):
+            if move in node.children:
+                continue
+            if node.expanded and move not in node.forgotten:
+                continue # Nước đi này bị loại (chu trình) từ lần mở rộng trước
+            new_tuple = tuple(map(tuple, new_data))
+            if on_path(node, new_tuple):
+                continue
+            child_g = node.g + 1
+            if new_tuple != goal_tuple and node.depth + 1 >= max_nodes - 1:
+                child_f = float('inf') # Đường đi không thể vừa trong bộ nhớ
+            else:
+                child_f = max(h_parent_f, child_g + heuristic_func(Buzzle(new_data)))
+            # Giải phóng bộ nhớ nếu cần; nếu không thể, giữ nước đi ở trạng thái bị quên với f thật của nó
+            # để nút con được sinh lại khi có bộ nhớ
+            if nodes_in_memory >= max_nodes and not prune_one(node):
+                node.forgotten[move] = max(child_f, node.forgotten.get(move, child_f))
+                continue
+            if move in node.forgotten:
+                child_f = max(child_f, node.forgotten.pop(move))
+                regenerated_nodes += 1
+            child = _SMANode(new_tuple, child_g, child_f, node.depth + 1, node, move)
+            node.children[move] = child
+            nodes_in_memory += 1
+            push_open(child)
+            push_leaf(child)
+        node.expanded = True
+        max_nodes_in_memory = max(max_nodes_in_memory, nodes_in_memory)
+
+        backup(node)
+        push_open(node)
+        push_leaf(node)
+
+    if stats is not None:
+        stats.update({
+            'reexpansions': reexpansions,
+            'regenerated_nodes': regenerated_nodes,
+            'pruned_nodes': pruned_nodes,
+            'max_nodes_in_memory': max_nodes_in_memory,
+            'node_cap': max_nodes
+        })
+
+    if best is None:
+        return [], nodes_expanded, max_nodes_in_memory # Không tìm thấy
+
+    moves = []
+    node = best
+    while node.parent is not None:
+        moves.append(node.move)
+        node = node.parent
+    moves.reverse()
+    final_path = _build_path(initial_state.data, moves)
+    if final_path is None:
+        print("SMA* Error: Invalid move in reconstructed path")
+        return [], nodes_expanded, max_nodes_in_memory
+    return final_path, nodes_expanded, max_nodes_in_memory
+
+# --- IDA* với bảng chuyển vị ---
+
+_IDA_FOUND = -1
+_IDA_INVERSE = (1, 0, 3, 2)
+_IDA_UNBOUNDED = 0x7FFF # f lưu trong bảng chuyển vị (int16) thay cho float('inf')
+
+class IDATranspositionTable:
+    """
+    Bảng chuyển vị kích thước cố định cho IDA*, đánh chỉ số theo rank trạng thái.
+    Mỗi ô lưu (rank, g tốt nhất, f đã backup, độ sâu còn lại); khi hai trạng thái trùng ô,
+    giữ mục có độ sâu còn lại (bound - g) lớn hơn (replace-by-depth).
+    Dùng lại được giữa các lần lặp ngưỡng.
+    """
+
+    def __init__(self, size=1 << 18):
+        self.size = size
+        self.keys = array('i', [-1]) * size
+        self.g = array('h', [0]) * size
+        self.f = array('h', [0]) * size
+        self.draft = array('h', [0]) * size
+        self.probes = 0
+        self.hits = 0
+
+    def lookup(self, rank):
+        """Trả về ô chứa rank hoặc -1."""
+        self.probes += 1
+        slot = rank % self.size
+        if self.keys[slot] == rank:
+            self.hits += 1
+            return slot
+        return -1
+
+    def store(self, rank, g, f, draft):
+        slot = rank % self.size
+        key = self.keys[slot]
+        if key == -1 or key == rank or draft >= self.draft[slot]:
+            self.keys[slot] = rank
+            self.g[slot] = g
+            self.f[slot] = _IDA_UNBOUNDED if f == float('inf') else f
+            self.draft[slot] = draft
+
+    def report(self):
+        """Thống kê tỉ lệ trúng và bộ nhớ sử dụng."""
+        entries = self.size - self.keys.count(-1)
+        return {
+            'tt_size': self.size,
+            'tt_entries': entries,
+            'tt_probes': self.probes,
+            'tt_hits': self.hits,
+            'tt_hit_rate': self.hits / self.probes if self.probes else 0.0,
+            'tt_memory_bytes': self.size * (self.keys.itemsize + self.g.itemsize
+                                            + self.f.itemsize + self.draft.itemsize)
+        }
+
+def _ida_search(flat, blank, g, h, bound, last_move, moves, costs, table, counters):
+    """
+    Hàm đệ quy cho IDA*, chạy tại chỗ trên bảng phẳng flat (apply/undo).
+    h được cập nhật tăng dần theo bảng chi phí từng ô costs[tile][pos]; table là IDATranspositionTable.
+    counters[0] đếm số nút đã mở rộng.
+    Trả về: _IDA_FOUND nếu tìm thấy đích (moves chứa đường đi), ngược lại f nhỏ nhất vượt bound.
+    """
+    counters[0] += 1
+    f = g + h
+    if f > bound:
+        return f
+    if h == 0:
+        return _IDA_FOUND
+
+    rank = state_to_rank(flat)
+    slot = table.lookup(rank)
+    if slot >= 0:
+        if table.g[slot] < g:
+            return float('inf') # Đã tới trạng thái này bằng đường ngắn hơn
+        if table.g[slot] == g and table.f[slot] > bound:
+            stored_f = table.f[slot]
+            # Cây con đã được duyệt với ngưỡng này
+            return float('inf') if stored_f == _IDA_UNBOUNDED else stored_f
+    # Ghi trước khi duyệt để phát hiện chu trình qua các tổ tiên
+    table.store(rank, g, f, bound - g)
 
-        bound = new_bound # Cập nhật bound cho lần lặp tiếp theo
+    min_f_exceeding = float('inf')
+    for m in range(4):
+        if last_move >= 0 and m == _IDA_INVERSE[last_move]:
+            continue
+        if (m == 0 and blank < 3) or (m == 1 and blank >= 6) \
+                or (m == 2 and blank % 3 == 0) or (m == 3 and blank % 3 == 2):
+            continue
+        target = blank + _DELTAS_3X3[m]
+        tile = flat[target]
+        new_h = h - costs[tile][target] + costs[tile][blank]
+        flat[blank], flat[target] = tile, 0
+        moves.append(MOVES[m])
+
+        result = _ida_search(flat, target, g + 1, new_h, bound, m, moves, costs, table, counters)
+
+        if result == _IDA_FOUND:
+            flat[target], flat[blank] = tile, 0
+            return _IDA_FOUND
+        moves.pop()
+        flat[target], flat[blank] = tile, 0
+        min_f_exceeding = min(min_f_exceeding, result)
+
+    table.store(rank, g, min_f_exceeding, bound - g)
+    return min_f_exceeding
+
+def idastar(initial_state, heuristic_func=manhattan_distance, table_size=1 << 18, stats=None):
+    """
+    Iterative Deepening A* Search với bảng chuyển vị.
+    heuristic_func: manhattan_distance hoặc number_of_misplaced_tiles (cập nhật tăng dần theo từng ô).
+    Bảng chuyển vị (table_size ô, dùng chung cho mọi ngưỡng) lưu g tốt nhất và f đã backup
+    của mỗi trạng thái, loại bỏ việc mở rộng lại các trạng thái trùng lặp.
+    stats: (Optional) dict được điền thêm 'iterations', tỉ lệ trúng và bộ nhớ của bảng chuyển vị.
+    """
+    if not is_solvable(initial_state.data):
+        print("IDA*: Trạng thái không giải được.")
+        return [], 0, 0
+
+    costs = _TILE_COST_TABLES.get(heuristic_func)
+    if costs is None:
+        raise ValueError(f"IDA* does not support heuristic {getattr(heuristic_func, '__name__', heuristic_func)!r}")
+
+    flat = [tile for row in initial_state.data for tile in row]
+    blank = flat.index(0)
+    h = sum(costs[tile][pos] for pos, tile in enumerate(flat))
+    bound = h
+    table = IDATranspositionTable(table_size)
+    counters = [0]
+    iterations = 0
+    path_moves = []
+
+    while True:
+        iterations += 1
+        result = _ida_search(flat, blank, 0, h, bound, -1, path_moves, costs, table, counters)
+        if result == _IDA_FOUND or result == float('inf'):
+            break
+        bound = result # Cập nhật bound cho lần lặp tiếp theo
+
+    total_nodes_expanded = counters[0]
+    if stats is not None:
+        stats['iterations'] = iterations
+        stats.update(table.report())
+
+    if result != _IDA_FOUND: # Không tìm thấy nút nào nữa
+        return [], total_nodes_expanded, 0
+
+    final_path = _build_path(initial_state.data, path_moves)
+    if final_path is None:
+        print("IDA* Error: Invalid move in reconstructed path")
+        return [], total_nodes_expanded, 0
+    return final_path, total_nodes_expanded, 0 # max_frontier is not tracked by IDA*
 
 # sys.setrecursionlimit(2000) # Tăng giới hạn đệ quy nếu cần cho IDA* hoặc DFS sâu
 
@@ -0,0 +1,54 @@
+"""
+Mô hình chuyển tiếp học được cho Dyna-Q.
+
+Puzzle là tất định nên mỗi cặp (trạng thái, hành động) chỉ cần được quan sát một lần:
+mô hình lưu rank kế tiếp và phần thưởng trong hai mảng (NUM_STATES, 4) (-1 = chưa quan sát),
+cùng danh sách các cặp đã quan sát để lấy mẫu đều theo lô khi lập kế hoạch (planning).
+Tổng bộ nhớ khoảng 8.7 MB cho toàn bộ không gian trạng thái.
+"""
+import numpy as np
+
+from src.core.buzzle_logic import MOVES
+from src.core.state_index import NUM_STATES, GOAL_RANK
+
+UNOBSERVED = -1
+
+class TransitionModel:
+    """
+    Mô hình tất định (s, a) -> (s', r) dạng mảng.
+
+    Parameters:
+    - seed: (Optional) Hạt giống cho bộ sinh số ngẫu nhiên
+    """
+
+    def __init__(self, seed=None):
+        num_actions = len(MOVES)
+        self.num_actions = num_actions
+        self.next_states = np.full(NUM_STATES * num_actions, UNOBSERVED, dtype=np.int32)
+        self.rewards = np.zeros(NUM_STATES * num_actions, dtype=np.float32)
+        self.observed = np.empty(NUM_STATES * num_actions, dtype=np.int32) # Chỉ số phẳng s * 4 + a đã quan sát
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.size
+
+    def record(self, states, actions, rewards, next_states):
+        """Ghi nhận các chuyển tiếp quan sát được (mảng rank, chỉ số hành động, phần thưởng, rank kế tiếp)."""
+        flat = np.asarray(states) * self.num_actions + np.asarray(actions)
+        new = np.unique(flat[self.next_states[flat] == UNOBSERVED])
+        self.next_states[flat] = next_states
+        self.rewards[flat] = rewards
+        self.observed[self.size:self.size + len(new)] = new
+        self.size += len(new)
+        return len(new)
+
+    def sample(self, batch_size):
+        """
+        Lấy ngẫu nhiên đều batch_size cặp đã quan sát (có hoàn lại).
+        Returns: (states, actions, rewards, next_states, dones) dạng mảng
+        """
+        flat = self.observed[self.rng.integers(0, self.size, size=batch_size)]
+        states, actions = np.divmod(flat, self.num_actions)
+        next_states = self.next_states[flat]
+        return states, actions, self.rewards[flat], next_states, next_states == GOAL_RANK
@@ -0,0 +1,212 @@
+"""
+Giải hàng loạt bảng 8-puzzle từ file JSONL/CSV hoặc stdin, ghi kết quả dần dần ra JSONL.
+
+- Đầu vào được đọc theo luồng (streaming) và xử lý theo từng cửa sổ giới hạn,
+  nên bộ nhớ không phụ thuộc vào kích thước file.
+- Có thể chạy song song bằng multiprocessing; kết quả vẫn được ghi đúng thứ tự đầu vào.
+- Mỗi kết quả được ghi và flush ngay, nên sau khi bị gián đoạn có thể chạy lại
+  với cùng file đầu ra để tiếp tục từ dòng đã hoàn thành cuối cùng.
+
+Mỗi bài toán được giải qua src.cli.solve_board (tức là parse_puzzle_input + solve_puzzle),
+giống đường đi của GUI và lệnh `solve`.
+"""
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+from src.cli import solve_board, _json_default
+
+# --- Đọc đầu vào ---
+
+def _board_to_text(board):
+    """Chuyển bảng (chuỗi, dãy phẳng hoặc list of lists) sang chuỗi cho parse_puzzle_input."""
+    if isinstance(board, str):
+        return board.replace(",", " ")
+    if board and isinstance(board[0], (list, tuple)):
+        board = [tile for row in board for tile in row]
+    return " ".join(str(tile) for tile in board)
+
+def _detect_format(path):
+    if path and path != "-" and path.lower().endswith(".csv"):
+        return "csv"
+    return "jsonl"
+
+def _iter_jsonl(stream):
+    for line_no, line in enumerate(stream):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            # Cho phép dòng là chuỗi thô "1 2 3 4 0 6 7 5 8"
+            item = line
+        if isinstance(item, dict):
+            yield item.get("id", line_no), item.get("board", "")
+        else:
+            yield line_no, item
+
+def _iter_csv(stream):
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+    lowered = [name.strip().lower() for name in header]
+    if "board" in lowered:
+        board_col = lowered.index("board")
+        id_col = lowered.index("id") if "id" in lowered else None
+        rows = reader
+    else:
+        # Không có header: mỗi dòng là một bảng (một cột hoặc 9 cột)
+        board_col, id_col = None, None
+        rows = _prepend(header, reader)
+    for row_no, row in enumerate(rows):
+        if not row:
+            continue
+        board = row[board_col] if board_col is not None else " ".join(row)
+        board_id = row[id_col] if id_col is not None else row_no
+        yield board_id, board
+
+def _prepend(first, rest):
+    yield first
+    yield from rest
+
+def iter_boards(source, input_format=None):
+    """
+    Đọc lần lượt các bảng từ source (đường dẫn file hoặc "-" cho stdin).
+
+    JSONL: mỗi dòng là {"id": ..., "board": ...}, một chuỗi JSON hoặc chuỗi thô.
+    CSV: cột "board" (và tùy chọn "id"), hoặc không có header với mỗi dòng là một bảng.
+    Trả về: generator các (board_id, board_text)
+    """
+    input_format = input_format or _detect_format(source)
+    reader = _iter_csv if input_format == "csv" else _iter_jsonl
+    if source in (None, "-"):
+        for board_id, board in reader(sys.stdin):
+            yield board_id, _board_to_text(board)
+        return
+    with open(source, "r", newline="", encoding="utf-8") as f:
+        for board_id, board in reader(f):
+            yield board_id, _board_to_text(board)
+
+# --- Tiếp tục sau khi bị gián đoạn ---
+
+def _completed_count(output_path):
+    """
+    Số kết quả hoàn chỉnh đã có trong output_path. Dòng cuối bị ghi dở
+    (do chương trình dừng giữa chừng) sẽ bị cắt bỏ.
+    """
+    if not os.path.exists(output_path):
+        return 0
+    count = 0
+    complete_end = 0
+    offset = 0
+    with open(output_path, "rb+") as f:
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                break
+            count += chunk.count(b"\n")
+            last_newline = chunk.rfind(b"\n")
+            if last_newline != -1:
+                complete_end = offset + last_newline + 1
+            offset += len(chunk)
+        if complete_end < offset:
+            f.truncate(complete_end)
+    return count
+
+# --- Giải ---
+
+def _solve_task(task):
+    """Hàm chạy trong tiến trình con: giải một bảng. Trả về (status, dòng JSON)."""
+    index, board_id, board_text, settings = task
+    with contextlib.redirect_stdout(sys.stderr):
+        record = solve_board(
+            board_text, algorithm=settings["algorithm"], heuristic=settings["heuristic"],
+            options=settings["options"], time_limit=settings["time_limit"]
+        )
+    if not settings["include_path"]:
+        record.pop("path")
+    record = {"line": index, "id": board_id, **record}
+    return record["status"], json.dumps(record, default=_json_default, ensure_ascii=False)
+
+def run_batch(source, output_path=None, algorithm="astar", heuristic=None, options=None,
+              time_limit=None, workers=1, input_format=None, resume=True,
+              include_path=True, window_size=256, progress_every=0):
+    """
+    Giải tất cả các bảng trong source và ghi kết quả ra output_path (JSONL).
+
+    Parameters:
+    - source: Đường dẫn file JSONL/CSV, hoặc "-" (stdin)
+    - output_path: File JSONL kết quả; None hoặc "-" -> stdout (không hỗ trợ tiếp tục)
+    - algorithm, heuristic, options, time_limit: Như src.cli.solve_board
+    - workers: Số tiến trình giải song song (1 -> giải tuần tự trong tiến trình hiện tại)
+    - input_format: "jsonl" hoặc "csv" (None -> đoán theo phần mở rộng)
+    - resume: Bỏ qua các dòng đã có kết quả trong output_path
+    - include_path: Ghi cả các trạng thái trung gian (ngoài danh sách nước đi)
+    - window_size: Số bảng tối đa được đọc trước và xử lý cùng lúc (giới hạn bộ nhớ)
+    - progress_every: In tiến độ ra stderr sau mỗi chừng này bảng (0 -> không in)
+
+    Returns:
+    - summary: dict gồm 'processed', 'skipped', 'status_counts' và 'elapsed_s'
+    """
+    settings = {
+        "algorithm": algorithm, "heuristic": heuristic, "options": options or {},
+        "time_limit": time_limit, "include_path": include_path
+    }
+    to_stdout = output_path in (None, "-")
+    skipped = 0 if to_stdout or not resume else _completed_count(output_path)
+
+    tasks = (
+        (index, board_id, board_text, settings)
+        for index, (board_id, board_text) in enumerate(iter_boards(source, input_format))
+    )
+    tasks = islice(tasks, skipped, None)
+
+    status_counts = {}
+    processed = 0
+    start = time.perf_counter()
+
+    if to_stdout:
+        out = contextlib.nullcontext(sys.stdout)
+    else:
+        out = open(output_path, "a" if resume else "w", encoding="utf-8")
+
+    pool = None
+    if workers and workers > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(workers)
+
+    try:
+        with out as f:
+            while True:
+                window = list(islice(tasks, window_size))
+                if not window:
+                    break
+                if pool is not None:
+                    results = pool.imap(_solve_task, window, chunksize=max(1, len(window) // (4 * workers)))
+                else:
+                    results = map(_solve_task, window)
+                for status, line in results:
+                    f.write(line + "\n")
+                    f.flush()
+                    status_counts[status] = status_counts.get(status, 0) + 1
+                    processed += 1
+                    if progress_every and processed % progress_every == 0:
+                        elapsed = time.perf_counter() - start
+                        print(f"[batch] {processed} boards solved ({processed / elapsed:.1f}/s)", file=sys.stderr)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    return {
+        "processed": processed,
+        "skipped": skipped,
+        "status_counts": status_counts,
+        "elapsed_s": time.perf_counter() - start
+    }
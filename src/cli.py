@@ -0,0 +1,241 @@
+"""
+Giao diện dòng lệnh không cần GUI (headless) cho bộ giải 8-puzzle.
+
+Ví dụ:
+    python -m src.cli solve "1 2 3 4 0 6 7 5 8" --algorithm astar --heuristic manhattan
+    python -m src.cli solve "8 6 7 2 5 4 3 0 1" -a smastar --option max_nodes=5000 --time-limit 10
+    python -m src.cli batch boards.jsonl --output results.jsonl --workers 4
+    python -m src.cli serve --port 8080 --workers 4
+
+Kết quả (đường đi, thời gian, thống kê) được in ra stdout dưới dạng JSON.
+Module này không import PyQt5, matplotlib hay networkx; các thông báo mà
+thuật toán in ra được chuyển sang stderr để stdout luôn là JSON hợp lệ.
+"""
+import argparse
+import contextlib
+import json
+import signal
+import sys
+import time
+
+class SolveTimeout(Exception):
+    """Thuật toán vượt quá giới hạn thời gian (--time-limit)."""
+
+@contextlib.contextmanager
+def _time_limit(seconds):
+    """Ngắt lời gọi bằng SolveTimeout sau `seconds` giây (dùng SIGALRM, chỉ trên luồng chính Unix)."""
+    if not seconds or not hasattr(signal, "setitimer"):
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise SolveTimeout()
+
+    previous_handler = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+def _json_default(value):
+    """Chuyển các giá trị không tuần tự hóa được (numpy scalar, agent RL...) sang dạng JSON."""
+    if hasattr(value, "item"):
+        try:
+            return value.item()
+        except (TypeError, ValueError):
+            pass
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return f"<{type(value).__name__}>"
+
+def _parse_option(text):
+    """Đọc 'KEY=VALUE'; VALUE được hiểu như JSON nếu được (số, true/false, null), ngược lại là chuỗi."""
+    key, sep, raw_value = text.partition("=")
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"Option must have the form KEY=VALUE, got '{text}'")
+    try:
+        value = json.loads(raw_value)
+    except ValueError:
+        value = raw_value
+    return key.strip(), value
+
+def solve_board(board_text, algorithm="astar", heuristic=None, options=None, time_limit=None, stats=None):
+    """
+    Giải một bảng và trả về bản ghi kết quả (dict có thể tuần tự hóa thành JSON).
+
+    Parameters:
+    - board_text: Chuỗi trạng thái theo định dạng của parse_puzzle_input (ví dụ "1 2 3 4 0 6 7 5 8")
+    - algorithm: Key thuật toán trong SOLVER_FUNCTIONS
+    - heuristic: Tên heuristic trong HEURISTIC_FUNCTIONS (None -> manhattan)
+    - options: (Optional) dict tham số bổ sung cho thuật toán (xem solve_puzzle(solver_options=...))
+    - time_limit: (Optional) Giới hạn thời gian giải (giây)
+    - stats: (Optional) dict nhận thống kê bổ sung từ thuật toán
+
+    Returns:
+    - record: dict gồm 'board', 'algorithm', 'heuristic', 'status' ('solved', 'no_solution',
+      'unsolvable', 'timeout', 'invalid_input' hoặc 'error'), 'moves', 'path', 'path_length',
+      'nodes_expanded', 'max_frontier', 'stats', 'timings' và 'error'
+    """
+    from src.core.buzzle_logic import Buzzle, is_solvable, parse_puzzle_input
+
+    record = {
+        "board": board_text,
+        "algorithm": algorithm,
+        "heuristic": heuristic,
+        "status": None,
+        "moves": [],
+        "path": [],
+        "path_length": 0,
+        "nodes_expanded": 0,
+        "max_frontier": 0,
+        "stats": {} if stats is None else stats,
+        "timings": {},
+        "error": None
+    }
+    total_start = time.perf_counter()
+    try:
+        data = parse_puzzle_input(board_text)
+    except ValueError as e:
+        record["status"] = "invalid_input"
+        record["error"] = str(e)
+        return record
+
+    import_start = time.perf_counter()
+    from src.algorithms.algorithm_manager import (
+        solve_puzzle, SOLVER_FUNCTIONS, SKIP_SOLVABLE_CHECK_ALGOS
+    )
+    record["timings"]["import_s"] = time.perf_counter() - import_start
+
+    algo_key = algorithm.lower()
+    if algo_key not in SOLVER_FUNCTIONS:
+        record["status"] = "error"
+        record["error"] = f"Unknown algorithm key '{algorithm}'"
+        return record
+    if algo_key not in SKIP_SOLVABLE_CHECK_ALGOS and not is_solvable(data):
+        record["status"] = "unsolvable"
+        record["timings"]["total_s"] = time.perf_counter() - total_start
+        return record
+
+    solve_start = time.perf_counter()
+    try:
+        with _time_limit(time_limit):
+            path, nodes, frontier = solve_puzzle(
+                algo_key, Buzzle(data), heuristic_name=heuristic,
+                stats=record["stats"], solver_options=options
+            )
+    except SolveTimeout:
+        record["status"] = "timeout"
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    else:
+        # Thuật toán RL trả về dict thống kê ở vị trí thứ ba
+        if isinstance(frontier, dict):
+            record["stats"].update(frontier)
+            frontier = 0
+        record["nodes_expanded"] = nodes
+        record["max_frontier"] = frontier
+        if path and Buzzle(path[-1][1]).is_goal():
+            record["status"] = "solved"
+            record["moves"] = [move for move, _ in path]
+            record["path"] = [state for _, state in path]
+            record["path_length"] = len(path)
+        else:
+            record["status"] = "no_solution"
+    record["timings"]["solve_s"] = time.perf_counter() - solve_start
+    record["timings"]["total_s"] = time.perf_counter() - total_start
+    return record
+
+def _cmd_solve(args):
+    # Các thuật toán (và việc nạp mô hình RL) in thông báo ra stdout -> chuyển sang stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        record = solve_board(
+            args.board, algorithm=args.algorithm, heuristic=args.heuristic,
+            options=dict(args.option), time_limit=args.time_limit
+        )
+    if not args.include_path:
+        record.pop("path")
+    json.dump(record, sys.stdout, indent=args.indent, default=_json_default, ensure_ascii=False)
+    sys.stdout.write("\n")
+    return 0 if record["status"] == "solved" else 1
+
+def _cmd_batch(args):
+    from src.batch import run_batch
+    summary = run_batch(
+        args.input, output_path=args.output, algorithm=args.algorithm, heuristic=args.heuristic,
+        options=dict(args.option), time_limit=args.time_limit, workers=args.workers,
+        input_format=args.format, resume=args.resume, include_path=args.include_path,
+        progress_every=args.progress
+    )
+    print(json.dumps(summary), file=sys.stderr)
+    return 0
+
+def _cmd_serve(args):
+    import asyncio
+    from src.service import serve
+    try:
+        asyncio.run(serve(
+            host=args.host, port=args.port, workers=args.workers, cache_size=args.cache_size,
+            default_deadline_s=args.deadline, max_solve_s=args.max_solve_time
+        ))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def _add_solver_arguments(parser):
+    """Các tham số chung của lệnh solve và batch."""
+    parser.add_argument("-a", "--algorithm", default="astar", help="Algorithm key (default: astar)")
+    parser.add_argument("--heuristic", default=None, help="Heuristic name: manhattan or misplaced")
+    parser.add_argument("-o", "--option", action="append", type=_parse_option, default=[],
+                        metavar="KEY=VALUE",
+                        help="Extra solver parameter, e.g. max_nodes=5000 or beam_width=50 (repeatable)")
+    parser.add_argument("--time-limit", type=float, default=None, metavar="SECONDS",
+                        help="Abort a search after this many seconds")
+    parser.add_argument("--no-path", dest="include_path", action="store_false",
+                        help="Only print the moves, not the intermediate states")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Headless 8-puzzle solver")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    solve_parser = subparsers.add_parser("solve", help="Solve one board and print the result as JSON")
+    solve_parser.add_argument("board", help='Board as 9 space-separated numbers, e.g. "1 2 3 4 0 6 7 5 8"')
+    _add_solver_arguments(solve_parser)
+    solve_parser.add_argument("--indent", type=int, default=None, help="Indent the JSON output")
+    solve_parser.set_defaults(func=_cmd_solve)
+
+    batch_parser = subparsers.add_parser("batch", help="Solve many boards from JSONL/CSV and write JSONL results")
+    batch_parser.add_argument("input", help='Input file (.jsonl or .csv) or "-" for stdin')
+    batch_parser.add_argument("--output", default="-", help='Output JSONL file (default: "-" for stdout)')
+    _add_solver_arguments(batch_parser)
+    batch_parser.add_argument("--format", choices=["jsonl", "csv"], default=None,
+                              help="Input format (default: guessed from the file extension)")
+    batch_parser.add_argument("-j", "--workers", type=int, default=1, help="Number of solver processes")
+    batch_parser.add_argument("--no-resume", dest="resume", action="store_false",
+                              help="Overwrite the output file instead of continuing after its last line")
+    batch_parser.add_argument("--progress", type=int, default=0, metavar="N",
+                              help="Report progress on stderr every N boards")
+    batch_parser.set_defaults(func=_cmd_batch)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the local JSON-over-HTTP solve service")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8080)
+    serve_parser.add_argument("-j", "--workers", type=int, default=2, help="Number of solver processes")
+    serve_parser.add_argument("--cache-size", type=int, default=4096, help="LRU result cache size (0 disables)")
+    serve_parser.add_argument("--deadline", type=float, default=10.0, metavar="SECONDS",
+                              help="Default per-request deadline")
+    serve_parser.add_argument("--max-solve-time", type=float, default=60.0, metavar="SECONDS",
+                              help="Hard time limit for one search in a worker")
+    serve_parser.set_defaults(func=_cmd_serve)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
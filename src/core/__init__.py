@@ -1,9 +1,24 @@
-from .buzzle_logic import Buzzle, create_new_state, is_solvable, manhattan_distance, generate_random_solvable_state
+from .buzzle_logic import (
+    Buzzle, create_new_state, get_successors, is_solvable, manhattan_distance,
+    generate_random_solvable_state, generate_random_solvable_states,
+    goal_state_for_size, permutation_parity, MOVES
+)
+from .state_index import NUM_STATES, GOAL_RANK, state_to_rank, rank_to_state, rank_to_flat
 
 __all__ = [
     'Buzzle', 
     'create_new_state', 
+    'get_successors', 
+    'MOVES', 
     'is_solvable', 
     'manhattan_distance', 
-    'generate_random_solvable_state'
+    'generate_random_solvable_state',
+    'generate_random_solvable_states',
+    'permutation_parity',
+    'goal_state_for_size',
+    'NUM_STATES',
+    'GOAL_RANK',
+    'state_to_rank',
+    'rank_to_state',
+    'rank_to_flat'
 ]
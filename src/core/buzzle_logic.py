@@ -1,5 +1,8 @@
 import random
 
+# Thứ tự các nước đi (di chuyển ô trống) dùng chung cho các thuật toán
+MOVES = ["up", "down", "left", "right"]
+
 class Buzzle:
     def __init__(self, data=None):
         if data is None:
@@ -12,9 +15,14 @@ class Buzzle:
 
     def is_goal(self, goal_state=None):
         if goal_state is None:
-            goal_state = [[1, 2, 3], [4, 5, 6], [7, 8, 0]]
+            goal_state = goal_state_for_size(len(self.data))
         return self.data == goal_state
 
+    @staticmethod
+    def generate_random_state(size=3):
+        """Tạo dữ liệu (list of lists) cho một trạng thái ngẫu nhiên giải được."""
+        return generate_random_solvable_state(size)
+
     def print_state(self):
         print("Trang thai hien tai: ")
         for i in range(3):
@@ -84,13 +92,15 @@ class Buzzle:
         return valid_moves
 
 def create_new_state(data, move):
-    """Tạo trạng thái mới từ data và move. Trả về (True, new_data) hoặc (False, None)."""
-    if not data or not isinstance(data, list) or len(data) != 3:
+    """Tạo trạng thái mới từ data và move. Trả về (True, new_data) hoặc (False, None).
+    Hỗ trợ bảng vuông kích thước bất kỳ (3x3, 4x4, ...)."""
+    if not data or not isinstance(data, list):
         return False, None
-        
+    size = len(data)
+
     # Validate each row
     for row in data:
-        if not isinstance(row, list) or len(row) != 3:
+        if not isinstance(row, list) or len(row) != size:
             return False, None
             
     # Tạo bản sao sâu để tránh thay đổi trạng thái gốc
@@ -98,8 +108,8 @@ def create_new_state(data, move):
     blank_pos = None
 
     # Tìm vị trí ô trống
-    for i in range(3):
-        for j in range(3):
+    for i in range(size):
+        for j in range(size):
             if new_data[i][j] == 0:
                 blank_pos = (i, j)
                 break
@@ -115,11 +125,11 @@ def create_new_state(data, move):
 
     if move == "up" and i > 0:
         ni = i - 1
-    elif move == "down" and i < 2:
+    elif move == "down" and i < size - 1:
         ni = i + 1
     elif move == "left" and j > 0:
         nj = j - 1
-    elif move == "right" and j < 2:
+    elif move == "right" and j < size - 1:
         nj = j + 1
     else:
         # Nước đi không hợp lệ tại vị trí này
@@ -129,50 +139,144 @@ def create_new_state(data, move):
     new_data[i][j], new_data[ni][nj] = new_data[ni][nj], new_data[i][j]
     return True, new_data
 
+def get_successors(data):
+    """
+    Sinh các trạng thái kế tiếp hợp lệ của data theo thứ tự MOVES.
+    Đây là hàm kế thừa dùng chung cho BFS và các biến thể (ví dụ BFS bộ nhớ ngoài).
+    Yield: (move, new_data)
+    """
+    for move in MOVES:
+        success, new_data = create_new_state(data, move)
+        if success:
+            yield move, new_data
+
+def goal_state_for_size(size):
+    """Trạng thái đích của bảng size x size: 1..size*size-1, ô trống ở góc dưới phải."""
+    flat = list(range(1, size * size)) + [0]
+    return [flat[i:i + size] for i in range(0, size * size, size)]
+
+def permutation_parity(sequence):
+    """
+    Tính tính chẵn lẻ của hoán vị (0: chẵn, 1: lẻ) trong O(n) bằng phân tích chu trình:
+    parity = (n - số chu trình) mod 2.
+    Input: sequence là hoán vị của các giá trị 0..n-1.
+    """
+    n = len(sequence)
+    visited = [False] * n
+    cycles = 0
+    for start in range(n):
+        if not visited[start]:
+            cycles += 1
+            position = start
+            while not visited[position]:
+                visited[position] = True
+                position = sequence[position]
+    return (n - cycles) % 2
+
 def is_solvable(state_data):
     """
     Kiểm tra xem một trạng thái puzzle có giải được không.
-    Trong 8-puzzle, tính số inversions trong danh sách trạng thái.
-    Puzzle có thể giải được nếu số inversions là chẵn.
+    Trong 8-puzzle, puzzle có thể giải được nếu số inversions (bỏ qua ô trống) là chẵn.
+    Với bảng có cạnh chẵn (ví dụ 15-puzzle), cộng thêm khoảng cách hàng của ô trống tới hàng cuối.
+    Tính chẵn lẻ của số inversions được lấy từ tính chẵn lẻ của hoán vị (O(n)):
+    ô trống (0) nhỏ nhất nên tạo đúng blank_index inversions với các ô đứng trước nó.
     Input: state_data (list of lists)
     """
-    # Flatten state để đếm inversions
-    flat_state = [num for row in state_data for num in row if num != 0]
+    flat_state = [num for row in state_data for num in row]
+    blank_index = flat_state.index(0)
+    inversion_parity = (permutation_parity(flat_state) + blank_index) % 2
 
-    inversions = 0
-    for i in range(len(flat_state)):
-        for j in range(i+1, len(flat_state)):
-            if flat_state[i] > flat_state[j]:
-                inversions += 1
+    size = len(state_data)
+    if size % 2 == 0:
+        inversion_parity = (inversion_parity + size - 1 - blank_index // size) % 2
 
-    return inversions % 2 == 0
+    return inversion_parity == 0
 
-def manhattan_distance(buzzle_instance):
+def manhattan_distance(buzzle_instance, goal_state=None):
     """
     Calculate Manhattan distance heuristic.
-    Input: buzzle_instance (một đối tượng của lớp Buzzle)
+    Input: buzzle_instance (một đối tượng của lớp Buzzle), bảng vuông kích thước bất kỳ
+           goal_state: (Optional) trạng thái đích khác trạng thái đích chuẩn
     """
     distance = 0
-    goal_positions = {1:(0,0), 2:(0,1), 3:(0,2),
-                     4:(1,0), 5:(1,1), 6:(1,2),
-                     7:(2,0), 8:(2,1), 0:(2,2)} # Ô trống không cần tính
-
-    for i in range(3):
-        for j in range(3):
-            value = buzzle_instance.data[i][j]
-            if value != 0:
-                goal_i, goal_j = goal_positions[value]
+    data = buzzle_instance.data
+    size = len(data)
+    goal_positions = None
+    if goal_state is not None:
+        goal_positions = {goal_state[i][j]: (i, j) for i in range(size) for j in range(size)}
+
+    for i in range(size):
+        for j in range(size):
+            value = data[i][j]
+            if value != 0: # Ô trống không cần tính
+                if goal_positions is None:
+                    goal_i, goal_j = divmod(value - 1, size)
+                else:
+                    goal_i, goal_j = goal_positions[value]
                 distance += abs(i - goal_i) + abs(j - goal_j)
     return distance
 
-def generate_random_solvable_state():
-    """Tạo một trạng thái ngẫu nhiên và đảm bảo nó có thể giải được."""
-    while True:
-        numbers = list(range(9))  # Số từ 0-8
-        random.shuffle(numbers)
-        state_data = [numbers[i:i+3] for i in range(0, 9, 3)]
-        if is_solvable(state_data):
-            return state_data
+def _fix_parity_swap_positions(blank_index):
+    """Hai vị trí không chứa ô trống đầu tiên; đổi chỗ chúng sẽ đảo tính giải được."""
+    if blank_index == 0:
+        return 1, 2
+    if blank_index == 1:
+        return 0, 2
+    return 0, 1
+
+def generate_random_solvable_state(size=3):
+    """
+    Tạo một trạng thái ngẫu nhiên (phân phối đều) và đảm bảo nó có thể giải được, không cần lấy mẫu lại:
+    nếu hoán vị ngẫu nhiên không giải được, đổi chỗ hai ô số đầu tiên để đảo tính chẵn lẻ.
+    """
+    numbers = list(range(size * size))
+    random.shuffle(numbers)
+    state_data = [numbers[i:i + size] for i in range(0, size * size, size)]
+    if not is_solvable(state_data):
+        a, b = _fix_parity_swap_positions(numbers.index(0))
+        numbers[a], numbers[b] = numbers[b], numbers[a]
+        state_data = [numbers[i:i + size] for i in range(0, size * size, size)]
+    return state_data
+
+def generate_random_solvable_states(count, size=3, rng=None):
+    """
+    Sinh hàng loạt trạng thái ngẫu nhiên giải được.
+    Trả về: mảng NumPy kích thước (count, size*size), mỗi hàng là một trạng thái phẳng.
+    rng: (Optional) numpy.random.Generator để tái lập kết quả.
+    """
+    import numpy as np # Chỉ cần cho chế độ hàng loạt
+
+    if rng is None:
+        rng = np.random.default_rng()
+    n_cells = size * size
+    states = rng.permuted(np.tile(np.arange(n_cells, dtype=np.min_scalar_type(n_cells - 1)), (count, 1)), axis=1)
+    rows = np.arange(count)
+
+    # Tính chẵn lẻ của hoán vị bằng phân tích chu trình như permutation_parity, cho mọi hàng cùng lúc:
+    # nhân đôi con trỏ gán cho mỗi vị trí chỉ số nhỏ nhất trong chu trình của nó (O(n log n) mỗi hàng),
+    # số chu trình = số vị trí là nhỏ nhất trong chu trình của mình
+    pointers = states.astype(np.intp)
+    labels = np.tile(np.arange(n_cells), (count, 1))
+    for _ in range(max(1, int(n_cells - 1).bit_length())):
+        labels = np.minimum(labels, np.take_along_axis(labels, pointers, axis=1))
+        pointers = np.take_along_axis(pointers, pointers, axis=1)
+    cycles = (labels == np.arange(n_cells)).sum(axis=1)
+    parity = (n_cells - cycles) % 2
+
+    blank_index = np.argmax(states == 0, axis=1)
+    inversion_parity = (parity + blank_index) % 2
+    if size % 2 == 0:
+        inversion_parity = (inversion_parity + size - 1 - blank_index // size) % 2
+
+    unsolvable = inversion_parity == 1
+    first = np.where(blank_index == 0, 1, 0)
+    second = np.where(blank_index <= 1, 2, 1)
+    fix_rows = rows[unsolvable]
+    a, b = first[unsolvable], second[unsolvable]
+    tiles_a = states[fix_rows, a].copy()
+    states[fix_rows, a] = states[fix_rows, b]
+    states[fix_rows, b] = tiles_a
+    return states
 
 def parse_puzzle_input(input_text):
     """
@@ -0,0 +1,64 @@
+"""
+Đánh chỉ số (rank) cho các trạng thái giải được của 8-puzzle.
+
+Mỗi trạng thái giải được được ánh xạ 1-1 vào một số nguyên trong [0, NUM_STATES):
+    rank = vị_trí_ô_trống * 20160 + lehmer(8 ô số) // 2
+Hai hoán vị có mã Lehmer 2k và 2k+1 chỉ khác nhau ở việc đổi chỗ hai ô cuối, nên đúng một
+trong hai có số nghịch thế chẵn (giải được). Nhờ vậy rank dày đặc, dùng trực tiếp làm
+chỉ số cho các mảng (bảng chuyển vị, bảng Q, bảng giá trị...).
+"""
+from math import factorial
+
+BOARD_SIZE = 3
+NUM_CELLS = BOARD_SIZE * BOARD_SIZE
+NUM_TILES = NUM_CELLS - 1
+HALF_PERMUTATIONS = factorial(NUM_TILES) // 2 # 20160
+NUM_STATES = NUM_CELLS * HALF_PERMUTATIONS # 181440
+
+_FACTORIALS = [factorial(NUM_TILES - 1 - i) for i in range(NUM_TILES)]
+
+def _flatten(state):
+    """Nhận list of lists hoặc dãy phẳng, trả về list phẳng."""
+    if state and isinstance(state[0], (list, tuple)):
+        return [tile for row in state for tile in row]
+    return list(state)
+
+def state_to_rank(state):
+    """
+    Tính rank của một trạng thái giải được.
+    Input: state (list of lists, tuple of tuples hoặc dãy phẳng 9 phần tử)
+    """
+    flat = _flatten(state)
+    blank = flat.index(0)
+    tiles = [tile for tile in flat if tile != 0]
+    lehmer = 0
+    for i in range(NUM_TILES - 1):
+        tile = tiles[i]
+        smaller = 0
+        for j in range(i + 1, NUM_TILES):
+            if tiles[j] < tile:
+                smaller += 1
+        lehmer += smaller * _FACTORIALS[i]
+    return blank * HALF_PERMUTATIONS + lehmer // 2
+
+def rank_to_flat(rank):
+    """Trạng thái (dãy phẳng 9 phần tử) ứng với rank."""
+    blank, half = divmod(rank, HALF_PERMUTATIONS)
+    lehmer = half * 2
+    digits = []
+    for i in range(NUM_TILES):
+        digit, lehmer = divmod(lehmer, _FACTORIALS[i])
+        digits.append(digit)
+    # Số nghịch thế = tổng các chữ số Lehmer; nếu lẻ thì đổi sang hoán vị cặp (chữ số áp chót = 1)
+    if sum(digits) % 2 == 1:
+        digits[NUM_TILES - 2] = 1
+    remaining = list(range(1, NUM_CELLS))
+    tiles = [remaining.pop(digit) for digit in digits]
+    return tiles[:blank] + [0] + tiles[blank:]
+
+def rank_to_state(rank):
+    """Trạng thái (list of lists) ứng với rank."""
+    flat = rank_to_flat(rank)
+    return [flat[i:i + BOARD_SIZE] for i in range(0, NUM_CELLS, BOARD_SIZE)]
+
+GOAL_RANK = state_to_rank([1, 2, 3, 4, 5, 6, 7, 8, 0])
@@ -0,0 +1,139 @@
+"""
+Toàn bộ không gian trạng thái 8-puzzle dưới dạng mảng NumPy (dùng cho các thuật toán RL/quy hoạch động).
+
+Mọi hàm ở đây làm việc theo lô (vectorized) và dùng cùng cách đánh chỉ số với
+src.core.state_index: hàng thứ r của all_states() là trạng thái có rank r.
+Các bảng lớn được tính một lần cho mỗi tiến trình rồi cache lại.
+"""
+from functools import lru_cache
+from math import factorial
+
+import numpy as np
+
+from src.core.state_index import (
+    BOARD_SIZE, NUM_CELLS, NUM_TILES, HALF_PERMUTATIONS, NUM_STATES, GOAL_RANK
+)
+
+# Độ dịch chuyển vị trí ô trống theo thứ tự MOVES: up, down, left, right
+MOVE_DELTAS = np.array([-BOARD_SIZE, BOARD_SIZE, -1, 1])
+NO_SUCCESSOR = -1
+
+_FACTORIALS = np.array([factorial(NUM_TILES - 1 - i) for i in range(NUM_TILES)], dtype=np.int64)
+
+def ranks_of(states):
+    """
+    Rank của nhiều trạng thái cùng lúc.
+    Input: mảng (N, 9) các trạng thái giải được (dãy phẳng)
+    Trả về: mảng int64 (N,)
+    """
+    states = np.asarray(states)
+    blank = np.argmin(states, axis=1)
+    tiles = states[states != 0].reshape(len(states), NUM_TILES)
+    lehmer = np.zeros(len(states), dtype=np.int64)
+    for i in range(NUM_TILES - 1):
+        smaller = (tiles[:, i + 1:] < tiles[:, i:i + 1]).sum(axis=1)
+        lehmer += smaller * _FACTORIALS[i]
+    return blank * HALF_PERMUTATIONS + lehmer // 2
+
+@lru_cache(maxsize=None)
+def all_states():
+    """Mảng int8 (NUM_STATES, 9): hàng r là trạng thái có rank r (chỉ đọc, cache theo tiến trình)."""
+    ranks = np.arange(NUM_STATES, dtype=np.int64)
+    blank, half = np.divmod(ranks, HALF_PERMUTATIONS)
+    remainder = half * 2
+    digits = np.empty((NUM_STATES, NUM_TILES), dtype=np.int64)
+    for i in range(NUM_TILES):
+        digits[:, i], remainder = np.divmod(remainder, _FACTORIALS[i])
+    # Hoán vị lẻ -> đổi sang hoán vị cặp (chữ số Lehmer áp chót = 1), như rank_to_flat
+    odd = digits.sum(axis=1) % 2 == 1
+    digits[odd, NUM_TILES - 2] = 1
+
+    # Giải mã Lehmer: ô thứ i là số nhỏ thứ digit+1 trong các số chưa dùng
+    available = np.ones((NUM_STATES, NUM_TILES), dtype=bool)
+    tiles = np.empty((NUM_STATES, NUM_TILES), dtype=np.int8)
+    rows = np.arange(NUM_STATES)
+    for i in range(NUM_TILES):
+        chosen = np.argmax(np.cumsum(available, axis=1) == digits[:, i:i + 1] + 1, axis=1)
+        tiles[:, i] = chosen + 1
+        available[rows, chosen] = False
+
+    states = np.zeros((NUM_STATES, NUM_CELLS), dtype=np.int8)
+    for pos in range(NUM_CELLS):
+        if pos < NUM_TILES:
+            before = pos < blank
+            states[before, pos] = tiles[before, pos]
+        if pos > 0:
+            after = pos > blank
+            states[after, pos] = tiles[after, pos - 1]
+    states.setflags(write=False)
+    return states
+
+def blank_positions():
+    """Vị trí ô trống của mọi trạng thái (rank // 20160)."""
+    return np.arange(NUM_STATES) // HALF_PERMUTATIONS
+
+@lru_cache(maxsize=None)
+def successor_table():
+    """
+    Bảng kế tiếp int32 (NUM_STATES, 4): successor_table()[r, a] là rank của trạng thái
+    sau khi thực hiện MOVES[a] từ trạng thái r, hoặc -1 nếu nước đi không hợp lệ.
+    """
+    states = all_states()
+    blank = blank_positions()
+    row, col = np.divmod(blank, BOARD_SIZE)
+    valid = np.stack([row > 0, row < BOARD_SIZE - 1, col > 0, col < BOARD_SIZE - 1], axis=1)
+    successors = np.full((NUM_STATES, 4), NO_SUCCESSOR, dtype=np.int32)
+    for action, delta in enumerate(MOVE_DELTAS):
+        ranks = np.flatnonzero(valid[:, action])
+        moved = np.array(states[ranks])
+        src = blank[ranks]
+        dst = src + delta
+        moved[np.arange(len(ranks)), src] = moved[np.arange(len(ranks)), dst]
+        moved[np.arange(len(ranks)), dst] = 0
+        successors[ranks, action] = ranks_of(moved)
+    successors.setflags(write=False)
+    return successors
+
+@lru_cache(maxsize=None)
+def manhattan_distances():
+    """Khoảng cách Manhattan tới đích của mọi trạng thái (int8, NUM_STATES)."""
+    states = all_states().astype(np.int64)
+    pos = np.arange(NUM_CELLS)
+    goal_pos = np.where(states == 0, pos, states - 1) # Ô trống không được tính (khoảng cách 0)
+    distances = (np.abs(pos // BOARD_SIZE - goal_pos // BOARD_SIZE)
+                 + np.abs(pos % BOARD_SIZE - goal_pos % BOARD_SIZE))
+    distances[states == 0] = 0
+    result = distances.sum(axis=1).astype(np.int8)
+    result.setflags(write=False)
+    return result
+
+@lru_cache(maxsize=None)
+def goal_distances():
+    """Số bước tối ưu tới đích của mọi trạng thái (BFS ngược từ đích, int8, NUM_STATES)."""
+    successors = successor_table()
+    distances = np.full(NUM_STATES, -1, dtype=np.int8)
+    distances[GOAL_RANK] = 0
+    frontier = np.array([GOAL_RANK])
+    depth = 0
+    while frontier.size:
+        depth += 1
+        # Đồ thị vô hướng: kế tiếp của lớp d là các ứng viên của lớp d + 1
+        candidates = successors[frontier].ravel()
+        candidates = np.unique(candidates[candidates != NO_SUCCESSOR])
+        frontier = candidates[distances[candidates] == -1]
+        distances[frontier] = depth
+    distances.setflags(write=False)
+    return distances
+
+@lru_cache(maxsize=None)
+def ranks_by_depth():
+    """
+    Các rank được nhóm theo số bước tối ưu tới đích.
+    Trả về (ranks, offsets): ranks[offsets[d]:offsets[d + 1]] là các trạng thái ở độ sâu d.
+    """
+    distances = goal_distances()
+    ranks = np.argsort(distances, kind="stable").astype(np.int32)
+    offsets = np.searchsorted(distances[ranks], np.arange(distances.max() + 2))
+    ranks.setflags(write=False)
+    offsets.setflags(write=False)
+    return ranks, offsets
@@ -0,0 +1,359 @@
+"""
+Dịch vụ HTTP (JSON) cục bộ cho bộ giải 8-puzzle, chỉ dùng thư viện chuẩn.
+
+Chạy:
+    python -m src.cli serve --port 8080 --workers 4
+
+Các endpoint:
+- POST /solve   body {"board": "1 2 3 4 0 6 7 5 8", "algorithm": "astar", "heuristic": "manhattan",
+                      "options": {...}, "deadline_s": 5, "include_path": true}
+- GET  /metrics Biểu đồ tần suất độ trễ, tỷ lệ trúng cache, số yêu cầu được gộp...
+- GET  /health
+
+Việc giải (tốn CPU) chạy trong một process pool; mỗi worker nạp các module thuật toán
+đúng một lần khi khởi động, mỗi mô hình RL được nạp ở yêu cầu đầu tiên dùng đến nó. Các yêu cầu giống nhau đang chạy đồng thời
+được gộp (coalesce) vào một lần tìm kiếm duy nhất. Chỉ kết quả của các thuật toán tất định
+(DETERMINISTIC_ALGORITHMS) được lưu trong cache LRU; thuật toán ngẫu nhiên (simulated annealing,
+genetic algorithm, random-restart hill climbing) và các mô hình RL (có thể được huấn luyện lại) luôn chạy lại.
+Một lần tìm kiếm dừng ở thời hạn của yêu cầu đã khởi động nó (tối đa max_solve_s), kể cả thời gian chờ
+trong hàng đợi của pool, nên yêu cầu đã trả về 504 không giữ worker tới max_solve_s.
+"""
+import asyncio
+import contextlib
+import json
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from src.cli import solve_board, _json_default
+from src.algorithms.search_algorithms import HEURISTIC_FUNCTIONS
+
+MAX_BODY_SIZE = 64 * 1024
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, float("inf"))
+# Các trạng thái kết quả có thể lưu cache (không phụ thuộc vào thời hạn của yêu cầu)
+CACHEABLE_STATUSES = {"solved", "no_solution", "unsolvable", "invalid_input"}
+# Trạng thái chỉ phụ thuộc vào bảng, không phụ thuộc thuật toán: luôn lưu được
+INPUT_STATUSES = {"unsolvable", "invalid_input"}
+# Thuật toán cho cùng kết quả với cùng bảng, heuristic và tùy chọn
+# (ARA* không thuộc nhóm này: lời giải phụ thuộc vào thời gian cải thiện)
+DETERMINISTIC_ALGORITHMS = {
+    "bfs", "dfs", "ucs", "ids",
+    "astar", "idastar", "greedy", "weighted_astar", "smastar", "beam_search", "bidirectional_mm",
+    "hill_climbing"
+}
+ROUTES = {"/solve", "/metrics", "/health"}
+
+_HTTP_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error", 504: "Gateway Timeout"
+}
+
+# --- Phía worker ---
+
+def _worker_init():
+    """Chạy một lần trong mỗi tiến trình worker: nạp sẵn các module thuật toán (mô hình RL nạp khi cần)."""
+    sys.stdout = sys.stderr # Thông báo của thuật toán không được lẫn vào đâu khác
+    import src.algorithms.algorithm_manager
+
+def _worker_solve(board_text, algorithm, heuristic, options, time_limit, deadline=None):
+    if deadline is not None:
+        # Thời gian còn lại của yêu cầu sau khi chờ trong hàng đợi; đã hết hạn -> dừng gần như ngay
+        time_limit = min(time_limit, max(deadline - time.time(), 0.001))
+    record = solve_board(board_text, algorithm=algorithm, heuristic=heuristic,
+                         options=options, time_limit=time_limit)
+    # Chỉ giữ giá trị JSON trong stats: bản ghi được pickle về tiến trình chính và giữ trong cache
+    record["stats"] = json.loads(json.dumps(record["stats"], default=_json_default))
+    return record
+
+# --- Thống kê ---
+
+class LatencyHistogram:
+    """Biểu đồ tần suất độ trễ với các ngưỡng cố định (giây)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+
+    def snapshot(self):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum_s": self.total,
+            "mean_s": self.total / self.count if self.count else 0.0,
+            "buckets_le": buckets
+        }
+
+class ServiceMetrics:
+    def __init__(self):
+        self.started_at = time.time()
+        self.requests = {}
+        self.latency = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.coalesced = 0
+        self.searches = 0
+        self.deadline_exceeded = 0
+        self.in_flight = 0
+
+    def observe(self, route, status_code, seconds):
+        key = f"{route} {status_code}"
+        self.requests[key] = self.requests.get(key, 0) + 1
+        self.latency.setdefault(route, LatencyHistogram()).observe(seconds)
+
+    def snapshot(self, cache_size):
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "uptime_s": time.time() - self.started_at,
+            "requests": dict(self.requests),
+            "latency": {route: hist.snapshot() for route, hist in self.latency.items()},
+            "cache": {
+                "size": cache_size,
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "hit_rate": self.cache_hits / lookups if lookups else 0.0
+            },
+            "coalesced_requests": self.coalesced,
+            "searches_started": self.searches,
+            "searches_in_flight": self.in_flight,
+            "deadline_exceeded": self.deadline_exceeded
+        }
+
+# --- Dịch vụ ---
+
+class SolveService:
+    """
+    Parameters:
+    - workers: Số tiến trình giải
+    - cache_size: Số kết quả tối đa giữ trong cache LRU (0 -> tắt cache)
+    - default_deadline_s: Thời hạn mặc định của một yêu cầu /solve
+    - max_solve_s: Giới hạn thời gian cứng của một lần tìm kiếm trong worker
+    """
+
+    def __init__(self, workers=2, cache_size=4096, default_deadline_s=10.0, max_solve_s=60.0):
+        self.workers = workers
+        self.cache_size = cache_size
+        self.default_deadline_s = default_deadline_s
+        self.max_solve_s = max_solve_s
+        self.cache = OrderedDict()
+        self.pending = {} # key -> asyncio.Future của lần tìm kiếm đang chạy
+        self.metrics = ServiceMetrics()
+        self.executor = None
+
+    def start(self):
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_worker_init)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    @staticmethod
+    def _request_key(board_text, algorithm, heuristic, options):
+        board = tuple(int(x) for x in board_text.replace(",", " ").split())
+        return (board, algorithm.lower(), (heuristic or "manhattan").lower(),
+                json.dumps(options, sort_keys=True))
+
+    def _cache_get(self, key):
+        if not self.cache_size:
+            return None
+        record = self.cache.get(key)
+        if record is None:
+            self.metrics.cache_misses += 1
+            return None
+        self.cache.move_to_end(key)
+        self.metrics.cache_hits += 1
+        return record
+
+    @staticmethod
+    def _is_cacheable(key, record):
+        status = record["status"]
+        if status in INPUT_STATUSES:
+            return True
+        return status in CACHEABLE_STATUSES and key[1] in DETERMINISTIC_ALGORITHMS
+
+    def _cache_put(self, key, record):
+        if not self.cache_size or not self._is_cacheable(key, record):
+            return
+        self.cache[key] = record
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def _run_search(self, key, board_text, algorithm, heuristic, options, deadline):
+        """
+        Chạy một lần tìm kiếm trong process pool và phát kết quả cho mọi yêu cầu đang chờ.
+        deadline: Thời điểm (time.time()) hết hạn của yêu cầu khởi động lần tìm kiếm
+        """
+        loop = asyncio.get_running_loop()
+        self.metrics.searches += 1
+        self.metrics.in_flight += 1
+        try:
+            record = await loop.run_in_executor(
+                self.executor, _worker_solve, board_text, algorithm, heuristic, options, self.max_solve_s, deadline
+            )
+            self._cache_put(key, record)
+            return record
+        finally:
+            self.metrics.in_flight -= 1
+            self.pending.pop(key, None)
+
+    async def solve(self, payload):
+        """Xử lý một yêu cầu /solve. Trả về (status_code, body)."""
+        board = payload.get("board")
+        if isinstance(board, list):
+            if board and isinstance(board[0], list):
+                board = [tile for row in board for tile in row]
+            board = " ".join(str(tile) for tile in board)
+        if not isinstance(board, str):
+            return 400, {"error": "Field 'board' is required"}
+        algorithm = str(payload.get("algorithm", "astar"))
+        heuristic = payload.get("heuristic")
+        if heuristic is not None and (not isinstance(heuristic, str) or heuristic.lower() not in HEURISTIC_FUNCTIONS):
+            return 400, {"error": f"Field 'heuristic' must be one of {sorted(HEURISTIC_FUNCTIONS)}"}
+        options = payload.get("options")
+        if options is None:
+            options = {}
+        elif not isinstance(options, dict):
+            return 400, {"error": "Field 'options' must be a JSON object"}
+        deadline_s = payload.get("deadline_s", self.default_deadline_s)
+        if isinstance(deadline_s, bool) or not isinstance(deadline_s, (int, float)) or not deadline_s > 0:
+            return 400, {"error": "Field 'deadline_s' must be a positive number"}
+        deadline_s = float(deadline_s)
+        try:
+            key = self._request_key(board, algorithm, heuristic, options)
+        except ValueError:
+            return 400, {"error": "Board must contain integers only"}
+
+        record = self._cache_get(key)
+        cached = record is not None
+        if record is None:
+            task = self.pending.get(key)
+            if task is None:
+                task = asyncio.ensure_future(self._run_search(key, board, algorithm, heuristic, options,
+                                                              time.time() + deadline_s))
+                self.pending[key] = task
+            else:
+                self.metrics.coalesced += 1
+            try:
+                # shield: hết hạn của một yêu cầu không hủy lần tìm kiếm mà yêu cầu khác còn chờ
+                record = await asyncio.wait_for(asyncio.shield(task), timeout=deadline_s)
+            except asyncio.TimeoutError:
+                self.metrics.deadline_exceeded += 1
+                return 504, {"status": "deadline_exceeded", "deadline_s": deadline_s}
+
+        body = dict(record)
+        body["cached"] = cached
+        if not payload.get("include_path", True):
+            body.pop("path", None)
+        return 200, body
+
+    async def handle(self, method, path, body):
+        """Định tuyến một yêu cầu HTTP. Trả về (status_code, body)."""
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/metrics":
+            return 200, self.metrics.snapshot(len(self.cache))
+        if path == "/solve":
+            if method != "POST":
+                return 405, {"error": "Use POST"}
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                return 400, {"error": "Body must be JSON"}
+            if not isinstance(payload, dict):
+                return 400, {"error": "Body must be a JSON object"}
+            return await self.solve(payload)
+        return 404, {"error": f"Unknown path '{path}'"}
+
+    # --- HTTP/1.1 tối giản trên asyncio streams ---
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        parts = request_line.decode("latin-1").split()
+        if len(parts) != 3:
+            raise ValueError("Malformed request line")
+        method, target, version = parts
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY_SIZE:
+            raise OverflowError()
+        body = await reader.readexactly(length) if length else b""
+        keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+        return method.upper(), target.split("?", 1)[0], body, keep_alive
+
+    @staticmethod
+    def _write_response(writer, status_code, body, keep_alive):
+        data = json.dumps(body, default=_json_default, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status_code} {_HTTP_REASONS.get(status_code, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + data)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except OverflowError:
+                    self._write_response(writer, 413, {"error": "Body too large"}, False)
+                    break
+                except (ValueError, asyncio.IncompleteReadError):
+                    self._write_response(writer, 400, {"error": "Malformed request"}, False)
+                    break
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                start = time.perf_counter()
+                try:
+                    status_code, response = await self.handle(method, path, body)
+                except Exception as e:
+                    status_code, response = 500, {"error": f"{type(e).__name__}: {e}"}
+                self.metrics.observe(path if path in ROUTES else "other", status_code, time.perf_counter() - start)
+                self._write_response(writer, status_code, response, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+async def serve(host="127.0.0.1", port=8080, **service_kwargs):
+    """Khởi động dịch vụ và phục vụ cho đến khi bị dừng (Ctrl+C)."""
+    service = SolveService(**service_kwargs)
+    service.start()
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Solve service listening on http://{host}:{port} ({service.workers} workers)", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
@@ -1,13 +1,27 @@
-from .gui_components import (
-    PuzzleBoard, SolutionNavigationPanel, 
-    ControlPanel, ResultPanel, SolverThread,
-    LocalSearchConfigPanel
-)
-from .main_gui import PuzzleWindow
-from .csp_widget import CSPWidget
+# Import trễ (lazy): mỗi module giao diện chỉ được nạp khi tên của nó được dùng lần đầu,
+# nên `from src.ui import PuzzleWindow` không kéo theo các tab/widget chưa cần tới.
+_LAZY_EXPORTS = {
+    'PuzzleBoard': '.gui_components',
+    'SolutionNavigationPanel': '.gui_components',
+    'ControlPanel': '.gui_components',
+    'ResultPanel': '.gui_components',
+    'SolverThread': '.gui_components',
+    'LocalSearchConfigPanel': '.gui_components',
+    'PuzzleWindow': '.main_gui',
+    'CSPWidget': '.csp_widget',
+}
 
 __all__ = [
     'PuzzleBoard', 'SolutionNavigationPanel', 
     'ControlPanel', 'ResultPanel', 'SolverThread',
     'PuzzleWindow', 'LocalSearchConfigPanel', 'CSPWidget'
 ]
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'src.ui' has no attribute '{name}'")
+    import importlib
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -573,7 +573,12 @@ class ResultPanel(QWidget):
             "astar": "Tìm Kiếm A*:\n- Kết hợp chi phí đường đi (g) và ước lượng heuristic (h) (f = g + h).\n- Sử dụng khoảng cách Manhattan làm heuristic.\n- Đảm bảo đường đi ngắn nhất nếu heuristic tối ưu (không bao giờ ước lượng quá chi phí thực tế) và nhất quán.\n- Thường hiệu quả hơn BFS/UCS.",
             "greedy": "Tìm Kiếm Tham Lam Best-First:\n- Mở rộng nút có vẻ gần nhất với đích dựa chỉ trên heuristic (giá trị h).\n- Nhanh nhưng không đảm bảo tối ưu hoặc đầy đủ.\n- Có thể bị mắc kẹt trong vòng lặp hoặc đi theo đường không tối ưu.",
             "ids": "Tìm Kiếm Sâu Dần (IDS):\n- Thực hiện DFS với giới hạn độ sâu tăng dần (0, 1, 2,...).\n- Kết hợp tính đầy đủ và tối ưu của BFS với hiệu quả bộ nhớ của DFS.\n- Có thể chậm hơn do phải mở rộng lại các nút ở độ sâu nông.",
-            "idastar": "IDA* (Iterative Deepening A*):\n- Sử dụng giá trị f của A* (g + h) như một ngưỡng cắt tăng dần.\n- Hiệu quả bộ nhớ hơn A* cho các bài toán lớn.\n- Đảm bảo tối ưu với heuristic tối ưu.",
+            "weighted_astar": "A* Có Trọng Số (Weighted A*):\n- Dùng f = g + w * h với w > 1 để ưu tiên heuristic.\n- Nhanh hơn nhiều và mở rộng ít nút hơn A*.\n- Độ dài lời giải không vượt quá w lần độ dài tối ưu.",
+            "arastar": "ARA* (Anytime Repairing A*):\n- Tìm nhanh một lời giải với w lớn, sau đó giảm dần w để cải thiện.\n- Tái sử dụng kết quả tìm kiếm trước, chỉ mở lại các trạng thái không nhất quán.\n- Dừng khi hết thời gian hoặc đạt lời giải tối ưu (w = 1).",
+            "smastar": "SMA* (Simplified Memory-bounded A*):\n- Giống A* nhưng chỉ giữ tối đa một số nút cố định trong bộ nhớ.\n- Khi đầy bộ nhớ, quên nút lá tệ nhất và lưu giá trị f của nó ở nút cha để sinh lại khi cần.\n- Đảm bảo tối ưu nếu đường đi tối ưu vừa trong bộ nhớ; đánh đổi bộ nhớ lấy thời gian.",
+            "beam_search": "Tìm Kiếm Chùm (Beam Search):\n- Duyệt theo từng độ sâu, chỉ giữ lại một số cố định (độ rộng chùm) trạng thái có heuristic tốt nhất.\n- Bộ nhớ và thời gian có thể dự đoán: O(độ rộng x độ sâu).\n- Phù hợp cho bảng lớn (15-, 24-puzzle); không đảm bảo tối ưu hay đầy đủ.",
+            "bidirectional_mm": "Tìm Kiếm Hai Chiều MM (Meet in the Middle):\n- Chạy đồng thời A* xuôi từ trạng thái đầu và ngược từ trạng thái đích.\n- Ưu tiên nút theo max(f, 2g) để hai chiều gặp nhau đúng ở giữa.\n- Điều kiện dừng đảm bảo lời giải tối ưu với heuristic admissible.\n- Thường mở rộng ít nút hơn A* một chiều với các trạng thái khó.",
+            "idastar": "IDA* (Iterative Deepening A*):\n- Sử dụng giá trị f của A* (g + h) như một ngưỡng cắt tăng dần.\n- Hiệu quả bộ nhớ hơn A* cho các bài toán lớn.\n- Dùng bảng chuyển vị kích thước cố định để tránh mở rộng lại các trạng thái trùng lặp.\n- Đảm bảo tối ưu với heuristic tối ưu.",
             "hill_climbing": "Leo Đồi (Hill Climbing):\n- Thuật toán tìm kiếm cục bộ luôn di chuyển đến trạng thái lân cận có giá trị heuristic tốt nhất.\n- Rất nhanh nhưng dễ bị mắc kẹt tại các cực tiểu cục bộ.\n- Có thể sử dụng khoảng cách Manhattan hoặc Số ô sai vị trí làm heuristic.\n- Không đảm bảo giải pháp tối ưu.",
             "random_restart_hc": "Leo Đồi Khởi Động Lại Ngẫu Nhiên:\n- Chạy leo đồi nhiều lần từ các điểm bắt đầu ngẫu nhiên khác nhau.\n- Giúp vượt qua vấn đề cực tiểu cục bộ của leo đồi cơ bản.\n- Có nhiều khả năng tìm ra giải pháp tốt, tuy vẫn không đảm bảo tối ưu.\n- Có thể sử dụng khoảng cách Manhattan hoặc Số ô sai vị trí làm heuristic.",
             "simulated_annealing": "Mô Phỏng Luyện Kim (Simulated Annealing):\n- Thuật toán tìm kiếm cục bộ xác suất lấy cảm hứng từ quá trình luyện kim.\n- Cho phép di chuyển đến trạng thái tệ hơn với xác suất giảm dần theo thời gian (khi 'nhiệt độ' giảm).\n- Giúp thoát khỏi cực tiểu cục bộ.\n- Có thể sử dụng khoảng cách Manhattan hoặc Số ô sai vị trí làm heuristic.\n- Không đảm bảo tối ưu nhưng thường tìm ra giải pháp tốt.",
@@ -629,6 +634,25 @@ class ResultPanel(QWidget):
                 "- Trích xuất chính sách π*(s) từ hàm giá trị tối ưu.\n"
                 "- Đảm bảo tìm ra chính sách tối ưu.\n"
                 "- Ứng dụng trong 8-puzzle: Tìm chính sách tối ưu để di chuyển từ bất kỳ trạng thái nào đến trạng thái đích."
+            ),
+            "policy_iteration": (
+                "Policy Iteration:\n\n"
+                "- Thuật toán quy hoạch động xen kẽ hai bước cho đến khi chính sách không đổi:\n"
+                "  1. Đánh giá chính sách: tính U_π(s) = R(s,π(s)) + γ * U_π(s') cho chính sách hiện tại,\n"
+                "     bằng cách giải hệ phương trình tuyến tính hoặc lặp nhiều lần quét.\n"
+                "  2. Cải thiện chính sách: π(s) = argmax_a [R(s,a) + γ * U_π(s')]\n"
+                "- Thường hội tụ sau rất ít vòng cải thiện (ít hơn nhiều so với số lần lặp của Value Iteration).\n"
+                "- Mỗi vòng tốn kém hơn vì phải đánh giá toàn bộ chính sách.\n"
+                "- Ứng dụng trong 8-puzzle: Cho cùng chính sách tối ưu như Value Iteration trên toàn bộ 181440 trạng thái."
+            ),
+            "prioritized_sweeping": (
+                "Prioritized Sweeping:\n\n"
+                "- Biến thể của Value Iteration không quét toàn bộ không gian trạng thái.\n"
+                "- Dùng hàng đợi ưu tiên theo sai số Bellman |max_a [R(s,a) + γ * U(s')] - U(s)|.\n"
+                "- Mỗi bước cập nhật trạng thái có sai số lớn nhất, sau đó tính lại sai số của các\n"
+                "  trạng thái liền trước (những trạng thái có thể đi tới trạng thái vừa cập nhật).\n"
+                "- Các thay đổi giá trị lan dần từ trạng thái đích ra xa, nên số lần cập nhật ít hơn nhiều.\n"
+                "- Ứng dụng trong 8-puzzle: Mỗi trạng thái chỉ cần được cập nhật khoảng một lần."
             )
         }
 
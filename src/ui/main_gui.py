@@ -14,8 +14,7 @@ from PyQt5.QtGui import QFont
 from src.core.buzzle_logic import Buzzle, generate_random_solvable_state, is_solvable, parse_puzzle_input
 from .gui_components import (PuzzleBoard, SolutionNavigationPanel, ControlPanel,
                             ResultPanel, SolverThread, LocalSearchConfigPanel)
-# Import the new algorithm
-from src.algorithms.and_or_graph_search import NonDeterministicPuzzle, and_or_search, FAILURE, EMPTY_PLAN
+# Thuật toán AND-OR chỉ được import khi tab "môi trường không xác định" được dùng
 
 class PuzzleWindow(QMainWindow):
     def __init__(self):
@@ -31,20 +30,26 @@ class PuzzleWindow(QMainWindow):
         self.init_normal_tab()
         self.tab_widget.addTab(self.normal_tab, "Thuật Toán Tiêu Chuẩn")
 
+        # Các tab còn lại chỉ là khung rỗng lúc khởi động; nội dung được dựng
+        # ở lần đầu tab được chọn (xem _ensure_tab_built) để cửa sổ hiện nhanh hơn.
         # Create and add the uninformed search tab
         self.uninformed_search_tab = QWidget()
-        self.init_uninformed_search_tab()
         self.tab_widget.addTab(self.uninformed_search_tab, "Tìm kiếm trong môi trường không xác định")
         
         # Create and add the blind search tab
         self.blind_search_tab = QWidget()
-        self.init_blind_search_tab()
         self.tab_widget.addTab(self.blind_search_tab, "Tìm kiếm với Quan sát Mù Hoàn toàn")
         
         # Create and add the CSP tab
         self.csp_tab = QWidget()
-        self.init_csp_tab()
         self.tab_widget.addTab(self.csp_tab, "Thoả mãn ràng buộc")
+
+        self._pending_tab_builders = {
+            self.uninformed_search_tab: self.init_uninformed_search_tab,
+            self.blind_search_tab: self.init_blind_search_tab,
+            self.csp_tab: self.init_csp_tab
+        }
+        self.tab_build_times = {} # Tên tab -> thời gian dựng (giây)
         
         # Set the tab widget as the central widget
         self.setCentralWidget(self.tab_widget)
@@ -66,8 +71,22 @@ class PuzzleWindow(QMainWindow):
         self.progress_bar.setVisible(False)  # Ẩn ban đầu
         self.statusBar().addPermanentWidget(self.progress_bar)
 
+    def _ensure_tab_built(self, index):
+        """Dựng nội dung của tab ở lần đầu tab được chọn."""
+        tab = self.tab_widget.widget(index)
+        builder = self._pending_tab_builders.pop(tab, None)
+        if builder is None:
+            return
+        start = time.perf_counter()
+        builder()
+        elapsed = time.perf_counter() - start
+        tab_name = self.tab_widget.tabText(index)
+        self.tab_build_times[tab_name] = elapsed
+        print(f"[startup] Built tab '{tab_name}' in {elapsed * 1000:.1f} ms", file=sys.stderr)
+
     def on_tab_changed(self, index):
         """Handle tab change events"""
+        self._ensure_tab_built(index)
         # You can update tab-specific content here if needed
         current_tab_name = self.tab_widget.tabText(index)
         if current_tab_name == "Tìm kiếm trong môi trường không xác định":
@@ -522,6 +541,7 @@ class PuzzleWindow(QMainWindow):
 
     def _format_plan_for_display(self, plan, current_state_matrix, indent_level=0):
         """Recursively formats the conditional plan for display in QTextEdit."""
+        from src.algorithms.and_or_graph_search import FAILURE, EMPTY_PLAN
         indent = "  " * indent_level
         if plan == EMPTY_PLAN:
             return indent + "<ĐÃ ĐẠT ĐÍCH (Kế hoạch rỗng)>\n"
@@ -588,6 +608,7 @@ class PuzzleWindow(QMainWindow):
 
     def solve_uninformed(self):
         """Handles the solving process for the AND-OR search."""
+        from src.algorithms.and_or_graph_search import NonDeterministicPuzzle, and_or_search, FAILURE, EMPTY_PLAN
         input_text = self.initial_state_input_uninformed.text()
         initial_matrix = self._parse_2x2_input(input_text)
 
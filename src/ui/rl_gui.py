@@ -4,13 +4,25 @@ from PyQt5.QtWidgets import (QWidget, QGridLayout, QVBoxLayout, QHBoxLayout,
                            QGroupBox, QSplitter, QProgressBar, QTabWidget, QCheckBox)
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont, QColor
-import numpy as np
-import matplotlib
-matplotlib.use('Qt5Agg')
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-import matplotlib.pyplot as plt
-import networkx as nx
+from types import SimpleNamespace
+
+# matplotlib, networkx và numpy chỉ được import khi widget biểu đồ đầu tiên được tạo,
+# để việc import module này (và khởi động GUI) không phải trả chi phí đó.
+_PLOTTING = None
+
+def _plotting_modules():
+    """Import trễ các thư viện vẽ biểu đồ (một lần) và trả về chúng trong một namespace."""
+    global _PLOTTING
+    if _PLOTTING is None:
+        import numpy as np
+        import matplotlib
+        matplotlib.use('Qt5Agg')
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        import matplotlib.pyplot as plt
+        import networkx as nx
+        _PLOTTING = SimpleNamespace(np=np, plt=plt, nx=nx, Figure=Figure, FigureCanvas=FigureCanvas)
+    return _PLOTTING
 
 class RLConfigPanel(QWidget):
     """Panel cấu hình cho thuật toán học tăng cường (RL)."""
@@ -276,8 +288,9 @@ class StateGraphVisualization(QWidget):
         layout = QVBoxLayout(self)
         
         # Tạo figure cho matplotlib
-        self.figure = Figure(figsize=(5, 4), dpi=100)
-        self.canvas = FigureCanvas(self.figure)
+        plotting = _plotting_modules()
+        self.figure = plotting.Figure(figsize=(5, 4), dpi=100)
+        self.canvas = plotting.FigureCanvas(self.figure)
         self.canvas.setMinimumHeight(350)
         layout.addWidget(self.canvas)
         
@@ -291,7 +304,7 @@ class StateGraphVisualization(QWidget):
         layout.addWidget(self.refresh_button)
         
         # Khởi tạo đồ thị trống
-        self.graph = nx.DiGraph()
+        self.graph = plotting.nx.DiGraph()
         self.utilities = {}
         self.selected_states = []
         
@@ -313,7 +326,7 @@ class StateGraphVisualization(QWidget):
             # Nếu không có danh sách cụ thể, lấy ngẫu nhiên một số trạng thái (tối đa 10)
             all_states = list(utilities.keys())
             if len(all_states) > 10:
-                self.selected_states = np.random.choice(all_states, 10, replace=False)
+                self.selected_states = _plotting_modules().np.random.choice(all_states, 10, replace=False)
             else:
                 self.selected_states = all_states
         else:
@@ -346,6 +359,8 @@ class StateGraphVisualization(QWidget):
     
     def update_graph_visualization(self):
         """Cập nhật biểu đồ visualization."""
+        plotting = _plotting_modules()
+        plt, nx = plotting.plt, plotting.nx
         self.figure.clear()
         ax = self.figure.add_subplot(111)
         
@@ -399,8 +414,9 @@ class TrainingStatsVisualization(QWidget):
         layout = QVBoxLayout(self)
         
         # Tạo figure cho matplotlib
-        self.figure = Figure(figsize=(5, 4), dpi=100)
-        self.canvas = FigureCanvas(self.figure)
+        plotting = _plotting_modules()
+        self.figure = plotting.Figure(figsize=(5, 4), dpi=100)
+        self.canvas = plotting.FigureCanvas(self.figure)
         self.canvas.setMinimumHeight(350)
         layout.addWidget(self.canvas)
         
@@ -0,0 +1,75 @@
+"""
+Đo thời gian khởi động GUI (time-to-first-frame).
+
+Các mốc thời gian được tính từ `origin` (thường là dòng đầu tiên của main.py,
+nên không gồm thời gian khởi động trình thông dịch). Báo cáo được in ra stderr
+và, nếu biến môi trường BUZZLE_STARTUP_REPORT chỉ tới một file, được ghi thêm
+vào file đó dưới dạng một dòng JSON để theo dõi theo thời gian trên từng máy.
+"""
+import json
+import os
+import platform
+import sys
+import time
+
+REPORT_ENV_VAR = "BUZZLE_STARTUP_REPORT"
+
+class StartupTimer:
+    def __init__(self, origin=None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.marks = []
+        self._reported = False
+
+    def mark(self, label):
+        """Ghi lại một mốc (giây kể từ origin)."""
+        self.marks.append((label, time.perf_counter() - self.origin))
+
+    def report(self, extra=None):
+        """Trả về dict báo cáo: các mốc, tổng thời gian và thông tin máy."""
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "host": platform.node(),
+            "python": platform.python_version(),
+            "marks_s": {label: round(elapsed, 4) for label, elapsed in self.marks},
+            "total_s": round(self.marks[-1][1], 4) if self.marks else 0.0
+        }
+        if extra:
+            report.update(extra)
+        return report
+
+    def emit(self, extra=None):
+        """In báo cáo ra stderr và ghi vào file BUZZLE_STARTUP_REPORT (nếu có). Chỉ chạy một lần."""
+        if self._reported:
+            return None
+        self._reported = True
+        report = self.report(extra)
+        summary = " | ".join(f"{label} {elapsed:.3f}s" for label, elapsed in self.marks)
+        print(f"[startup] {summary}", file=sys.stderr)
+        report_path = os.environ.get(REPORT_ENV_VAR)
+        if report_path:
+            try:
+                with open(report_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(report, ensure_ascii=False) + "\n")
+            except OSError as e:
+                print(f"[startup] Could not write startup report to {report_path}: {e}", file=sys.stderr)
+        return report
+
+    def watch_first_paint(self, widget, extra=None):
+        """
+        Ghi mốc 'first_frame' khi widget được vẽ lần đầu rồi phát báo cáo.
+        Dùng event filter của Qt nên chỉ import PyQt5 khi được gọi.
+        """
+        from PyQt5.QtCore import QObject, QEvent
+
+        timer = self
+
+        class _FirstPaintFilter(QObject):
+            def eventFilter(self, obj, event):
+                if event.type() == QEvent.Paint:
+                    obj.removeEventFilter(self)
+                    timer.mark("first_frame")
+                    timer.emit(extra)
+                return False
+
+        self._paint_filter = _FirstPaintFilter(widget) # Giữ tham chiếu để filter không bị thu hồi
+        widget.installEventFilter(self._paint_filter)